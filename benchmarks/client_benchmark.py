@@ -0,0 +1,71 @@
+"""
+This file measures how many requests per second EMSClient makes against a running API,
+comparing a new connection per call (the module-level requests functions the client used
+before) to the pooled keep-alive session of the client. Start the API first, e.g. with
+python -m src.resources_and_models, and point --url at it.
+
+Usage: python -m benchmarks.client_benchmark [--url http://127.0.0.1:5000/api/]
+       [--endpoint events/?limit=1] [--calls 500] [--threads 1]
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import time
+import requests
+from src.ems_client import EMSClient
+
+
+def unpooled_call(url, endpoint):
+    """Makes a request the way EMSClient did before, with a new connection"""
+    return requests.get(f"{url}{endpoint}", timeout=10)
+
+
+def calls_per_second(call, calls, threads):
+    """
+    Makes the calls from the given number of threads.
+
+    :param function call: Function making one request
+    :param int calls: Number of requests in total
+    :param int threads: Number of threads making the requests
+    :returns float: Requests per second
+    """
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        responses = list(executor.map(lambda _: call(), range(calls)))
+    elapsed = time.perf_counter() - started
+    failed = sum(1 for response in responses if response.status_code >= 400)
+    if failed:
+        print(f"  {failed} of the responses were errors")
+    return calls / elapsed
+
+
+def main(url, endpoint, calls, threads):
+    """
+    Prints the throughput of both transports.
+
+    :param str url: Base URL of the API
+    :param str endpoint: Endpoint requested with GET
+    :param int calls: Number of requests per transport
+    :param int threads: Number of threads sharing the client
+    """
+    with EMSClient(url, pool_maxsize=threads) as client:
+        # Opens the connections so that both cases start warm
+        client.request("GET", endpoint)
+        cases = [
+            ("new connection per call (old)", lambda: unpooled_call(url, endpoint)),
+            ("EMSClient session (new)", lambda: client.request("GET", endpoint)),
+        ]
+        print(f"{calls} x GET {url}{endpoint} from {threads} thread(s)")
+        for label, call in cases:
+            throughput = calls_per_second(call, calls, threads)
+            print(f"{label:<36}{throughput:>10.1f} calls/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the HTTP transport of EMSClient")
+    parser.add_argument("--url", default="http://127.0.0.1:5000/api/")
+    parser.add_argument("--endpoint", default="events/?limit=1")
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=1)
+    arguments = parser.parse_args()
+    main(arguments.url, arguments.endpoint, arguments.calls, arguments.threads)
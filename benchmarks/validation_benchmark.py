@@ -0,0 +1,72 @@
+"""
+This file measures the per-request cost of validating User and Event payloads, comparing
+jsonschema.validate() with a fresh schema (the old way) to the prebuilt validators.
+
+Usage: python -m benchmarks.validation_benchmark [--number 20000]
+"""
+
+import argparse
+import timeit
+import jsonschema
+from jsonschema import Draft7Validator
+from src.resources_and_models import (
+    User,
+    Event,
+    USER_VALIDATOR,
+    EVENT_VALIDATOR,
+    validate_payload,
+)
+
+USER_PAYLOAD = {"name": "Test User", "email": "test@example.com", "phone_number": "0401234567"}
+EVENT_PAYLOAD = {
+    "name": "Shiny New Event",
+    "location": "Uleåborg",
+    "time": "2026-02-28T10:00:00",
+    "organizer": 1,
+    "description": "A very shiny new event!",
+    "category": ["music", "sports"],
+    "tags": ["live-music", "baby-metal-concert"],
+}
+
+
+def validate_fresh(model, payload):
+    """Validates the payload the way the resources did before the validators were prebuilt"""
+    jsonschema.validate(
+        instance=payload,
+        schema=model.json_schema(),
+        format_checker=Draft7Validator.FORMAT_CHECKER,
+    )
+
+
+def measure(func, number):
+    """
+    Runs the function repeatedly and returns the best per-call time.
+
+    :param callable func: Function without arguments
+    :param int number: Number of calls per round
+    :returns float: Microseconds per call
+    """
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main(number):
+    """
+    Prints the per-call validation cost of both approaches.
+
+    :param int number: Number of validations per round
+    """
+    cases = [
+        ("User", User, USER_VALIDATOR, USER_PAYLOAD),
+        ("Event", Event, EVENT_VALIDATOR, EVENT_PAYLOAD),
+    ]
+    print(f"{'payload':<8}{'validate() us':>16}{'prebuilt us':>14}{'speedup':>10}")
+    for label, model, validator, payload in cases:
+        before = measure(lambda: validate_fresh(model, payload), number)
+        after = measure(lambda: validate_payload(validator, payload), number)
+        print(f"{label:<8}{before:>16.1f}{after:>14.1f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks request payload validation")
+    parser.add_argument("--number", type=int, default=20000)
+    main(parser.parse_args().number)
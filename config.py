@@ -4,3 +4,63 @@ DB_USERNAME = os.getenv("MYSQL_USER")
 DB_PASSWORD = os.getenv("MYSQL_PASSWORD")
 DB_HOST = '172.30.253.12'
 DB_NAME = os.getenv("MYSQL_DATABASE")
+
+# Connection pool of every gunicorn worker. A worker opens at most
+# DB_POOL_SIZE + DB_MAX_OVERFLOW connections, so replicas * workers * that must stay below
+# the max_connections of MySQL (151 by default)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Shorter than MySQL's wait_timeout, so idle connections are replaced before the server drops them
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Read replicas as comma separated SQLAlchemy URIs, GET requests are read from them.
+# A client reads from the primary for READ_YOUR_WRITES_WINDOW seconds after it writes
+DB_REPLICA_URIS = [
+    uri.strip() for uri in os.getenv("DB_REPLICA_URIS", "").split(",") if uri.strip()
+]
+READ_YOUR_WRITES_WINDOW = float(os.getenv("READ_YOUR_WRITES_WINDOW", "5"))
+REPLICA_HEALTH_CHECK_INTERVAL = float(os.getenv("REPLICA_HEALTH_CHECK_INTERVAL", "10"))
+
+# Per-worker API key verification cache
+API_KEY_CACHE_SIZE = int(os.getenv("API_KEY_CACHE_SIZE", "4096"))
+API_KEY_CACHE_TTL = float(os.getenv("API_KEY_CACHE_TTL", "60"))
+
+# Event collection paging
+EVENTS_PAGE_SIZE = int(os.getenv("EVENTS_PAGE_SIZE", "50"))
+EVENTS_MAX_PAGE_SIZE = int(os.getenv("EVENTS_MAX_PAGE_SIZE", "500"))
+
+# User collection paging
+USERS_PAGE_SIZE = int(os.getenv("USERS_PAGE_SIZE", "100"))
+USERS_MAX_PAGE_SIZE = int(os.getenv("USERS_MAX_PAGE_SIZE", "1000"))
+
+# Bulk event import, events are inserted and committed in chunks of BULK_EVENTS_CHUNK_SIZE
+BULK_EVENTS_CHUNK_SIZE = int(os.getenv("BULK_EVENTS_CHUNK_SIZE", "1000"))
+BULK_EVENTS_MAX_ITEMS = int(os.getenv("BULK_EVENTS_MAX_ITEMS", "100000"))
+# Users per request of the bulk participants endpoint
+BULK_PARTICIPANTS_MAX_ITEMS = int(os.getenv("BULK_PARTICIPANTS_MAX_ITEMS", "1000"))
+
+# Rows fetched per round trip by the streaming exports
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# Response cache, CACHE_TYPE can be any Flask-Caching backend, e.g. "SimpleCache",
+# "FileSystemCache", "RedisCache" or the in-process "src.caching.LRUCache"
+CACHE_TYPE = os.getenv("CACHE_TYPE", "FileSystemCache")
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
+CACHE_DEFAULT_TIMEOUT = int(os.getenv("CACHE_DEFAULT_TIMEOUT", "300"))
+CACHE_THRESHOLD = int(os.getenv("CACHE_THRESHOLD", "10000"))
+
+# Query profiler, off by default. Requests slower than SLOW_REQUEST_THRESHOLD seconds are
+# logged, those and PROFILER_SAMPLE_RATE of the other requests are listed by
+# /api/admin/profiles/
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "false").lower() in ("1", "true", "yes")
+SLOW_REQUEST_THRESHOLD = float(os.getenv("SLOW_REQUEST_THRESHOLD", "0.5"))
+PROFILER_SAMPLE_RATE = float(os.getenv("PROFILER_SAMPLE_RATE", "0.01"))
+PROFILER_REPEAT_THRESHOLD = int(os.getenv("PROFILER_REPEAT_THRESHOLD", "5"))
+PROFILER_MAX_PROFILES = int(os.getenv("PROFILER_MAX_PROFILES", "100"))
+
+# Logging, LOG_FORMAT is "json" for one JSON object per line or "text"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
@@ -0,0 +1,33 @@
+"""
+gunicorn settings of the API, loaded automatically from the working directory.
+Prepares the shared directory the workers write their Prometheus metrics to and starts
+the logging of every worker.
+"""
+
+import os
+import shutil
+
+workers = int(os.getenv("GUNICORN_WORKERS", "3"))
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus_multiproc")
+
+
+def on_starting(server):
+    """Removes the metrics of the previous run"""
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def child_exit(server, worker):
+    """Drops the live gauges of a worker that exited, its counters are kept"""
+    from prometheus_client import multiprocess  # pylint: disable=import-outside-toplevel
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_fork(server, worker):
+    """Starts the queued logging of a worker, the listener thread of the master isn't forked"""
+    import config as cfg  # pylint: disable=import-outside-toplevel
+    from src import logging_config  # pylint: disable=import-outside-toplevel
+    logging_config.setup_logging(cfg.LOG_LEVEL, cfg.LOG_FORMAT)
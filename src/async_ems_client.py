@@ -0,0 +1,433 @@
+"""
+Asynchronous client of the API for scripts that fan out over many users and events.
+It mirrors EMSClient on top of httpx.AsyncClient. Every user created or logged in through
+the client keeps its API key, so concurrent calls can act as different users.
+
+Usage:
+    async with AsyncEMSClient("http://127.0.0.1:5000/api/", max_concurrency=20) as client:
+        events = await client.gather_events(["event 1", "event 2"])
+"""
+
+import asyncio
+import logging
+from urllib.parse import quote
+import httpx
+from src.credentials import USER_SERVICE
+from src.ems_client import NO_USER_MESSAGE
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncEMSClient:
+    """
+    Asynchronous counterpart of EMSClient. At most max_concurrency requests are in flight
+    at once, the rest wait for their turn instead of failing with a pool timeout, and the
+    connections are kept alive between requests.
+    """
+
+    def __init__(self, base_url, max_concurrency=10, timeout=10.0, retries=3, client=None,
+                 credentials=None):
+        """
+        :param str base_url: URL of the API, most likely http://127.0.0.1:5000/api/
+        :param int max_concurrency: Maximum number of requests in flight
+        :param float timeout: Timeout of the requests in seconds
+        :param int retries: Retries of requests whose connection failed
+        :param AsyncClient client: (Optional) httpx client to use instead of a new one
+        :param CredentialStore credentials: (Optional) Store the API keys of created users are
+                                            saved to and unknown users are looked up from
+        """
+        self.BASE_URL = base_url
+        self.max_concurrency = max_concurrency
+        self.client = client or httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_concurrency, max_keepalive_connections=max_concurrency
+            ),
+            transport=httpx.AsyncHTTPTransport(retries=retries),
+        )
+        self.credentials = credentials
+        self.api_keys = {}
+        self.current_user = None
+        self.admin_key = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Closes the connections of the client"""
+        await self.client.aclose()
+
+    @property
+    def api_key(self):
+        """API key of the current user"""
+        return self.api_keys.get(self.current_user)
+
+    def set_admin_key(self, key):
+        """Set the admin API key"""
+        self.admin_key = key
+
+    async def request(self, method, endpoint, **kwargs):
+        """
+        Makes a request once fewer than max_concurrency requests are in flight.
+
+        :param str method: HTTP method
+        :param str endpoint: Endpoint of the request (excluding the BASE_URL part)
+        :param kwargs: Additional parameters of httpx, e.g. json, headers or timeout
+        :returns obj: httpx Response object
+        """
+        async with self._semaphore:
+            return await self.client.request(method, f"{self.BASE_URL}{endpoint}", **kwargs)
+
+    async def admin_request(self, method, endpoint, **kwargs):
+        """Make authenticated admin request"""
+        if not self.admin_key:
+            raise ValueError("Admin API key not available")
+        headers = kwargs.pop("headers", {})
+        headers["EMS-Api-Key"] = self.admin_key
+        response = await self.request(method, endpoint, headers=headers, **kwargs)
+        if response.status_code == 403:
+            logger.warning("Invalid or expired admin API key")
+        return response
+
+    async def authenticated_request(self, method, endpoint, user=None, **kwargs):
+        """
+        Makes a request with the API key of the user.
+
+        :param str method: HTTP method to be used (GET, PUT, POST, DELETE)
+        :param str endpoint: Endpoint of the request (excluding the BASE_URL part)
+        :param str user: Name of the user, the current user by default
+        :param kwargs: Additional parameters
+        :returns obj: httpx Response object
+        """
+        user = user or self.current_user
+        api_key = self.api_keys.get(user)
+        if not api_key:
+            raise ValueError("API key not available")
+        if method.upper() not in ["GET", "PUT", "POST", "DELETE"]:
+            raise ValueError(f"{method} is not an implemented method, "
+                             f"accepted values are GET, PUT, POST and DELETE")
+        headers = kwargs.pop("headers", {})
+        headers["User-Api-Key"] = api_key
+        response = await self.request(method, endpoint, headers=headers, **kwargs)
+        if response.status_code == 403:
+            logger.warning("[%s] Invalid API key of user %s", method, user)
+        return response
+
+    @staticmethod
+    def _path(name):
+        return quote(name, safe="")
+
+    def _user(self, user, method):
+        user = user or self.current_user
+        if not user:
+            logger.warning(NO_USER_MESSAGE, method)
+        return user
+
+    # User related methods
+    async def create_user(self, username, email, phone_number=""):
+        """
+        Creates a user via POST request and keeps its API key. The first created user becomes
+        the current user.
+
+        :param str username: Name of the user
+        :param str email: Email of the user
+        :param str phone_number: (Optional) Phone number of the user
+        :returns bool: Returns True if user creation was successful, False otherwise
+        """
+        contents = {"name": username, "email": email}
+        if phone_number:
+            contents["phone_number"] = phone_number
+        response = await self.request("POST", "users/", json=contents)
+        api_key = response.headers.get("User-Api-Key")
+        if response.status_code == 201 and api_key:
+            self.api_keys[username] = api_key
+            if self.credentials is not None:
+                self.credentials.set(USER_SERVICE, username, api_key)
+            self.current_user = self.current_user or username
+            logger.info("User %s created successfully.", username)
+            return True
+        logger.warning("Error in creating user: %s, %s", response.status_code, response.text)
+        return False
+
+    def user_login(self, username, api_key=None):
+        """
+        Switches the current user.
+
+        :param str username: Name of the user
+        :param str api_key: (Optional) API key of the user, if it wasn't created by the client
+                            and isn't in the credential store
+        :return bool: True if login was successful, False otherwise
+        """
+        if not api_key and username not in self.api_keys and self.credentials is not None:
+            api_key = self.credentials.get(USER_SERVICE, username)
+        if api_key:
+            self.api_keys[username] = api_key
+        if not self.api_keys.get(username):
+            logger.warning("User does not exist")
+            return False
+        self.current_user = username
+        return True
+
+    async def get_user(self, user=None):
+        """
+        GETs all the information about the user.
+
+        :param str user: Name of the user, the current user by default
+        :returns dictionary/None: User information as a dictionary or None
+        """
+        user = self._user(user, "GET")
+        if not user:
+            return None
+        response = await self.authenticated_request("GET", f"users/{self._path(user)}/", user)
+        return response.json() if response.status_code == 200 else None
+
+    async def modify_user(self, modified_contents, user=None):
+        """
+        Modifies the user via PUT request.
+
+        :param dict modified_contents: Modified contents of the user
+        :param str user: Name of the user, the current user by default
+        :returns bool: True if modification was successful, False otherwise
+        """
+        user = self._user(user, "PUT")
+        if not user:
+            return False
+        response = await self.authenticated_request(
+            "PUT", f"users/{self._path(user)}/", user, json=modified_contents
+        )
+        if response.status_code != 201:
+            return False
+        new_username = modified_contents["name"]
+        self.api_keys[new_username] = self.api_keys.pop(user)
+        if self.credentials is not None and new_username != user:
+            self.credentials.rename(USER_SERVICE, user, new_username)
+        if self.current_user == user:
+            self.current_user = new_username
+        return True
+
+    async def delete_user(self, user=None):
+        """
+        Deletes the user via DELETE request.
+
+        :param str user: Name of the user, the current user by default
+        :returns bool: True if deletion was successful, False otherwise
+        """
+        user = self._user(user, "DELETE")
+        if not user:
+            return False
+        response = await self.authenticated_request("DELETE", f"users/{self._path(user)}/", user)
+        if response.status_code != 204:
+            return False
+        self.api_keys.pop(user, None)
+        if self.credentials is not None:
+            self.credentials.delete(USER_SERVICE, user)
+        if self.current_user == user:
+            self.current_user = None
+        return True
+
+    async def get_user_events(self, user=None):
+        """
+        GETs the events user has attended and/or organized.
+
+        :param str user: Name of the user, the current user by default
+        :return dict: Dictionary of user related events
+        """
+        user = self._user(user, "GET")
+        if not user:
+            return None
+        response = await self.authenticated_request(
+            "GET", f"users/{self._path(user)}/events/", user
+        )
+        return response.json() if response.status_code == 200 else None
+
+    async def get_all_users(self):
+        """Admin-only: Get list of all users"""
+        response = await self.admin_request("GET", "users/")
+        return response.json() if response.status_code == 200 else None
+
+    # Event related methods
+    async def create_event(self, name, location, time, description, category=None, tags=None,
+                           user=None):
+        """
+        Creates an event with given parameters. organizer id is handled on the server side
+
+        :param str name: Name of the event
+        :param str location: Location of the event
+        :param datetime time: Time of the event
+        :param str description: Description of the event
+        :param list category: (Optional) List of categories that the event belongs to
+        :param list tags: (Optional) List of the tags that event has
+        :param str user: Name of the organizer, the current user by default
+        :returns bool: True if event creation was successful, False otherwise
+        """
+        user = self._user(user, "POST")
+        if not user:
+            return False
+        event_details = {"name": name, "location": location, "time": time.isoformat(),
+                         "description": description}
+        if category:
+            event_details["category"] = category
+        if tags:
+            event_details["tags"] = tags
+        response = await self.authenticated_request(
+            "POST", f"users/{self._path(user)}/events/", user, json=event_details
+        )
+        return response.status_code == 201
+
+    async def get_event(self, name):
+        """
+        GETs information about an event.
+
+        :param str name: Name of the event
+        :returns dict/None: Dictionary of the event details or None
+        """
+        response = await self.request("GET", f"events/{self._path(name)}/")
+        return response.json() if response.status_code == 200 else None
+
+    async def modify_event(self, name, location, time, description, category=None, tags=None,
+                           user=None, organizer=None):
+        """
+        Modifies an event with given parameters. The API checks that the organizer id of the
+        body is the id of the user, it is read from the current event if not given.
+
+        :param str name: Name of the event
+        :param str location: Location of the event
+        :param datetime time: Time of the event
+        :param str description: Description of the event
+        :param list category: (Optional) List of categories that the event belongs to
+        :param list tags: (Optional) List of the tags that event has
+        :param str user: Name of the organizer, the current user by default
+        :param int organizer: (Optional) ID of the organizer, saves the GET of the event
+        :returns bool: True if event modification was successful, False otherwise
+        """
+        user = self._user(user, "PUT")
+        if not user:
+            return False
+        if organizer is None:
+            event = await self.get_event(name)
+            if event is None:
+                return False
+            organizer = event["organizer"]
+        event_details = {"name": name, "location": location, "time": time.isoformat(),
+                         "description": description, "organizer": organizer}
+        if category:
+            event_details["category"] = category
+        if tags:
+            event_details["tags"] = tags
+        response = await self.authenticated_request(
+            "PUT", f"users/{self._path(user)}/events/{self._path(name)}/", user,
+            json=event_details,
+        )
+        return response.status_code == 200
+
+    async def delete_event(self, name, user=None):
+        """
+        Deletes an event
+
+        :param str name: Name of the event
+        :param str user: Name of the organizer, the current user by default
+        :return bool: True if deletion was successful, otherwise false
+        """
+        user = self._user(user, "DELETE")
+        if not user:
+            return False
+        response = await self.authenticated_request(
+            "DELETE", f"users/{self._path(user)}/events/{self._path(name)}/", user
+        )
+        return response.status_code == 204
+
+    async def get_events(self):
+        """
+        Gets all events
+
+        :returns dict/None: Dictionary of all the events or None
+        """
+        response = await self.request("GET", "events/")
+        return response.json() if response.status_code == 200 else None
+
+    async def add_user_as_participant(self, event, user=None):
+        """
+        Adds user as participant to an event.
+
+        :param str event: Name of the event
+        :param str user: Name of the user, the current user by default
+        :returns bool: True if adding user to participants was successful, False otherwise
+        """
+        user = self._user(user, "POST")
+        if not user:
+            return False
+        response = await self.authenticated_request(
+            "POST", f"events/{self._path(event)}/participants/{self._path(user)}/", user
+        )
+        return response.status_code == 201
+
+    async def remove_user_participation(self, event, user=None):
+        """
+        Removes user from event participants.
+
+        :param str event: Name of the event
+        :param str user: Name of the user, the current user by default
+        :returns bool: True if deleting user from participants was successful, False otherwise
+        """
+        user = self._user(user, "DELETE")
+        if not user:
+            return False
+        response = await self.authenticated_request(
+            "DELETE", f"events/{self._path(event)}/participants/{self._path(user)}/", user
+        )
+        return response.status_code == 204
+
+    # Concurrent helpers
+    @staticmethod
+    async def _gather(calls, failed):
+        """
+        Runs the calls concurrently. A call that fails because its user has no API key or
+        its request failed gives the failed value, so it doesn't discard the other results.
+
+        :param list calls: Coroutines to run
+        :param failed: Result of a failed call, e.g. None or False
+        :returns list: Results in the order of the calls
+        """
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        for index, result in enumerate(results):
+            if isinstance(result, (ValueError, httpx.HTTPError)):
+                logger.warning("Request %d of the batch failed: %s", index, result)
+                results[index] = failed
+            elif isinstance(result, BaseException):
+                raise result
+        return results
+
+    async def gather_events(self, names):
+        """
+        GETs many events concurrently.
+
+        :param list names: Names of the events
+        :returns list: Event details in the order of the names, None for missing events
+        """
+        return await self._gather([self.get_event(name) for name in names], None)
+
+    async def gather_user_events(self, users):
+        """
+        GETs the events of many users concurrently, with the API key of each user.
+
+        :param list users: Names of users created or logged in through the client
+        :returns list: Events of the users in the order of the names, None for the users
+                       whose events couldn't be fetched
+        """
+        return await self._gather([self.get_user_events(user) for user in users], None)
+
+    async def add_participants(self, event, users):
+        """
+        Signs many users up to an event concurrently, each with its own API key.
+
+        :param str event: Name of the event
+        :param list users: Names of users created or logged in through the client
+        :returns list: True for every user that was added, in the order of the names
+        """
+        return await self._gather(
+            [self.add_user_as_participant(event, user) for user in users], False
+        )
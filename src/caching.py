@@ -0,0 +1,211 @@
+"""This file contains the caches and cache backends used by the API"""
+
+from collections import OrderedDict
+import threading
+import time
+from flask_caching.backends.base import BaseCache
+
+
+class ApiKeyCache:
+    """
+    Bounded, per-worker cache that maps an API key hash to the (user_id, admin) pair stored
+    in the database. Entries expire after ``ttl`` seconds and the least recently used entry
+    is evicted once ``maxsize`` entries are stored.
+
+    Every gunicorn worker has its own cache, so the TTL is what bounds how long a key that
+    was rotated or deleted through another worker can still be accepted by this one.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key_hash):
+        """
+        Gets the cached (user_id, admin) pair for the key hash.
+
+        :param bytes key_hash: Hash of the API key
+        :returns tuple/None: (user_id, admin) pair or None if the key is not cached
+        """
+        with self._lock:
+            entry = self._entries.get(key_hash)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key_hash]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key_hash)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key_hash, user_id, admin):
+        """
+        Stores the (user_id, admin) pair for the key hash, evicting the least recently
+        used entry if the cache is full.
+
+        :param bytes key_hash: Hash of the API key
+        :param int user_id: ID of the user owning the key, None for admin keys
+        :param bool admin: True if the key is an admin key
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key_hash] = (time.monotonic() + self.ttl, (user_id, bool(admin)))
+            self._entries.move_to_end(key_hash)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate_key(self, key_hash):
+        """Drops the entry of a single key hash"""
+        with self._lock:
+            self._entries.pop(key_hash, None)
+
+    def invalidate_user(self, user_id):
+        """Drops every entry that belongs to the given user"""
+        with self._lock:
+            stale = [key for key, (_, value) in self._entries.items() if value[0] == user_id]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        """Drops every entry and resets the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Reports the cache counters.
+
+        :returns dict: Dictionary with hits, misses, current size and maxsize
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
+
+
+class CacheStats:
+    """Thread-safe hit, miss and invalidation counters of a cache"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def hit(self):
+        """Counts a cache hit"""
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        """Counts a cache miss"""
+        with self._lock:
+            self.misses += 1
+
+    def invalidated(self, count=1):
+        """Counts invalidated keys"""
+        with self._lock:
+            self.invalidations += count
+
+    def clear(self):
+        """Resets the counters"""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.invalidations = 0
+
+    def stats(self):
+        """
+        Reports the counters.
+
+        :returns dict: Dictionary with hits, misses and invalidations
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "invalidations": self.invalidations}
+
+
+class LRUCache(BaseCache):
+    """
+    In-process Flask-Caching backend that evicts the least recently used entry once
+    ``threshold`` entries are stored. Select it with CACHE_TYPE="src.caching.LRUCache".
+
+    Each worker process has its own copy, so writes made through another worker don't
+    invalidate the entries here. Callers must validate entries (e.g. by their ETag) if
+    that matters.
+    """
+
+    def __init__(self, threshold=500, default_timeout=300):
+        super().__init__(default_timeout=default_timeout)
+        self.threshold = threshold
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        return cls(
+            threshold=config["CACHE_THRESHOLD"],
+            default_timeout=kwargs.get("default_timeout", 300),
+        )
+
+    def _expires(self, timeout):
+        timeout = self._normalize_timeout(timeout)
+        return time.monotonic() + timeout if timeout > 0 else None
+
+    def _live_entry(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, _ = entry
+        if expires is not None and expires < time.monotonic():
+            del self._entries[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, timeout=None):
+        with self._lock:
+            self._entries[key] = (self._expires(timeout), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.threshold:
+                self._entries.popitem(last=False)
+        return True
+
+    def add(self, key, value, timeout=None):
+        with self._lock:
+            if self._live_entry(key) is not None:
+                return False
+            return self.set(key, value, timeout)
+
+    def delete(self, key):
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def has(self, key):
+        with self._lock:
+            return self._live_entry(key) is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        return True
+
+    def __len__(self):
+        return len(self._entries)
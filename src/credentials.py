@@ -0,0 +1,233 @@
+"""
+Credential storage of the clients. CredentialStore keeps the API keys it has seen in memory,
+so switching between users reads the backend only once per user. The backend is the system
+keyring by default; machines without a keyring, e.g. load generators, can keep the keys in
+an encrypted file instead by setting EMS_CREDENTIALS_FILE and EMS_CREDENTIALS_PASSPHRASE.
+
+Usage:
+    store = CredentialStore(EncryptedFileBackend("keys.enc", passphrase="..."))
+    client = EMSClient("http://127.0.0.1:5000/api/", credentials=store)
+"""
+
+import base64
+import json
+import os
+import tempfile
+import threading
+import keyring
+from keyring.errors import PasswordDeleteError
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+except ImportError:
+    Fernet = None
+
+USER_SERVICE = "EMS_user"
+ADMIN_SERVICE = "EMS_admin"
+KDF_ITERATIONS = 600_000
+
+
+class KeyringBackend:
+    """Keeps the credentials in the system keyring"""
+
+    def get(self, service, name):
+        """
+        :param str service: Service of the credential, e.g. USER_SERVICE
+        :param str name: Name of the credential, e.g. the name of the user
+        :returns str/None: The credential or None
+        """
+        return keyring.get_password(service, name)
+
+    def set(self, service, name, secret):
+        """Stores a credential"""
+        keyring.set_password(service, name, secret)
+
+    def delete(self, service, name):
+        """
+        Deletes a credential.
+
+        :returns bool: False if there was no such credential
+        """
+        try:
+            keyring.delete_password(service, name)
+        except PasswordDeleteError:
+            return False
+        return True
+
+
+class EncryptedFileBackend:
+    """
+    Keeps the credentials in a file encrypted with a key derived from a passphrase. The file
+    is read and decrypted once, and every change rewrites it atomically. Needs the
+    cryptography package.
+    """
+
+    def __init__(self, path, passphrase=None, iterations=KDF_ITERATIONS):
+        """
+        :param str path: Path of the file, created on the first write
+        :param str passphrase: Passphrase of the file, EMS_CREDENTIALS_PASSPHRASE by default
+        :param int iterations: PBKDF2 iterations used when the file is created
+        """
+        if Fernet is None:
+            raise ImportError("EncryptedFileBackend needs the cryptography package")
+        passphrase = passphrase or os.getenv("EMS_CREDENTIALS_PASSPHRASE")
+        if not passphrase:
+            raise ValueError("A passphrase is needed to open the credentials file")
+        self.path = path
+        self._passphrase = passphrase.encode()
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                header = json.load(file)
+            self._salt = base64.b64decode(header["salt"])
+            self._iterations = header["iterations"]
+            self._fernet = self._derive()
+            try:
+                self._secrets = json.loads(self._fernet.decrypt(header["data"].encode()))
+            except InvalidToken as e:
+                raise ValueError("Wrong passphrase or corrupted credentials file") from e
+        else:
+            self._salt = os.urandom(16)
+            self._iterations = iterations
+            self._fernet = self._derive()
+            self._secrets = {}
+
+    def _derive(self):
+        kdf = PBKDF2HMAC(
+            algorithm=hashes.SHA256(), length=32, salt=self._salt, iterations=self._iterations
+        )
+        return Fernet(base64.urlsafe_b64encode(kdf.derive(self._passphrase)))
+
+    def _write(self):
+        data = self._fernet.encrypt(json.dumps(self._secrets).encode())
+        header = {
+            "salt": base64.b64encode(self._salt).decode(),
+            "iterations": self._iterations,
+            "data": data.decode(),
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=".credentials-")
+        try:
+            # mkstemp creates the file readable by the owner only
+            with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+                json.dump(header, file)
+            os.replace(temporary, self.path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def get(self, service, name):
+        """
+        :param str service: Service of the credential, e.g. USER_SERVICE
+        :param str name: Name of the credential, e.g. the name of the user
+        :returns str/None: The credential or None
+        """
+        with self._lock:
+            return self._secrets.get(service, {}).get(name)
+
+    def set(self, service, name, secret):
+        """Stores a credential"""
+        with self._lock:
+            self._secrets.setdefault(service, {})[name] = secret
+            self._write()
+
+    def delete(self, service, name):
+        """
+        Deletes a credential.
+
+        :returns bool: False if there was no such credential
+        """
+        with self._lock:
+            if self._secrets.get(service, {}).pop(name, None) is None:
+                return False
+            self._write()
+            return True
+
+
+def default_backend():
+    """
+    Chooses the backend from the environment: an EncryptedFileBackend if
+    EMS_CREDENTIALS_FILE is set, the system keyring otherwise.
+
+    :returns obj: Backend
+    """
+    path = os.getenv("EMS_CREDENTIALS_FILE")
+    if path:
+        return EncryptedFileBackend(path)
+    return KeyringBackend()
+
+
+class CredentialStore:
+    """
+    In-memory cache of credentials in front of a backend. Reads of a credential that was
+    already read or written through the store don't reach the backend, so credentials
+    changed by other processes are only seen by stores that haven't cached them yet.
+    A store without a backend keeps the credentials in memory only.
+    """
+
+    def __init__(self, backend=None):
+        """
+        :param obj backend: KeyringBackend, EncryptedFileBackend or None
+        """
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._secrets = {}
+        self._lock = threading.Lock()
+
+    def get(self, service, name):
+        """
+        Gets a credential, from the backend only if it isn't cached.
+
+        :param str service: Service of the credential, e.g. USER_SERVICE
+        :param str name: Name of the credential, e.g. the name of the user
+        :returns str/None: The credential or None
+        """
+        with self._lock:
+            secret = self._secrets.get((service, name))
+            if secret is not None:
+                self.hits += 1
+                return secret
+            self.misses += 1
+        if self.backend is None:
+            return None
+        secret = self.backend.get(service, name)
+        if secret is not None:
+            with self._lock:
+                self._secrets[(service, name)] = secret
+        return secret
+
+    def set(self, service, name, secret):
+        """Stores a credential in the backend and the cache"""
+        if self.backend is not None:
+            self.backend.set(service, name, secret)
+        with self._lock:
+            self._secrets[(service, name)] = secret
+
+    def delete(self, service, name):
+        """
+        Deletes a credential from the backend and the cache.
+
+        :returns bool: False if there was no such credential
+        """
+        with self._lock:
+            cached = self._secrets.pop((service, name), None) is not None
+        if self.backend is None:
+            return cached
+        return self.backend.delete(service, name) or cached
+
+    def rename(self, service, old_name, new_name):
+        """
+        Moves a credential to a new name, e.g. after the user was renamed.
+
+        :returns bool: False if there was no credential to move
+        """
+        secret = self.get(service, old_name)
+        if secret is None:
+            return False
+        self.set(service, new_name, secret)
+        self.delete(service, old_name)
+        return True
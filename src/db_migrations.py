@@ -0,0 +1,221 @@
+"""
+This file contains the schema migrations for databases created before the current models,
+e.g. the ones restored from Dump20250209/. Every migration checks the current schema first,
+so running the file again on an up-to-date database does nothing.
+
+Usage: python -m src.db_migrations [--users-table users] [--events-table events]
+"""
+
+import argparse
+from sqlalchemy import MetaData, Table, Index, inspect, text
+from src.resources_and_models import (
+    db,
+    app,
+    SlugAllocator,
+    EVENT_RESERVED_SLUGS,
+    participant_recount,
+    utcnow,
+)
+
+MIGRATIONS = []
+SLUG_BATCH_SIZE = 1000
+
+
+def migration(func):
+    """Registers a migration, migrations are run in the order they are defined"""
+    MIGRATIONS.append(func)
+    return func
+
+
+def _reflect(connection, table_name):
+    return Table(table_name, MetaData(), autoload_with=connection)
+
+
+def _index_names(connection, table_name):
+    return {index["name"] for index in inspect(connection).get_indexes(table_name)}
+
+
+def _column_names(connection, table_name):
+    return {column["name"] for column in inspect(connection).get_columns(table_name)}
+
+
+def _has_unique(connection, table_name, *column_names):
+    inspector = inspect(connection)
+    unique_columns = [
+        index["column_names"] for index in inspector.get_indexes(table_name) if index["unique"]
+    ]
+    unique_columns += [
+        constraint["column_names"] for constraint in inspector.get_unique_constraints(table_name)
+    ]
+    unique_columns.append(inspector.get_pk_constraint(table_name)["constrained_columns"])
+    return sorted(column_names) in [sorted(columns) for columns in unique_columns]
+
+
+@migration
+def add_event_time_index(connection, tables):
+    """Adds the (time, id) index used by the keyset pagination of EventCollection"""
+    events_table = tables["events"]
+    if "ix_event_time_id" in _index_names(connection, events_table):
+        return
+    table = _reflect(connection, events_table)
+    Index("ix_event_time_id", table.c.time, table.c.id).create(connection)
+
+
+@migration
+def add_lookup_slugs(connection, tables):
+    """Adds the unique slug columns used by UserConverter and EventConverter"""
+    reserved_slugs = {tables["users"]: (), tables["events"]: EVENT_RESERVED_SLUGS}
+    for table_name in (tables["users"], tables["events"]):
+        if "slug" not in _column_names(connection, table_name):
+            connection.execute(
+                text(f"ALTER TABLE {table_name} ADD COLUMN slug VARCHAR(160) NULL")
+            )
+
+        table = _reflect(connection, table_name)
+        allocator = SlugAllocator(table, reserved_slugs[table_name])
+        while True:
+            rows = connection.execute(
+                db.select(table.c.id, table.c.name)
+                .where(table.c.slug.is_(None))
+                .order_by(table.c.id)
+                .limit(SLUG_BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            slugs = allocator.allocate(connection, [row.name for row in rows])
+            connection.execute(
+                table.update().where(table.c.id == db.bindparam("row_id")),
+                [{"row_id": row.id, "slug": slug} for row, slug in zip(rows, slugs)],
+            )
+
+        if connection.dialect.name == "mysql":
+            connection.execute(
+                text(f"ALTER TABLE {table_name} MODIFY slug VARCHAR(160) NOT NULL")
+            )
+        if not _has_unique(connection, table_name, "slug"):
+            Index(f"uq_{table_name}_slug", table.c.slug, unique=True).create(connection)
+
+
+@migration
+def add_updated_at(connection, tables):
+    """Adds the updated_at columns used as validators by conditional GET requests"""
+    for table_name in (tables["users"], tables["events"]):
+        if "updated_at" in _column_names(connection, table_name):
+            continue
+        column_type = "DATETIME(6)" if connection.dialect.name == "mysql" else "DATETIME"
+        connection.execute(
+            text(f"ALTER TABLE {table_name} ADD COLUMN updated_at {column_type} NULL")
+        )
+        table = _reflect(connection, table_name)
+        connection.execute(table.update().values(updated_at=utcnow()))
+        if connection.dialect.name == "mysql":
+            connection.execute(
+                text(f"ALTER TABLE {table_name} MODIFY updated_at {column_type} NOT NULL")
+            )
+
+
+@migration
+def add_event_organizer_index(connection, tables):
+    """Adds the index used to find the events organized by a user"""
+    events_table = tables["events"]
+    if "ix_event_organizer" in _index_names(connection, events_table):
+        return
+    table = _reflect(connection, events_table)
+    Index("ix_event_organizer", table.c.organizer).create(connection)
+
+
+@migration
+def add_participant_key(connection, tables):
+    """
+    Makes a participation unique per user and event. The 2025-02-09 dumps have a surrogate
+    id key and nullable columns, so a repeated sign-up inserted a second row instead of
+    failing. Duplicate and incomplete rows are deleted and the counts recounted.
+    """
+    if _has_unique(connection, "event_participants", "user_id", "event_id"):
+        return
+    deleted = connection.execute(
+        text("DELETE FROM event_participants WHERE user_id IS NULL OR event_id IS NULL")
+    ).rowcount
+    if "id" in _column_names(connection, "event_participants"):
+        # The derived table lets MySQL read the table it deletes from
+        deleted += connection.execute(text(
+            "DELETE FROM event_participants WHERE id NOT IN ("
+            "SELECT kept_id FROM (SELECT MIN(id) AS kept_id FROM event_participants "
+            "GROUP BY user_id, event_id) AS kept)"
+        )).rowcount
+    if connection.dialect.name == "mysql":
+        connection.execute(text(
+            "ALTER TABLE event_participants MODIFY user_id INT NOT NULL, "
+            "MODIFY event_id INT NOT NULL"
+        ))
+    table = _reflect(connection, "event_participants")
+    Index(
+        "uq_event_participants_user_event", table.c.user_id, table.c.event_id, unique=True
+    ).create(connection)
+    events_table = tables["events"]
+    if deleted and "participant_count" in _column_names(connection, events_table):
+        connection.execute(participant_recount(_reflect(connection, events_table), table))
+
+
+@migration
+def add_participant_counts(connection, tables):
+    """Adds the capacity and the maintained participant_count columns of the events"""
+    events_table = tables["events"]
+    columns = _column_names(connection, events_table)
+    if "capacity" not in columns:
+        connection.execute(text(f"ALTER TABLE {events_table} ADD COLUMN capacity INTEGER NULL"))
+    if "participant_count" in columns:
+        return
+    connection.execute(
+        text(f"ALTER TABLE {events_table} ADD COLUMN participant_count INTEGER NOT NULL DEFAULT 0")
+    )
+    connection.execute(
+        participant_recount(
+            _reflect(connection, events_table), _reflect(connection, "event_participants")
+        )
+    )
+
+
+@migration
+def add_places_updated_at(connection, tables):
+    """Adds the places_updated_at column that versions the participant_count of an event"""
+    events_table = tables["events"]
+    if "places_updated_at" in _column_names(connection, events_table):
+        return
+    column_type = "DATETIME(6)" if connection.dialect.name == "mysql" else "DATETIME"
+    connection.execute(
+        text(f"ALTER TABLE {events_table} ADD COLUMN places_updated_at {column_type} NULL")
+    )
+
+
+@migration
+def add_event_updated_at_index(connection, tables):
+    """Adds the index used by the validators of the event listings"""
+    events_table = tables["events"]
+    if "ix_event_updated_at" in _index_names(connection, events_table):
+        return
+    table = _reflect(connection, events_table)
+    Index("ix_event_updated_at", table.c.updated_at).create(connection)
+
+
+def migrate(users_table="user", events_table="event"):
+    """
+    Runs every migration.
+
+    :param str users_table: Name of the users table, "users" in the 2025-02-09 dumps
+    :param str events_table: Name of the events table, "events" in the 2025-02-09 dumps
+    """
+    tables = {"users": users_table, "events": events_table}
+    with db.engine.begin() as connection:
+        for func in MIGRATIONS:
+            print(f"Running migration {func.__name__}")
+            func(connection, tables)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrates an existing EMS database")
+    parser.add_argument("--users-table", default="user")
+    parser.add_argument("--events-table", default="event")
+    arguments = parser.parse_args()
+    with app.app_context():
+        migrate(arguments.users_table, arguments.events_table)
@@ -0,0 +1,95 @@
+"""This file contains the instrumented connection pool of the database engine"""
+
+import threading
+import time
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+class PoolStats:
+    """Thread-safe checkout counters of a connection pool"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._lock = threading.Lock()
+
+    def checkout(self, wait):
+        """Counts a successful checkout that waited wait seconds"""
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def timeout(self):
+        """Counts a checkout that gave up after pool_timeout"""
+        with self._lock:
+            self.timeouts += 1
+
+    def stats(self):
+        """
+        Reports the counters.
+
+        :returns dict: Dictionary with the checkout, timeout and wait time counters
+        """
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.wait_total,
+                "wait_seconds_max": self.wait_max,
+                "wait_seconds_avg": self.wait_total / self.checkouts if self.checkouts else 0.0,
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that measures how long every checkout waits for a connection, including
+    the time to open a new one, and counts the checkouts that time out.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.timeout()
+            raise
+        self.stats.checkout(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        # The engine recreates its pool e.g. on dispose(), the counters are kept
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def pool_status(pool):
+    """
+    Reports the state of a connection pool. Saturation is the share of the pool_size +
+    max_overflow connections that are checked out, at 1.0 new checkouts have to wait.
+
+    :param Pool pool: Pool of the engine
+    :returns dict: Pool class, occupancy and, for an InstrumentedQueuePool, checkout counters
+    """
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        status.update({
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "saturation": pool.checkedout() / capacity if capacity else 0.0,
+        })
+    if isinstance(pool, InstrumentedQueuePool):
+        status.update(pool.stats.stats())
+    return status
@@ -1,8 +1,21 @@
 """This file is for populating"""
 
+import argparse
+from datetime import date, datetime, timedelta
 import random
 from faker import Faker
-from src.resources_and_models import db, app, User, Event, create_database
+from src.resources_and_models import (
+    db,
+    app,
+    User,
+    Event,
+    SlugAllocator,
+    EVENT_RESERVED_SLUGS,
+    create_database,
+    event_participants,
+    participant_recount,
+    utcnow,
+)
 
 
 fake = Faker()
@@ -36,64 +49,159 @@ tags = [
 ]
 
 
-# def populate_database():
-#     """Populates the database with random amount of data (utilizing faker to generate fake data)"""
-#     user_amount = random.randint(5, 50)
-#     event_amount = random.randint(3, 10)
-#     print(f"Amount of users: {user_amount}\nAmount of events: {event_amount}\n")
-#     # Populating random.randint() amount of users with fake data
-#     for _ in range(user_amount):
-#         user = User(
-#             name=fake.name(), email=fake.email(), phone_number=fake.phone_number()
-#         )
-#         db.session.add(user)
-#     db.session.commit()
-#     users_query = User.query.all()
-#     print("Users:")
-#     for user in users_query:
-#         print(
-#             f"id:{user.id}, name:{user.name}, email:{user.email},\
-#             phone_number:{user.phone_number}, "
-#             f"events:{user.attended_events}"
-#         )
-#     # Populating random.randint() amount of events with fake data
-#     for _ in range(event_amount):
-#         event_to_add = Event(
-#             name=fake.color_name(),
-#             location=fake.street_name(),
-#             time="2025-03-15 10:00:00",
-#             description=fake.catch_phrase(),
-#             organizer=users_query[random.randint(0, len(users_query) - 1)].id,
-#             category=random.sample(categories, k=random.randint(1, 3)),
-#             tags=random.sample(tags, k=random.randint(1, 3)),
-#         )
-#         db.session.add(event_to_add)
-#     db.session.commit()
-#
-#     events_query = Event.query.all()
-#     # Populating the events randomly
-#     print("\nEvents:")
-#     for event_info in events_query:
-#         print(
-#             f"id:{event_info.id}, location:{event_info.location}, time:{event_info.time},"
-#             f"description:{event_info.description}, organizer:{event_info.organizer}, \
-#             category:{event_info.category}"
-#         )
-#     print("\nPopulating event participants table")
-#     for ev in events_query:
-#         selected_users = random.sample(
-#             users_query, min(random.randint(2, 15), len(users_query))
-#         )
-#         print(f"Randomly selected amount of users: {len(selected_users)}")
-#         for selected_user in selected_users:
-#             ev.users.append(selected_user)  # Adds selected user to the current event
-#         db.session.commit()
-
-#    # These can be uncommented to see the EventParticipant information line by line
-#    # event_participations = EventParticipants.query.all()
-#    # print("\nEvent participation prints:")
-#    # for p in event_participations:
-#    # print(f"Event {p.event_id}: User {p.user_id} ")
+def skewed_index(rng, count, skew):
+    """
+    Picks an index in range(count). A skew of 1.0 picks uniformly, larger values favour the
+    first indexes more and more, e.g. with 2.0 the first 10 % of indexes get ~32 % of picks.
+
+    :param Random rng: Random number generator
+    :param int count: Number of indexes
+    :param float skew: Skew of the distribution
+    :returns int: Index
+    """
+    return min(int(count * rng.random() ** skew), count - 1)
+
+
+def insert_batch(table, batch, allocator=None):
+    """
+    Inserts a batch of rows with one executemany, which PyMySQL sends as multi-row INSERT
+    statements, and commits it.
+
+    :param Table table: Table to insert into
+    :param list batch: Row dictionaries
+    :param SlugAllocator allocator: (Optional) Allocates the slugs of the rows by name
+    :returns int: Number of inserted rows
+    """
+    if allocator is not None:
+        slugs = allocator.allocate(db.session.connection(), [row["name"] for row in batch])
+        for row, slug in zip(batch, slugs):
+            row["slug"] = slug
+    db.session.execute(db.insert(table), batch)
+    db.session.commit()
+    return len(batch)
+
+
+def insert_batches(table, rows, batch_size, allocator=None):
+    """
+    Inserts rows in batches of batch_size rows.
+
+    :param Table table: Table to insert into
+    :param iterable rows: Row dictionaries, may be a generator
+    :param int batch_size: Rows per batch
+    :param SlugAllocator allocator: (Optional) Allocates the slugs of the rows by name
+    :returns int: Number of inserted rows
+    """
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            count += insert_batch(table, batch, allocator)
+            batch = []
+    if batch:
+        count += insert_batch(table, batch, allocator)
+    return count
+
+
+def next_id(table):
+    """Returns the ID after the largest ID of the table"""
+    return (db.session.execute(db.select(db.func.max(table.c.id))).scalar() or 0) + 1
+
+
+def populate_database(
+    users=1000,
+    events=200,
+    participations=5,
+    seed=0,
+    batch_size=1000,
+    organizer_skew=2.0,
+    popularity_skew=2.0,
+    start=None,
+):
+    """
+    Populates the database with generated users, events and participations. The same
+    arguments always generate the same data, so production-sized databases can be
+    reproduced locally. IDs continue from the largest existing ones.
+
+    :param int users: Number of users
+    :param int events: Number of events, organized by the generated users
+    :param int participations: Average number of events a generated user attends
+    :param int seed: Seed of the random data
+    :param int batch_size: Rows per INSERT batch
+    :param float organizer_skew: How much the events concentrate on heavy organizers,
+                                 1.0 spreads them evenly
+    :param float popularity_skew: How much the participations concentrate on popular
+                                  events, 1.0 spreads them evenly
+    :param datetime start: (Optional) Time of the earliest event, events are spread over
+                           two years. Default is a year before today
+    :returns dict: Number of inserted rows per table
+    """
+    if events and not users:
+        raise ValueError("Events need generated users as their organizers")
+    rng = random.Random(seed)
+    faker = Faker()
+    faker.seed_instance(seed)
+    if start is None:
+        start = datetime.combine(date.today() - timedelta(days=365), datetime.min.time())
+    now = utcnow()
+    first_user_id = next_id(User.__table__)
+    first_event_id = next_id(Event.__table__)
+
+    def user_rows():
+        for user_id in range(first_user_id, first_user_id + users):
+            yield {
+                "id": user_id,
+                "name": faker.name(),
+                "email": faker.email(),
+                "phone_number": faker.phone_number(),
+                "updated_at": now,
+            }
+
+    def event_rows():
+        for event_id in range(first_event_id, first_event_id + events):
+            yield {
+                "id": event_id,
+                "name": faker.catch_phrase()[:128],
+                "location": faker.city(),
+                # Quarter hours within two years
+                "time": start + timedelta(minutes=15 * rng.randrange(2 * 365 * 24 * 4)),
+                "organizer": first_user_id + skewed_index(rng, users, organizer_skew),
+                "description": faker.sentence(),
+                "category": rng.sample(categories, k=rng.randint(1, 3)),
+                "tags": rng.sample(tags, k=rng.randint(1, 3)),
+                "updated_at": now,
+            }
+
+    def participation_rows():
+        for user_id in range(first_user_id, first_user_id + users):
+            attended = min(rng.randint(0, 2 * participations), events)
+            event_ids = set()
+            while len(event_ids) < attended:
+                event_ids.add(first_event_id + skewed_index(rng, events, popularity_skew))
+            for event_id in sorted(event_ids):
+                yield {"user_id": user_id, "event_id": event_id}
+
+    counts = {}
+    counts["users"] = insert_batches(
+        User.__table__, user_rows(), batch_size, SlugAllocator(User.__table__)
+    )
+    print(f"Inserted {counts['users']} users")
+    counts["events"] = insert_batches(
+        Event.__table__,
+        event_rows(),
+        batch_size,
+        SlugAllocator(Event.__table__, EVENT_RESERVED_SLUGS),
+    )
+    print(f"Inserted {counts['events']} events")
+    counts["participations"] = insert_batches(
+        event_participants, participation_rows(), batch_size
+    )
+    db.session.execute(
+        participant_recount().where(Event.__table__.c.id >= first_event_id)
+    )
+    db.session.commit()
+    print(f"Inserted {counts['participations']} participations")
+    return counts
 
 
 def populate_single_user(name, email, phone_number=""):
@@ -137,40 +245,39 @@ def populate_single_event(
 def add_user_to_event(user, event):
     """Adds user to an event as a participant"""
     event.users.append(user)
+    event.participant_count = (event.participant_count or 0) + 1
 
 
-# if __name__ == "__main__":
-#     create_database()
-#     with app.app_context():
-#         db.drop_all()
-#         db.create_all()
-#         populate_database()
-#         users = User.query.all()
-#         print("\nUser-wise event information:")
-#         for u in users:
-#             print(f"User with ID {u.id} is participating in {u.attended_events} events")
-#         print("\nEvent-wise participant information:")
-#         events = Event.query.all()
-#         for e in events:
-#             participants = [user.name for user in e.users]
-#             print(
-#                 f"Event {e.id} ({e.name}) participants:"
-#                 f"{', '.join(participants) if participants else 'No participants'}"
-#             )
-#         # Print the filtered events
-#         category_events = Event.query.filter(Event.category.contains("music")).all()
-#         print("\nFiltered Events:")
-#         for events in category_events:
-#             print(f"Name: {events.name},  Categories: {events.category}")
-#
-#         tags_events = Event.query.filter(Event.tags.contains("jazz-concert")).all()
-#         print("\nFiltered tags:")
-#         for event in tags_events:
-#             print(f"Name: {event.name},  tags: {event.tags}")
-#
-#         # Print events organized by user
-#         print()
-#         for u in users:
-#             events_organized_by_user = Event.query.filter_by(organizer=u.id).all()
-#             for e in events_organized_by_user:
-#                 print(f"{e.name} is organized by user {u.name}")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Populates the database with reproducible generated data"
+    )
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--participations", type=int, default=5,
+                        help="Average number of events a user attends")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--organizer-skew", type=float, default=2.0,
+                        help="1.0 spreads events evenly, larger values favour heavy organizers")
+    parser.add_argument("--popularity-skew", type=float, default=2.0,
+                        help="1.0 spreads participants evenly, larger values favour popular events")
+    parser.add_argument("--start", type=datetime.fromisoformat,
+                        help="Time of the earliest event, default is a year before today")
+    parser.add_argument("--reset", action="store_true",
+                        help="Drops and recreates the tables before populating them")
+    arguments = parser.parse_args()
+    with app.app_context():
+        if arguments.reset:
+            db.drop_all()
+            db.create_all()
+        populate_database(
+            users=arguments.users,
+            events=arguments.events,
+            participations=arguments.participations,
+            seed=arguments.seed,
+            batch_size=arguments.batch_size,
+            organizer_skew=arguments.organizer_skew,
+            popularity_skew=arguments.popularity_skew,
+            start=arguments.start,
+        )
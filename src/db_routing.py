@@ -0,0 +1,176 @@
+"""
+This file contains the read replica routing of the database session. Requests that only
+read (GET, HEAD, OPTIONS) use a healthy replica, everything else uses the primary.
+"""
+
+import hashlib
+import itertools
+import threading
+import time
+from flask import current_app, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+API_KEY_HEADERS = ("User-Api-Key", "EMS-Api-Key")
+
+
+class ReplicaRouter:
+    """
+    Chooses the engine of each request. Reads go to the replicas in turn, except:
+
+    - requests that write, and the rest of a request after its first write
+    - reads of a client during a short window after the client's last write, so a client
+      sees its own writes even while the replicas lag behind
+
+    Clients are told apart by their API key, the window is stored in the shared response
+    cache so that it holds across workers. Replicas are checked with SELECT 1 at most every
+    check_interval seconds, a replica whose check fails isn't used until it passes again.
+    """
+
+    def __init__(self, bind_keys=(), window=5.0, check_interval=10.0):
+        """
+        :param list bind_keys: Flask-SQLAlchemy bind keys of the replica engines
+        :param float window: Seconds a client reads from the primary after writing
+        :param float check_interval: Seconds between health checks of a replica
+        """
+        self.bind_keys = list(bind_keys)
+        self.window = window
+        self.check_interval = check_interval
+        self.cache = None
+        self._health = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def init_app(self, app, cache):
+        """
+        Registers the router and its request hooks to the app.
+
+        :param Flask app: Flask app whose db.session is a RoutingSession
+        :param Cache cache: Flask-Caching cache shared by the workers
+        """
+        self.cache = cache
+        app.extensions["replica_router"] = self
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    @staticmethod
+    def _client_keys(api_keys):
+        return [f"primary_until/{hashlib.sha256(key.encode()).hexdigest()}" for key in api_keys]
+
+    @staticmethod
+    def _request_api_keys():
+        return [request.headers[name] for name in API_KEY_HEADERS if name in request.headers]
+
+    def _start_request(self):
+        session = current_app.extensions["sqlalchemy"].session
+        session.info.pop("replica", None)
+        session.info["read_only"] = (
+            bool(self.bind_keys) and request.method in SAFE_METHODS and not self._recent_writer()
+        )
+
+    def _finish_request(self, response):
+        if request.method not in SAFE_METHODS and self.bind_keys:
+            api_keys = self._request_api_keys()
+            # The key of a new user is only in the response
+            if "User-Api-Key" in response.headers:
+                api_keys.append(response.headers["User-Api-Key"])
+            until = time.time() + self.window
+            for key in self._client_keys(api_keys):
+                self.cache.set(key, until, timeout=max(1, int(self.window) + 1))
+        return response
+
+    def _recent_writer(self):
+        now = time.time()
+        for key in self._client_keys(self._request_api_keys()):
+            until = self.cache.get(key)
+            if until is not None and until > now:
+                return True
+        return False
+
+    def healthy(self, bind_key, engine):
+        """
+        Tells whether a replica passed its last health check, checking it again if the
+        result is older than check_interval.
+
+        :param str bind_key: Bind key of the replica
+        :param Engine engine: Engine of the replica
+        :returns bool: True if the replica can be used
+        """
+        now = time.monotonic()
+        with self._lock:
+            checked_at, ok = self._health.get(bind_key, (None, False))
+            if checked_at is not None and now - checked_at < self.check_interval:
+                return ok
+            # Other threads keep using the previous result while this one checks
+            self._health[bind_key] = (now, ok if checked_at is not None else True)
+        try:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            ok = True
+        except SQLAlchemyError:
+            ok = False
+        with self._lock:
+            self._health[bind_key] = (time.monotonic(), ok)
+        return ok
+
+    def replica_engine(self, engines):
+        """
+        Picks the next healthy replica.
+
+        :param dict engines: Engines by bind key
+        :returns Engine/None: Engine of the replica, None if no replica is healthy
+        """
+        candidates = [key for key in self.bind_keys if key in engines]
+        if not candidates:
+            return None
+        start = next(self._counter)
+        for offset in range(len(candidates)):
+            key = candidates[(start + offset) % len(candidates)]
+            if self.healthy(key, engines[key]):
+                return engines[key]
+        return None
+
+    def status(self, engines):
+        """
+        Reports the last health check result of every replica.
+
+        :param dict engines: Engines by bind key
+        :returns dict: Bind key to True/False, None if the replica hasn't been checked yet
+        """
+        with self._lock:
+            return {
+                key: self._health[key][1] if key in self._health else None
+                for key in self.bind_keys if key in engines
+            }
+
+
+class RoutingSession(Session):
+    """
+    Flask-SQLAlchemy session that reads from a replica when ReplicaRouter marked the
+    request as read only. Flushes, INSERT/UPDATE/DELETE statements and SELECT ... FOR
+    UPDATE use the primary and pin the rest of the request to it. One replica is used for
+    the whole request.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get("read_only") and has_request_context():
+            writes = self._flushing or (
+                clause is not None and (
+                    getattr(clause, "is_dml", False)
+                    or getattr(clause, "_for_update_arg", None) is not None
+                )
+            )
+            if writes:
+                self.info["read_only"] = False
+            else:
+                engine = self.info.get("replica")
+                if engine is None:
+                    router = current_app.extensions["replica_router"]
+                    engine = router.replica_engine(self._db.engines)
+                if engine is not None:
+                    self.info["replica"] = engine
+                    return engine
+                self.info["read_only"] = False
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
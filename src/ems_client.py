@@ -1,22 +1,193 @@
 """Client utils for testing API"""
 
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import json
+import logging
+import threading
+import time
+from urllib.parse import urljoin
 import requests
-import keyring
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from src.credentials import ADMIN_SERVICE, USER_SERVICE, CredentialStore, default_backend
+
+logger = logging.getLogger(__name__)
+NO_USER_MESSAGE = "User is none - cannot make %s request. Please log in or create a user first"
+
+
+# Responses of overloaded or restarting servers, requests that got one are retried
+RETRY_STATUSES = (502, 503, 504)
+
+
+def build_session(retries=3, backoff_factor=0.3, pool_maxsize=10):
+    """
+    Creates a requests Session that keeps its connections alive and retries failed requests.
+    Connection errors are retried for every method, since the request never reached the
+    server. Read errors and RETRY_STATUSES are retried only for the idempotent methods, so
+    a POST is never sent twice. The waits between retries grow exponentially from
+    backoff_factor seconds, or last as long as the Retry-After header of the response asks.
+
+    :param int retries: Number of retries per request, 0 to disable them
+    :param float backoff_factor: Base of the exponential backoff in seconds
+    :param int pool_maxsize: Connections kept open per host, match it to the number of
+                             threads sharing the client
+    :returns Session: Configured session
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class ResponseCache:
+    """
+    Client-side cache of GET responses, keyed by URL and API key. Entries younger than
+    max_age seconds are served without contacting the server. Older entries are revalidated
+    with a conditional request (If-None-Match / If-Modified-Since), which the server answers
+    with 304 and no body if they are still current. The least recently used entry is
+    evicted once maxsize entries are stored.
+
+    The cache only knows about the writes made through the client that owns it, writes of
+    other clients show up after max_age.
+    """
+
+    def __init__(self, max_age=5.0, maxsize=256):
+        """
+        :param float max_age: Seconds an entry is served without revalidation, 0 to always
+                              revalidate
+        :param int maxsize: Maximum number of entries
+        """
+        self.max_age = max_age
+        self.maxsize = maxsize
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Gets an entry.
 
+        :param tuple key: (url, api_key) pair
+        :returns dict/None: Entry with the body, validators and expiry time, or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def store(self, key, response):
+        """
+        Stores a 200 response, if it has an ETag or Last-Modified validator.
+
+        :param tuple key: (url, api_key) pair
+        :param Response response: Response to store
+        """
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        with self._lock:
+            self._entries[key] = {
+                "body": response.content,
+                "etag": etag,
+                "last_modified": last_modified,
+                "expires": time.monotonic() + self.max_age,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def refresh(self, key):
+        """Restarts the max_age of an entry that the server confirmed to be current"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["expires"] = time.monotonic() + self.max_age
+
+    def invalidate(self, *prefixes):
+        """
+        Drops the entries whose URL starts with any of the prefixes, for every API key.
+
+        :param str prefixes: URL prefixes
+        """
+        with self._lock:
+            stale = [key for key in self._entries if key[0].startswith(prefixes)]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        """Drops every entry and resets the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.revalidations = self.misses = 0
 
 
 class EMSClient:
     """Main Class"""
 
-    def __init__(self, base_url):
-        """"Init"""
-        self.BASE_URL = base_url  # most likely http://127.0.0.1:5000/api/
+    def __init__(self, base_url, timeout=(3.05, 10), retries=3, backoff_factor=0.3,
+                 pool_maxsize=10, session=None, cache=None, credentials=None):
+        """
+        Init
+
+        :param str base_url: URL of the API, most likely http://127.0.0.1:5000/api/
+        :param float/tuple timeout: Default timeout of the requests in seconds, or a
+                                    (connect, read) pair. Every request method takes a
+                                    timeout keyword argument that overrides it per call.
+        :param int retries: Retries of a failed request, see build_session
+        :param float backoff_factor: Base of the exponential backoff between retries
+        :param int pool_maxsize: Connections kept open to the server
+        :param Session session: (Optional) Session to use instead of a new one
+        :param ResponseCache cache: (Optional) Cache of the GET methods, None disables it
+        :param CredentialStore credentials: (Optional) Store of the API keys, a memory cache
+                                            over the backend chosen by default_backend
+        """
+        self.BASE_URL = base_url
+        self.timeout = timeout
+        self.session = session or build_session(retries, backoff_factor, pool_maxsize)
+        self.cache = cache
+        self.credentials = credentials or CredentialStore(default_backend())
         self.api_key = None
         self.current_user = None
         self.admin_key = None
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Closes the connections of the client"""
+        self.session.close()
+
+    def request(self, method, endpoint, **kwargs):
+        """
+        Makes a request through the pooled session of the client.
+
+        :param str method: HTTP method
+        :param str endpoint: Endpoint of the request (excluding the BASE_URL part)
+        :param kwargs: Additional parameters of requests, e.g. json, headers or timeout.
+                       A timeout of None uses the default timeout of the client.
+        :returns obj: Response object
+        """
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return self.session.request(method, f"{self.BASE_URL}{endpoint}", **kwargs)
+
     def load_admin_key(self):
         """Load admin key from secure storage, acts as 'admin login' """
         self.set_admin_key()
@@ -24,17 +195,104 @@ class EMSClient:
     def set_admin_key(self, key=None):
         """
         Set the admin API key
-        If no key provided, tries to load from keyring
+        If no key provided, tries to load from the credential store
         """
         if key is not None:
             self.admin_key = key
         else:
             try:
-                self.admin_key = keyring.get_password("EMS_admin", "admin")
+                self.admin_key = self.credentials.get(ADMIN_SERVICE, "admin")
                 if not self.admin_key:
-                    raise ValueError("No admin key found in keyring")
+                    raise ValueError("No admin key found in the credential store")
             except Exception as e:
-                raise ValueError(f"Failed to access keyring: {str(e)}")
+                raise ValueError(f"Failed to access the credential store: {str(e)}")
+
+    def get_json(self, endpoint, send=None, api_key=None, timeout=None):
+        """
+        GETs a JSON document, through the cache of the client if it has one.
+
+        :param str endpoint: Endpoint of the request (excluding the BASE_URL part)
+        :param function send: Function making the request, e.g. self.authenticated_request,
+                              self.request by default
+        :param str api_key: API key the request is made with, part of the cache key
+        :param float/tuple timeout: (Optional) Timeout of this call, the client's default otherwise
+        :returns dict/list/None: Document, or None if the response wasn't successful
+        """
+        send = send or self.request
+        if self.cache is None:
+            response = send("GET", endpoint, timeout=timeout)
+            return response.json() if response.status_code == 200 else None
+
+        key = (f"{self.BASE_URL}{endpoint}", api_key)
+        entry = self.cache.get(key)
+        headers = {}
+        if entry is not None:
+            if entry["expires"] > time.monotonic():
+                self.cache.hits += 1
+                return json.loads(entry["body"])
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = send("GET", endpoint, headers=headers, timeout=timeout)
+        if response.status_code == 304 and entry is not None:
+            self.cache.revalidations += 1
+            self.cache.refresh(key)
+            return json.loads(entry["body"])
+        self.cache.misses += 1
+        if response.status_code != 200:
+            self.cache.invalidate(key[0])
+            return None
+        self.cache.store(key, response)
+        return response.json()
+
+    def iter_pages(self, endpoint, params=None, send=None, timeout=None):
+        """
+        Yields the pages of a paged collection, following the rel="next" Link headers. The
+        next page is fetched in a background thread while the current one is processed, so
+        at most two pages are held in memory. Pages bypass the cache of the client.
+
+        :param str endpoint: Endpoint of the first page (excluding the BASE_URL part)
+        :param dict params: (Optional) Query parameters of the first page, the next pages
+                            keep them
+        :param function send: Function making the requests, e.g. self.admin_request,
+                              self.request by default
+        :param float/tuple timeout: (Optional) Timeout of each page, the client's default otherwise
+        :returns generator: Lists of items, one per page
+        :raises HTTPError: If a page couldn't be fetched
+        """
+        send = send or self.request
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            page = executor.submit(self._get_page, send, endpoint, params, timeout)
+            while page is not None:
+                items, next_endpoint = page.result()
+                page = None
+                if next_endpoint is not None:
+                    page = executor.submit(self._get_page, send, next_endpoint, None, timeout)
+                yield items
+
+    def _get_page(self, send, endpoint, params=None, timeout=None):
+        response = send("GET", endpoint, params=params, timeout=timeout)
+        response.raise_for_status()
+        next_url = response.links.get("next", {}).get("url")
+        if next_url is None:
+            return response.json(), None
+        # The API links to the next page with a path, e.g. /api/events/?cursor=...
+        next_url = urljoin(response.url, next_url)
+        if not next_url.startswith(self.BASE_URL):
+            raise ValueError(f"Next page {next_url} is outside of {self.BASE_URL}")
+        return response.json(), next_url[len(self.BASE_URL):]
+
+    def invalidate(self, *endpoints):
+        """
+        Drops the cached responses of the endpoints and the endpoints below them, after the
+        client changed them.
+
+        :param str endpoints: Endpoints (excluding the BASE_URL part)
+        """
+        if self.cache is not None:
+            self.cache.invalidate(*(f"{self.BASE_URL}{endpoint}" for endpoint in endpoints))
 
     def admin_request(self, method, endpoint, **kwargs):
         """Make authenticated admin request"""
@@ -45,11 +303,10 @@ class EMSClient:
         headers['EMS-Api-Key'] = self.admin_key
         kwargs['headers'] = headers
 
-        url = f"{self.BASE_URL}{endpoint}"
-        response = requests.request(method, url, timeout=10, **kwargs)
+        response = self.request(method, endpoint, **kwargs)
 
         if response.status_code == 403:
-            print("Invalid or expired admin API key")
+            logger.warning("Invalid or expired admin API key")
             self.admin_key = None
 
         return response
@@ -74,42 +331,42 @@ class EMSClient:
         headers = kwargs.get('headers', {})
         headers['User-Api-Key'] = self.api_key
         kwargs['headers'] = headers
-        url = f"{self.BASE_URL}{endpoint}"
-        response = requests.request(method, url, timeout=10, **kwargs)
+        response = self.request(method, endpoint, **kwargs)
 
         if response.status_code == 403:
-            print(f"[{method}] Invalid API key")
+            logger.warning("[%s] Invalid API key", method)
             self.api_key = None
             self.current_user = None
 
         return response
 
     # User related methods
-    def create_user(self, username, email, phone_number=""):
+    def create_user(self, username, email, phone_number="", timeout=None):
         """
         Creates a user via POST request.
 
         :param str username: Name of the user
         :param str email: Email of the user
         :param str phone_number: (Optional) Phone number of the user
+        :param float/tuple timeout: (Optional) Timeout of this call, the client's default otherwise
         :returns bool: Returns True if user creation was successful, False otherwise
         """
-        print(f"Creating user")
-        url = f"{self.BASE_URL}users/"
+        logger.debug("Creating user %s", username)
         contents = {"name": username, "email": email}
         if phone_number:
             contents["phone_number"] = phone_number
-        response = requests.post(url=url, json=contents, timeout=10)
+        response = self.request("POST", "users/", json=contents, timeout=timeout)
+        self.invalidate("users/")
 
         if response.status_code == 201:
             api_key = response.headers.get("User-Api-Key")
             if api_key:
-                keyring.set_password("EMS_user", username, api_key)
+                self.credentials.set(USER_SERVICE, username, api_key)
                 self.api_key = api_key
                 self.current_user = username
-                print(f"User {username} created successfully.")
+                logger.info("User %s created successfully.", username)
                 return True
-        print(f"Error in creating user: {response.status_code}, {response.text}")
+        logger.warning("Error in creating user: %s, %s", response.status_code, response.text)
         return False
 
     def user_login(self, username):
@@ -120,95 +377,95 @@ class EMSClient:
         :return bool: True if login was successful, False otherwise
         """
         if not username:
-            print("Username was not given")
+            logger.warning("Username was not given")
             return False
-        user_key = keyring.get_password("EMS_user", username)
+        user_key = self.credentials.get(USER_SERVICE, username)
         if not user_key:
-            print("User does not exist")
+            logger.warning("User does not exist")
             return False
         if user_key == self.api_key and self.current_user == username:
-            print(f"Already logged in as {self.current_user}")
+            logger.info("Already logged in as %s", self.current_user)
             return False
         else:
             self.current_user = username
             self.api_key = user_key
-            print("Logged in successfully")
+            logger.info("Logged in successfully")
             return True
 
     def user_logout(self, username):
         if not username:
-            print("Username was not given")
+            logger.warning("Username was not given")
             return False
 
         self.current_user = None
         self.api_key = None
 
-    def get_user(self):
+    def get_user(self, timeout=None):
         """
         GETs all the information about the user.
 
+        :param float/tuple timeout: (Optional) Timeout of this call, the client's default otherwise
         :returns dictionary/None: User information as a dictionary or None
         """
         if not self.current_user:
-            print("User is none - cannot make GET request. Please log in or create a user first")
+            logger.warning(NO_USER_MESSAGE, "GET")
 
         endpoint = f"users/{self.current_user}/"
-        response = self.authenticated_request("GET", endpoint)
-        if response.status_code == 200:
-            return response.json()
-        return
+        return self.get_json(endpoint, self.authenticated_request, self.api_key, timeout)
 
-    def modify_user(self, modified_contents):
+    def modify_user(self, modified_contents, timeout=None):
         """
         Modifies the user via PUT request.
 
         :param dict modified_contents: Modified contents of the user
 
+        :param float/tuple timeout: (Optional) Timeout of this call, the client's default otherwise
         :returns bool: True if modification was successful, False otherwise
         """
         if not self.current_user:
-            print("User is none - cannot make PUT request. Please log in or create a user first")
+            logger.warning(NO_USER_MESSAGE, "PUT")
             return False
 
         endpoint = f"users/{self.current_user}/"
-        response = self.authenticated_request("PUT", endpoint=endpoint, json=modified_contents)
+        response = self.authenticated_request(
+            "PUT", endpoint=endpoint, json=modified_contents, timeout=timeout
+        )
+        self.invalidate("users/")
 
         if response.status_code == 201:
             old_username = self.current_user
             new_username = modified_contents['name']
 
             if old_username != new_username:
-                api_key = keyring.get_password("EMS_user", old_username)
-                if api_key:
-                    keyring.set_password("EMS_user", new_username, api_key)
-                    keyring.delete_password("EMS_user", old_username)
+                self.credentials.rename(USER_SERVICE, old_username, new_username)
 
             self.current_user = new_username
-            print(f"User {new_username} modified successfully.")
+            logger.info("User %s modified successfully.", new_username)
             return True
 
         return False
 
 
-    def delete_user(self):
+    def delete_user(self, timeout=None):
         """
         Deletes the current user via DELETE request.
 
+        :param float/tuple timeout: (Optional) Timeout of this call, the client's default otherwise
         :returns bool: True if deletion was successful, False otherwise
         """
         if not self.current_user:
-            print("User is none - cannot make DELETE request. Please log in or create a user first")
+            logger.warning(NO_USER_MESSAGE, "DELETE")
             return False
 
         endpoint = f"users/{self.current_user}/"
-        response = self.authenticated_request("DELETE", endpoint=endpoint)
+        response = self.authenticated_request("DELETE", endpoint=endpoint, timeout=timeout)
+        # The events organized by the user are deleted too
+        self.invalidate("users/", "events/")
         if response.status_code == 204:
-            print(f"User {self.current_user} was deleted successfully.")
+            logger.info("User %s was deleted successfully.", self.current_user)
 
-            try:
-                keyring.delete_password("EMS_user", self.current_user)
-            except keyring.errors.PasswordDeleteError:
-                print("Keyring entry not found or already deleted.")
+            if not self.credentials.delete(USER_SERVICE, self.current_user):
+                logger.warning("Stored API key not found or already deleted.")
 
             self.current_user = None
             self.api_key = None
@@ -216,29 +473,50 @@ class EMSClient:
 
         return False
 
-    def get_user_events(self):
+    def get_user_events(self, timeout=None):
         """
         GETs the events user has attended and/or organized.
 
+        :param float/tuple timeout: (Optional) Timeout of this call, the client's default otherwise
         :return dict: Dictionary of user related events
         """
 
         if not self.current_user:
-            print("User is none - cannot make DELETE request. Please log in or create a user first")
+            logger.warning(NO_USER_MESSAGE, "DELETE")
         endpoint = f"users/{self.current_user}/events/"
-        response = self.authenticated_request("GET", endpoint=endpoint)
-        if response.status_code == 200:
-            print(f"Got user related events successfully")
-            return response.json()
-        return
+        return self.get_json(endpoint, self.authenticated_request, self.api_key, timeout)
+
+    def get_all_users(self, timeout=None):
+        """
+        Admin-only: Get list of all users. Use iter_users to go through many users without
+        holding all of them in memory.
+
+        :param float/tuple timeout: (Optional) Timeout of each page, the client's default otherwise
+        :returns list/None: List of all users or None
+        """
+        try:
+            return [user for page in self.iter_pages("users/", None, self.admin_request, timeout)
+                    for user in page]
+        except requests.HTTPError as e:
+            logger.warning("Error in getting users: %s", e)
+            return None
+
+    def iter_users(self, page_size=None, timeout=None):
+        """
+        Admin-only: Yields every user, page by page. The next page is fetched in the
+        background while the current one is processed.
 
-    def get_all_users(self):
-        """Admin-only: Get list of all users"""
-        response = self.admin_request("GET", "users/")
-        print(f"response is: {response.json()}")
-        return response.json() if response.status_code == 200 else None
+        :param int page_size: (Optional) Users per request, capped by the server
+        :param float/tuple timeout: (Optional) Timeout of each page, the client's default otherwise
+        :returns generator: Serialized users
+        :raises HTTPError: If a page couldn't be fetched
+        """
+        params = {"limit": page_size} if page_size else None
+        for page in self.iter_pages("users/", params, self.admin_request, timeout):
+            yield from page
 
-    def create_event(self, name, location, time, description, category=None, tags=None):
+    def create_event(self, name, location, time, description, category=None, tags=None,
+                     timeout=None):
         """
         Creates an event with given parameters. organizer id is handled on the server side
 
@@ -249,10 +527,11 @@ class EMSClient:
         :param list category: (Optional) List of categories that the event belongs to
         :param list tags: (Optional) List of the tags that event has
 
+        :param float/tuple timeout: (Optional) Timeout of this call, the client's default otherwise
         :returns bool: True if event creation was successful, False otherwise
         """
         if not self.current_user:
-            print("User is none - cannot make POST request. Please log in or create a user first")
+            logger.warning(NO_USER_MESSAGE, "POST")
 
         endpoint = f"users/{self.current_user}/events/"
         event_details = {"name": name, "location": location, "time": time.isoformat(),\
@@ -262,28 +541,30 @@ class EMSClient:
         if tags:
             event_details["tags"] = tags
 
-        response = self.authenticated_request("POST", endpoint=endpoint, json=event_details)
+        response = self.authenticated_request(
+            "POST", endpoint=endpoint, json=event_details, timeout=timeout
+        )
+        self.invalidate("events/", endpoint)
         if response.status_code == 201:
-            print(f"Event created successfully.")
+            logger.info("Event created successfully.")
             return True
         return False
 
-    def get_event(self, name):
+    def get_event(self, name, timeout=None):
         """
         GETs information about an event.
 
         :param str name: Name of the event
 
+        :param float/tuple timeout: (Optional) Timeout of this call, the client's default otherwise
         :returns dict/None: Dictionary of the event details or None
         """
 
         endpoint = f"events/{name}/"
-        response = requests.get(f"{self.BASE_URL}{endpoint}", timeout=10)
-        if response.status_code == 200:
-            return response.json()
-        return
+        return self.get_json(endpoint, timeout=timeout)
 
-    def modify_event(self, name, location, time, description, category=None, tags=None):
+    def modify_event(self, name, location, time, description, category=None, tags=None,
+                     timeout=None):
         """
         Modifies an event with given parameters. organizer id is handled on the server side
 
@@ -294,10 +575,11 @@ class EMSClient:
         :param list category: (Optional) List of categories that the event belongs to
         :param list tags: (Optional) List of the tags that event has
 
+        :param float/tuple timeout: (Optional) Timeout of this call, the client's default otherwise
         :returns bool: True if event creation was successful, False otherwise
         """
         if not self.current_user:
-            print("User is none - cannot make PUT request. Please log in or create a user first")
+            logger.warning(NO_USER_MESSAGE, "PUT")
 
         endpoint = f"users/{self.current_user}/events/{name}/"
 
@@ -308,81 +590,108 @@ class EMSClient:
         if tags:
             event_details["tags"] = tags
 
-        response = self.authenticated_request("PUT", endpoint=endpoint)
+        response = self.authenticated_request("PUT", endpoint=endpoint, timeout=timeout)
+        self.invalidate("events/", f"users/{self.current_user}/events/")
         if response.status_code == 201:
-            print(f"Event created successfully.")
+            logger.info("Event created successfully.")
             return True
         return False
 
-    def delete_event(self, name):
+    def delete_event(self, name, timeout=None):
         """
         Deletes an event
 
         :param str name: Name of the event
+        :param float/tuple timeout: (Optional) Timeout of this call, the client's default otherwise
         :return bool: True if deletion was successful, otherwise false
         """
         endpoint = f"users/{self.current_user}/events/{name}/"
-        response = self.authenticated_request("DELETE", endpoint=endpoint)
+        response = self.authenticated_request("DELETE", endpoint=endpoint, timeout=timeout)
+        self.invalidate("events/", f"users/{self.current_user}/events/")
         if response.status_code == 204:
-            print("Event deleted successfully.")
+            logger.info("Event deleted successfully.")
             return True
         return False
 
-    def get_events(self):
+    def get_events(self, timeout=None):
         """
-        Gets all events
+        Gets the first page of events, iter_events goes through all of them
 
-        :returns dict/None: Dictionary of all the events or None
+        :param float/tuple timeout: (Optional) Timeout of this call, the client's default otherwise
+        :returns list/None: List of the events or None
         """
-        endpoint = f"events/"
-        response = requests.get(f"{self.BASE_URL}{endpoint}", timeout=10)
-        if response.status_code == 200:
-            return response.json()
-        return
+        return self.get_json("events/", timeout=timeout)
 
-    def add_user_as_participant(self, event):
+    def iter_events(self, filters=None, page_size=None, timeout=None):
+        """
+        Yields every event in time order, page by page. The next page is fetched in the
+        background while the current one is processed.
+
+        :param dict filters: (Optional) Query parameters of EventCollection, e.g.
+                             {"from": datetime.now(), "location": "Oulu", "tag": "music"}
+        :param int page_size: (Optional) Events per request, capped by the server
+        :param float/tuple timeout: (Optional) Timeout of each page, the client's default otherwise
+        :returns generator: Serialized events
+        :raises HTTPError: If a page couldn't be fetched
+        """
+        params = {
+            name: value.isoformat() if isinstance(value, datetime) else value
+            for name, value in (filters or {}).items()
+        }
+        if page_size:
+            params["limit"] = page_size
+        for page in self.iter_pages("events/", params, timeout=timeout):
+            yield from page
+
+    def add_user_as_participant(self, event, timeout=None):
         """
         Adds user as participant to an event.
 
         :param str event: Name of the event
+        :param float/tuple timeout: (Optional) Timeout of this call, the client's default otherwise
         :returns bool: True if adding user to participants was successful, False otherwise
         """
         endpoint = f"events/{event}/participants/{self.current_user}/"
         if not self.current_user:
-            print("User is none - cannot make POST request. Please log in or create a user first")
-        response = self.authenticated_request("POST", endpoint=endpoint)
+            logger.warning(NO_USER_MESSAGE, "POST")
+        response = self.authenticated_request("POST", endpoint=endpoint, timeout=timeout)
+        self.invalidate(f"events/{event}/", f"users/{self.current_user}/")
         if response.status_code == 201:
-            print(f"User {self.current_user} added as participant to the event {event}.")
+            logger.info("User %s added as participant to the event %s.", self.current_user, event)
             return True
         return False
 
-    def remove_user_participation(self, event):
+    def remove_user_participation(self, event, timeout=None):
         """
         Removes user from event participants.
 
         :param str event: Name of the event
+        :param float/tuple timeout: (Optional) Timeout of this call, the client's default otherwise
         :returns bool: True if deleting user from participants was successful, False otherwise
         """
         endpoint = f"events/{event}/participants/{self.current_user}/"
         if not self.current_user:
-            print("User is none - cannot make DELETE request. Please log in or create a user first")
-        response = self.authenticated_request("DELETE", endpoint=endpoint)
+            logger.warning(NO_USER_MESSAGE, "DELETE")
+        response = self.authenticated_request("DELETE", endpoint=endpoint, timeout=timeout)
+        self.invalidate(f"events/{event}/", f"users/{self.current_user}/")
         if response.status_code == 204:
-            print(f"User {self.current_user} deleted from participants @ event: {event}.")
+            logger.info("User %s deleted from participants @ event: %s.", self.current_user, event)
             return True
         return False
 
 
 if __name__ == "__main__":
+    from src.logging_config import setup_logging
+    setup_logging("INFO", "text")
     c = EMSClient("http://127.0.0.1:5000/api/")
     #c2 = EMSClient("http://127.0.0.1:5000/api/")
     #c3 = EMSClient("http://127.0.0.1:5000/api/")
     c.load_admin_key()
-    print(f"current user: {c.current_user}")
+    logger.info("current user: %s", c.current_user)
     c.create_user("aaa", "bbb", "ccc")
-    print(f"current user: {c.current_user}")
+    logger.info("current user: %s", c.current_user)
     #c2.create_user("asdasd", "qwdasdas", "adssadasa")
-    print(f"current user: {c.current_user}")
+    logger.info("current user: %s", c.current_user)
     c.get_all_users()
     #c.get_all_users()
     c.create_event("testi", "testi", datetime.now() + timedelta(hours=1),\
@@ -391,13 +700,13 @@ if __name__ == "__main__":
         "testikakkonen")
     s_ek = c.get_event("testikakkonen")
     ev = c.get_user_events()
-    print(json.dumps(ev))
+    logger.info("user events: %s", json.dumps(ev))
     c.create_user("moi", "hei", "terve")
     c.add_user_as_participant("testi")
     c.add_user_as_participant("testikakkonen")
     ev = c.get_user_events()
-    print(json.dumps(ev))
+    logger.info("user events: %s", json.dumps(ev))
     c.remove_user_participation("testikakkonen")
     ev = c.get_user_events()
-    print(json.dumps(ev))
+    logger.info("user events: %s", json.dumps(ev))
     c.delete_event("testikakkonen")
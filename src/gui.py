@@ -3,9 +3,9 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
-from src.ems_client import EMSClient
+from src.ems_client import EMSClient, ResponseCache
 
-client = EMSClient("http://127.0.0.1:5000/api/")
+client = EMSClient("http://127.0.0.1:5000/api/", cache=ResponseCache(max_age=5))
 
 
 def parse_datetime_from_string(time_string):
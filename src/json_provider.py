@@ -0,0 +1,57 @@
+"""This file contains the JSON provider of the API, which uses orjson when it is installed"""
+
+from datetime import date
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy.engine import Row
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that serializes with orjson if it is installed and falls back to the
+    standard library json otherwise. With both, datetimes are written in ISO 8601 like
+    Event.serialize writes them and SQLAlchemy rows are written as objects, so query results
+    can be returned without converting them first.
+
+    orjson doesn't escape non-ASCII characters, the bodies are UTF-8 instead.
+    """
+
+    @staticmethod
+    def default(o):
+        """Converts the values that neither encoder supports natively"""
+        if isinstance(o, Row):
+            return o._asdict()
+        if isinstance(o, date):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+    def _orjson_option(self):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._orjson_option()).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        option = self._orjson_option() | orjson.OPT_APPEND_NEWLINE
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=option), mimetype=self.mimetype
+        )
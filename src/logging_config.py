@@ -0,0 +1,175 @@
+"""
+This file contains the logging setup of the API and the client. Records are put to a queue
+by the thread that logs them and written by a background QueueListener thread, so request
+threads never wait for stdout. Every record of a request carries its request ID.
+"""
+
+import atexit
+import copy
+import json
+import logging
+from logging.handlers import QueueHandler, QueueListener
+import os
+import queue
+import re
+import sys
+import uuid
+from flask import g, has_request_context, request
+
+REQUEST_ID_HEADER = "X-Request-ID"
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# Attributes every LogRecord has, anything else was passed with extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "request_id", "taskName",
+}
+
+_listener = None
+_listener_pid = None
+
+
+def current_request_id():
+    """
+    Gets the ID of the current request, assigning it on first use. The ID is taken from the
+    X-Request-ID header if the client or a proxy sent a valid one.
+
+    :returns str: Request ID, "-" outside requests
+    """
+    if not has_request_context():
+        return "-"
+    if "request_id" not in g:
+        request_id = request.headers.get(REQUEST_ID_HEADER, "")
+        g.request_id = request_id if _REQUEST_ID.match(request_id) else uuid.uuid4().hex
+    return g.request_id
+
+
+class RequestIdFilter(logging.Filter):
+    """Adds the ID of the current request to every record"""
+
+    def filter(self, record):
+        if not hasattr(record, "request_id"):
+            record.request_id = current_request_id()
+        return True
+
+
+class StderrHandler(logging.StreamHandler):
+    """Writes to the current sys.stderr, which gunicorn and test runners may replace"""
+
+    def __init__(self):
+        super().__init__(sys.stderr)
+
+    @property
+    def stream(self):
+        return sys.stderr
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class StructuredQueueHandler(QueueHandler):
+    """
+    Enqueues records with their message and traceback formatted separately, so that the
+    formatters of the listener can still tell them apart. QueueHandler would merge the
+    traceback into the message.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            # Only the text of the traceback is kept, like QueueHandler does
+            record.exc_text = record.exc_text or logging.Formatter().formatException(
+                record.exc_info
+            )
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON objects, including the fields given in extra="""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        entry.update(
+            (key, value) for key, value in vars(record).items()
+            if key not in _RECORD_ATTRIBUTES
+        )
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+def setup_logging(level="INFO", fmt="json", stream=None):
+    """
+    Routes the records of the root logger through a queue to a background thread that
+    writes them to the stream. Calling the function again replaces the previous setup, a
+    process forked after the setup must call it again as the listener thread isn't forked.
+
+    :param str level: Level of the root logger, e.g. "INFO" or "DEBUG"
+    :param str fmt: "json" for one JSON object per line, "text" for plain lines
+    :param stream: Stream the records are written to, sys.stderr by default
+    :returns QueueListener: The started listener
+    """
+    global _listener, _listener_pid  # pylint: disable=global-statement
+    _stop_listener()
+
+    if fmt == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            "%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"
+        )
+    output = logging.StreamHandler(stream) if stream is not None else StderrHandler()
+    output.setFormatter(formatter)
+
+    records = queue.SimpleQueue()
+    queue_handler = StructuredQueueHandler(records)
+    # Filters run on the thread that logs, where the request context is available
+    queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    for handler in [h for h in root.handlers if isinstance(h, QueueHandler)]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    _listener = QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    _listener_pid = os.getpid()
+    return _listener
+
+
+def _stop_listener():
+    # Writes out the queued records, stopping a stopped listener again would fail
+    if _listener is None or _listener_pid != os.getpid():
+        return
+    if _listener._thread is not None:  # pylint: disable=protected-access
+        _listener.stop()
+
+
+atexit.register(_stop_listener)
+
+
+def init_app(app):
+    """
+    Returns the ID of every request in the X-Request-ID header of its response.
+
+    :param Flask app: Flask app
+    """
+    @app.after_request
+    def _return_request_id(response):
+        response.headers[REQUEST_ID_HEADER] = current_request_id()
+        return response
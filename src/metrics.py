@@ -0,0 +1,121 @@
+"""
+This file contains the Prometheus metrics of the API: request counts, latencies and the
+database queries of every request, labelled by the resource that handled the request.
+
+Under gunicorn every worker is its own process. When PROMETHEUS_MULTIPROC_DIR is set (see
+gunicorn.conf.py) the workers write their samples to that directory and /metrics
+aggregates the samples of every worker, whichever worker answers the scrape.
+"""
+
+import os
+import time
+from flask import Response, g, has_request_context, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from src import query_timing
+
+REQUESTS = Counter(
+    "ems_http_requests_total",
+    "HTTP requests by resource, method and status code",
+    ["resource", "method", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "ems_http_request_duration_seconds",
+    "Time from receiving a request to sending the last byte of the response",
+    ["resource", "method"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+DB_QUERIES = Histogram(
+    "ems_db_queries_per_request",
+    "Database queries executed by a request",
+    ["resource", "method"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+DB_TIME = Histogram(
+    "ems_db_time_seconds",
+    "Time a request spent waiting for database queries",
+    ["resource", "method"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+
+
+def resource_name(app):
+    """
+    Names the resource of the current request, e.g. "UserItem", without URL parameters so
+    that the number of label values stays small.
+
+    :param Flask app: Flask app
+    :returns str: Class name of the flask-restful Resource, endpoint name of other views,
+                  or "unmatched" if no route matched
+    """
+    if request.url_rule is None:
+        return "unmatched"
+    view = app.view_functions.get(request.endpoint)
+    view_class = getattr(view, "view_class", None)
+    return view_class.__name__ if view_class is not None else request.endpoint
+
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+    g.db_queries = 0
+    g.db_time = 0.0
+
+
+def _record_query(statement, seconds, failed):
+    # Failed statements count too, the request waited for them all the same
+    if has_request_context() and "db_queries" in g:
+        g.db_queries += 1
+        g.db_time += seconds
+
+
+def metrics_response():
+    """
+    Renders the metrics of every worker in the Prometheus text format.
+
+    :returns Response: Response containing the metrics
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), status=200, mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_app(app):
+    """
+    Registers the metric hooks and the /metrics route to the app.
+
+    :param Flask app: Flask app
+    """
+    app.before_request(_start_request)
+
+    @app.after_request
+    def _record_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    # Streamed responses are torn down only after their last chunk, so the latency and
+    # the queries of the stream are included
+    @app.teardown_request
+    def _record_request(exception):
+        if "metrics_started" not in g:
+            return
+        resource = resource_name(app)
+        status = g.get("metrics_status", 500 if exception is not None else 200)
+        REQUESTS.labels(resource, request.method, str(status)).inc()
+        REQUEST_LATENCY.labels(resource, request.method).observe(
+            time.perf_counter() - g.metrics_started
+        )
+        DB_QUERIES.labels(resource, request.method).observe(g.db_queries)
+        DB_TIME.labels(resource, request.method).observe(g.db_time)
+
+    app.add_url_rule("/metrics", "metrics", metrics_response)
+    query_timing.add_listener(_record_query)
@@ -0,0 +1,264 @@
+"""
+This file contains the opt-in query profiler of the API. When enabled it records every SQL
+statement of a request with its duration and the line of the API that ran it, flags
+statements that are repeated with different parameters (N+1 queries) and logs requests
+slower than the threshold. Slow requests and a sample of the others are kept in memory and
+listed by /api/admin/profiles/.
+"""
+
+from collections import Counter, deque
+from datetime import datetime, timezone
+import os
+import random
+import re
+import sys
+import threading
+import time
+from flask import current_app, g, has_request_context, request
+from src import query_timing
+
+SOURCE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTED_KEY = "ems.profiler.started"
+
+_PLACEHOLDER = r"(?:%s|\?|%\(\w+\)s|:\w+)"
+_PLACEHOLDER_RUN = re.compile(rf"{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+")
+_ROW_RUN = re.compile(r"(\([^()]*\))(?:\s*,\s*\([^()]*\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement):
+    """
+    Reduces a statement to its shape, so that statements that only differ by the number of
+    their parameters, e.g. IN lists and multi-row VALUES, are counted together.
+
+    :param str statement: SQL statement with parameter placeholders
+    :returns str: Statement with whitespace and placeholder lists collapsed
+    """
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _PLACEHOLDER_RUN.sub(lambda match: match.group(0).split(",")[0] + ", ...", shape)
+    return _ROW_RUN.sub(r"\1, ...", shape)
+
+
+def call_site():
+    """
+    Finds the innermost line of the API itself on the current stack, skipping SQLAlchemy,
+    Flask, the statement timing and this module.
+
+    :returns str: Location of the call, e.g. "src/resources_and_models.py:812 in get"
+    """
+    frame = sys._getframe(1)  # pylint: disable=protected-access
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(SOURCE_ROOT)
+            and filename not in (__file__, query_timing.__file__)
+            and f"{os.sep}site-packages{os.sep}" not in filename
+        ):
+            location = os.path.relpath(filename, SOURCE_ROOT)
+            return f"{location}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+class QueryProfiler:
+    """
+    Collects the statements of each request while enabled. The profile of a request is
+    split into phases by the request hooks: "routing" covers the URL converters,
+    "handler" the before_request hooks, the authentication decorators, the view and its
+    serialization, and "response" the streaming of the body after the view returned.
+
+    Profiles are kept per worker process, up to max_profiles of the most recent ones.
+    """
+
+    def __init__(
+        self,
+        enabled=False,
+        slow_threshold=0.5,
+        sample_rate=0.0,
+        repeat_threshold=5,
+        max_profiles=100,
+        max_statements=500,
+    ):
+        """
+        :param bool enabled: True to profile requests
+        :param float slow_threshold: Seconds after which a request is logged and kept
+        :param float sample_rate: Share of the other requests whose profile is kept
+        :param int repeat_threshold: Executions of the same statement shape that are
+                                     reported as an N+1 pattern
+        :param int max_profiles: Number of profiles kept
+        :param int max_statements: Number of statements recorded per request, the rest are
+                                   only counted
+        """
+        self.enabled = enabled
+        self.slow_threshold = slow_threshold
+        self.sample_rate = sample_rate
+        self.repeat_threshold = repeat_threshold
+        self.max_statements = max_statements
+        self.profiles = deque(maxlen=max_profiles)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """
+        Registers the profiler, its request hooks and its statement timing listener.
+
+        :param Flask app: Flask app
+        """
+        app.extensions["query_profiler"] = self
+        app.wsgi_app = self._timed(app.wsgi_app)
+        app.before_request(self._start_handler)
+        app.after_request(self._finish_handler)
+        app.teardown_request(self._finish_request)
+        query_timing.add_listener(_record_statement)
+
+    @staticmethod
+    def _timed(wsgi_app):
+        # Stamped before Flask matches the URL, so the converters are part of the profile
+        def wsgi(environ, start_response):
+            environ[STARTED_KEY] = time.perf_counter()
+            return wsgi_app(environ, start_response)
+        return wsgi
+
+    def current(self):
+        """
+        Gets the profile of the current request, starting it if needed.
+
+        :returns dict/None: Profile or None if the profiler is disabled or there is no request
+        """
+        if not self.enabled or not has_request_context():
+            return None
+        profile = g.get("query_profile")
+        if profile is None:
+            profile = {
+                "started": request.environ.get(STARTED_KEY, time.perf_counter()),
+                "phase": "routing",
+                "phases": {},
+                "statements": [],
+                "shapes": Counter(),
+                "shape_seconds": Counter(),
+                "shape_sites": {},
+                "query_count": 0,
+                "db_seconds": 0.0,
+            }
+            g.query_profile = profile
+        return profile
+
+    def record(self, statement, seconds, failed=False):
+        """
+        Adds a statement to the profile of the current request.
+
+        :param str statement: SQL statement
+        :param float seconds: Execution time of the statement
+        :param bool failed: True if the statement raised an error
+        """
+        profile = self.current()
+        if profile is None:
+            return
+        shape = statement_shape(statement)
+        site = call_site()
+        profile["query_count"] += 1
+        profile["db_seconds"] += seconds
+        profile["shapes"][shape] += 1
+        profile["shape_seconds"][shape] += seconds
+        profile["shape_sites"].setdefault(shape, set()).add(site)
+        if len(profile["statements"]) < self.max_statements:
+            profile["statements"].append({
+                "statement": shape,
+                "seconds": round(seconds, 6),
+                "call_site": site,
+                "phase": profile["phase"],
+                "failed": failed,
+            })
+
+    def _enter_phase(self, profile, phase):
+        now = time.perf_counter()
+        started = profile.get("phase_started", profile["started"])
+        profile["phases"][profile["phase"]] = round(now - started, 6)
+        profile["phase"] = phase
+        profile["phase_started"] = now
+
+    def _start_handler(self):
+        profile = self.current()
+        if profile is not None:
+            self._enter_phase(profile, "handler")
+
+    def _finish_handler(self, response):
+        profile = self.current()
+        if profile is not None:
+            profile["status"] = response.status_code
+            self._enter_phase(profile, "response")
+        return response
+
+    def _finish_request(self, exception):
+        profile = g.pop("query_profile", None)
+        if profile is None:
+            return
+        self._enter_phase(profile, None)
+        seconds = time.perf_counter() - profile["started"]
+        slow = seconds >= self.slow_threshold
+        if not slow and random.random() >= self.sample_rate:
+            return
+
+        repeated = [
+            {
+                "statement": shape,
+                "count": count,
+                "seconds": round(profile["shape_seconds"][shape], 6),
+                "call_sites": sorted(site for site in profile["shape_sites"][shape] if site),
+            }
+            for shape, count in profile["shapes"].most_common()
+            if count >= self.repeat_threshold
+        ]
+        summary = {
+            "method": request.method,
+            "path": request.full_path.rstrip("?"),
+            "endpoint": request.endpoint,
+            "status": profile.get("status", 500 if exception is not None else None),
+            "time": datetime.now(timezone.utc).isoformat(),
+            "seconds": round(seconds, 6),
+            "slow": slow,
+            "phases": profile["phases"],
+            "query_count": profile["query_count"],
+            "db_seconds": round(profile["db_seconds"], 6),
+            "repeated": repeated,
+            "statements": profile["statements"],
+        }
+        with self._lock:
+            self.profiles.append(summary)
+
+        if slow:
+            current_app.logger.warning(
+                "Slow request %s %s: %.3f s, %d queries in %.3f s%s",
+                summary["method"],
+                summary["path"],
+                seconds,
+                summary["query_count"],
+                profile["db_seconds"],
+                "".join(
+                    f"\n  repeated {item['count']}x from {', '.join(item['call_sites'])}: "
+                    f"{item['statement'][:200]}"
+                    for item in repeated
+                ),
+            )
+
+    def recent(self, slow_only=False):
+        """
+        Lists the kept profiles, newest first.
+
+        :param bool slow_only: True to list only the slow requests
+        :returns list: List of profiles
+        """
+        with self._lock:
+            profiles = list(self.profiles)
+        return [profile for profile in reversed(profiles) if profile["slow"] or not slow_only]
+
+    def clear(self):
+        """Drops the kept profiles"""
+        with self._lock:
+            self.profiles.clear()
+
+
+def _record_statement(statement, seconds, failed):
+    if has_request_context():
+        profiler = current_app.extensions.get("query_profiler")
+        if profiler is not None:
+            profiler.record(statement, seconds, failed)
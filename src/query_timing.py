@@ -0,0 +1,50 @@
+"""
+This file times the SQL statements of every engine once and passes the timings to the
+metrics and the query profiler. Statements that fail are passed on too, from the
+handle_error hook, so they are counted and their start time doesn't outlive them.
+"""
+
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_listeners = []
+
+
+def add_listener(listener):
+    """
+    Registers a function that is called after every statement, and installs the engine
+    hooks on first use.
+
+    :param function listener: Called with (statement, seconds, failed)
+    """
+    if listener not in _listeners:
+        _listeners.append(listener)
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+
+def _notify(context, statement, failed):
+    # The start time lives on the execution context, which ends with the statement
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        return
+    del context._query_started
+    seconds = time.perf_counter() - started
+    for listener in _listeners:
+        listener(statement, seconds, failed)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()  # pylint: disable=protected-access
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _notify(context, statement, False)
+
+
+def _handle_error(exception_context):
+    _notify(exception_context.execution_context, exception_context.statement, True)
@@ -1,40 +1,106 @@
 """This file contains the database implementation, including all the models and resources, etc."""
 
-from datetime import datetime
+from datetime import datetime, timezone
+import logging
+import base64
+import binascii
+import csv
 import hashlib
+import io
+import json
 import secrets
+import unicodedata
 # import keyring
-import jsonschema.validators
-from jsonschema import validate, ValidationError
-from flask import Flask, request, Response, jsonify
+from jsonschema import Draft7Validator
+from jsonschema.exceptions import best_match
+from flask import Flask, request, Response, jsonify, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_restful import Resource, Api
 from flask_caching import Cache
+from sqlalchemy.dialects.mysql import DATETIME as MYSQL_DATETIME
+from sqlalchemy.exc import IntegrityError
 from werkzeug.routing import BaseConverter
-from werkzeug.exceptions import NotFound, BadRequest, Forbidden
+from werkzeug.exceptions import (
+    NotFound,
+    BadRequest,
+    Conflict,
+    Forbidden,
+    RequestEntityTooLarge,
+    UnsupportedMediaType,
+)
 import mysql.connector
 from flasgger import Swagger
 import pymysql
 import config as cfg
+from src.caching import ApiKeyCache, CacheStats
+from src.db_pool import InstrumentedQueuePool, pool_status
+from src.db_routing import ReplicaRouter, RoutingSession
+from src.json_provider import FastJSONProvider
+from src import logging_config, metrics
+from src.profiler import QueryProfiler
 
 
+logger = logging.getLogger(__name__)
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 app.config["SQLALCHEMY_DATABASE_URI"] = (
     f"mysql+pymysql://{cfg.DB_USERNAME}:{cfg.DB_PASSWORD}"
     f"@{cfg.DB_HOST}/{cfg.DB_NAME}"
 )
-app.config["CACHE_TYPE"] = "FileSystemCache"
-app.config["CACHE_DIR"] = ".cache"
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+    "poolclass": InstrumentedQueuePool,
+    "pool_size": cfg.DB_POOL_SIZE,
+    "max_overflow": cfg.DB_MAX_OVERFLOW,
+    "pool_timeout": cfg.DB_POOL_TIMEOUT,
+    "pool_recycle": cfg.DB_POOL_RECYCLE,
+    "pool_pre_ping": cfg.DB_POOL_PRE_PING,
+}
+app.config["SQLALCHEMY_BINDS"] = {
+    f"replica_{number}": uri for number, uri in enumerate(cfg.DB_REPLICA_URIS)
+}
+app.config["CACHE_TYPE"] = cfg.CACHE_TYPE
+app.config["CACHE_DIR"] = cfg.CACHE_DIR
+app.config["CACHE_REDIS_URL"] = cfg.CACHE_REDIS_URL
+app.config["CACHE_DEFAULT_TIMEOUT"] = cfg.CACHE_DEFAULT_TIMEOUT
+app.config["CACHE_THRESHOLD"] = cfg.CACHE_THRESHOLD
 
 swagger = Swagger(app, template_file='doc/swagger.yaml')
 
 # Initialize database
-db = SQLAlchemy(app)
+db = SQLAlchemy(app, session_options={"class_": RoutingSession})
 api = Api(app)
 cache = Cache(app)
+logging_config.init_app(app)
+metrics.init_app(app)
+profiler = QueryProfiler(
+    enabled=cfg.PROFILER_ENABLED,
+    slow_threshold=cfg.SLOW_REQUEST_THRESHOLD,
+    sample_rate=cfg.PROFILER_SAMPLE_RATE,
+    repeat_threshold=cfg.PROFILER_REPEAT_THRESHOLD,
+    max_profiles=cfg.PROFILER_MAX_PROFILES,
+)
+profiler.init_app(app)
+replica_router = ReplicaRouter(
+    app.config["SQLALCHEMY_BINDS"],
+    window=cfg.READ_YOUR_WRITES_WINDOW,
+    check_interval=cfg.REPLICA_HEALTH_CHECK_INTERVAL,
+)
+replica_router.init_app(app, cache)
+
+
+@api.representation("application/json")
+def output_json(data, code, headers=None):
+    """Serializes the return values of the resources with the app's JSON provider"""
+    response = app.json.response(data)
+    response.status_code = code
+    response.headers.extend(headers or {})
+    return response
+
+api_key_cache = ApiKeyCache(maxsize=cfg.API_KEY_CACHE_SIZE, ttl=cfg.API_KEY_CACHE_TTL)
+response_cache_stats = CacheStats()
 
 
 def create_database():
@@ -46,12 +112,60 @@ def create_database():
     try:
         database_cursor.execute(f"CREATE DATABASE {cfg.DB_NAME}")
     except mysql.connector.errors.DatabaseError as db_error:
-        print(f"{db_error.__class__.__name__}:{db_error}")
-        print("DROPPING EXISTING DB AND RECREATING IT")
+        logger.warning("%s: %s", db_error.__class__.__name__, db_error)
+        logger.warning("Dropping the existing database %s and recreating it", cfg.DB_NAME)
         database_cursor.execute(f"DROP DATABASE {cfg.DB_NAME}")
         database_cursor.execute(f"CREATE DATABASE {cfg.DB_NAME}")
 
 
+def lookup_api_key(key_header):
+    """
+    Resolves an API key to the (user_id, admin) pair it grants. Lookups go through the
+    per-worker api_key_cache before hitting the database.
+
+    :param str key_header: API key as given in the request header
+    :returns tuple/None: (user_id, admin) pair, or None if the key doesn't exist
+    """
+    key_hash = ApiKey.key_hash(key_header.strip())
+    cached = api_key_cache.get(key_hash)
+    if cached is not None:
+        return cached
+
+    db_key = db.session.get(ApiKey, key_hash)
+    if db_key is None:
+        return None
+    api_key_cache.put(key_hash, db_key.user_id, db_key.admin)
+    return db_key.user_id, bool(db_key.admin)
+
+
+def lookup_api_keys(key_headers):
+    """
+    Resolves many API keys like lookup_api_key, with a single query for the keys that
+    aren't cached.
+
+    :param iterable key_headers: API keys as given by the client
+    :returns dict: (user_id, admin) pair of every existing key, by the given key
+    """
+    found = {}
+    missing = {}
+    for key_header in key_headers:
+        key_hash = ApiKey.key_hash(key_header.strip())
+        cached = api_key_cache.get(key_hash)
+        if cached is not None:
+            found[key_header] = cached
+        else:
+            missing.setdefault(key_hash, []).append(key_header)
+    if missing:
+        rows = db.session.execute(
+            db.select(ApiKey.key, ApiKey.user_id, ApiKey.admin).where(ApiKey.key.in_(list(missing)))
+        ).all()
+        for key_hash, user_id, admin in rows:
+            api_key_cache.put(key_hash, user_id, admin)
+            for key_header in missing[key_hash]:
+                found[key_header] = (user_id, bool(admin))
+    return found
+
+
 def require_admin(func):
     """Function make sure user is admin"""
     def wrapper(*args, **kwargs):
@@ -59,10 +173,8 @@ def require_admin(func):
         if not key_header:
             raise Forbidden("Missing admin API key")
 
-        key_hash = ApiKey.key_hash(key_header.strip())
-        db_key = ApiKey.query.filter_by(admin=True).first()
-
-        if db_key is None or not secrets.compare_digest(key_hash, db_key.key):
+        key_info = lookup_api_key(key_header)
+        if key_info is None or not key_info[1]:
             raise Forbidden("Invalid admin API key")
 
         return func(*args, **kwargs)
@@ -77,10 +189,8 @@ def require_user_key(func):
         if not key_header:
             raise Forbidden("Missing API key")
 
-        key_hash = ApiKey.key_hash(key_header.strip())
-        db_key = ApiKey.query.filter_by(user_id=user.id).first()
-
-        if db_key is None or not secrets.compare_digest(key_hash, db_key.key):
+        key_info = lookup_api_key(key_header)
+        if key_info is None or key_info[0] != user.id:
             raise Forbidden("Invalid API key")
 
         return func(self, user, *args, **kwargs)
@@ -88,6 +198,383 @@ def require_user_key(func):
     return wrapper
 
 
+def parse_page_limit(default, maximum):
+    """
+    Reads the "limit" query parameter of a paged collection.
+
+    :param int default: Page size used when the parameter is missing
+    :param int maximum: Largest page size a client is allowed to ask for
+    :returns int: Page size between 1 and maximum
+    """
+    limit = request.args.get("limit", default)
+    try:
+        limit = int(limit)
+    except ValueError as ex:
+        raise BadRequest(description="limit must be an integer") from ex
+    if limit < 1:
+        raise BadRequest(description="limit must be a positive integer")
+    return min(limit, maximum)
+
+
+def encode_cursor(time, row_id):
+    """
+    Encodes the (time, id) keyset position of a row into an opaque cursor string.
+
+    :param datetime time: Time of the last row on the page
+    :param int row_id: ID of the last row on the page
+    :returns str: URL-safe cursor
+    """
+    raw = f"{time.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Decodes a cursor created by encode_cursor.
+
+    :param str cursor: Cursor given as query parameter
+    :returns tuple: (time, id) keyset position
+    """
+    try:
+        time, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(time), int(row_id)
+    except (ValueError, binascii.Error) as ex:
+        raise BadRequest(description="Invalid cursor") from ex
+
+
+def encode_id_cursor(row_id):
+    """
+    Encodes the id of the last row of a page ordered by id into an opaque cursor string.
+
+    :param int row_id: ID of the last row on the page
+    :returns str: URL-safe cursor
+    """
+    return base64.urlsafe_b64encode(str(row_id).encode()).decode()
+
+
+def decode_id_cursor(cursor):
+    """
+    Decodes a cursor created by encode_id_cursor.
+
+    :param str cursor: Cursor given as query parameter
+    :returns int: ID of the last row on the previous page
+    """
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, binascii.Error) as ex:
+        raise BadRequest(description="Invalid cursor") from ex
+
+
+def parse_time_arg(name):
+    """
+    Reads an ISO 8601 datetime query parameter.
+
+    :param str name: Name of the query parameter
+    :returns datetime/None: Parsed datetime or None if the parameter is missing
+    """
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError as ex:
+        raise BadRequest(description=f"{name} must be an ISO 8601 datetime") from ex
+
+
+def page_url(resource, cursor_arg, cursor, **values):
+    """
+    Creates the URL of the next page of a collection. Current query parameters are kept so
+    that the filters apply to the next page as well.
+
+    :param Resource resource: Resource class of the collection
+    :param str cursor_arg: Name of the query parameter that holds the cursor
+    :param str cursor: Cursor of the next page
+    :returns str: URL of the next page
+    """
+    args = request.args.to_dict()
+    args[cursor_arg] = cursor
+    return api.url_for(resource, **values, **args)
+
+
+def next_link(resource, cursor, **values):
+    """
+    Creates a Link header value pointing to the next page of a collection.
+
+    :param Resource resource: Resource class of the collection
+    :param str cursor: Cursor of the next page
+    :returns str: Link header value with rel="next"
+    """
+    return f'<{page_url(resource, "cursor", cursor, **values)}>; rel="next"'
+
+
+def event_page(query, keyset, limit):
+    """
+    Fetches one page of events in (time, id) order with a single query. Relationships are
+    never loaded, so serializing the events can't cause further queries.
+
+    :param Query query: Event query, or a query of Event columns that includes Event.id and
+                        Event.time, with the filters applied
+    :param tuple keyset: (time, id) of the last event on the previous page, or None
+    :param int limit: Page size
+    :returns tuple: (events or rows, cursor of the next page or None)
+    """
+    if keyset is not None:
+        cursor_time, cursor_id = keyset
+        query = query.filter(
+            db.or_(
+                Event.time > cursor_time,
+                db.and_(Event.time == cursor_time, Event.id > cursor_id)
+            )
+        )
+    # One extra row tells whether there is a next page
+    query = query.options(db.raiseload("*")).order_by(Event.time, Event.id)
+    events = query.limit(limit + 1).all()
+    if len(events) <= limit:
+        return events, None
+    last = events[limit - 1]
+    return events[:limit], encode_cursor(last.time, last.id)
+
+
+def utcnow():
+    """Returns the current UTC time as a naive datetime, which is how it is stored"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def make_etag(*parts):
+    """
+    Creates a strong entity tag from the values the representation depends on.
+
+    :returns str: Entity tag without quotes
+    """
+    return hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def not_modified(etag, last_modified=None):
+    """
+    Checks the conditional headers of the request. If-None-Match takes precedence,
+    If-Modified-Since is only checked when last_modified is given.
+
+    :param str etag: Current entity tag of the resource
+    :param datetime last_modified: (Optional) Current modification time in UTC
+    :returns Response/None: 304 response if the client's copy is still valid, otherwise None
+    """
+    if request.if_none_match:
+        is_fresh = request.if_none_match.contains(etag)
+    elif last_modified is not None and request.if_modified_since is not None:
+        # HTTP dates only have second precision
+        last_modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+        is_fresh = last_modified <= request.if_modified_since
+    else:
+        is_fresh = False
+    if not is_fresh:
+        return None
+    return set_validators(Response(status=304), etag, last_modified)
+
+
+def set_validators(response, etag, last_modified=None):
+    """
+    Adds the ETag and Last-Modified headers to a response.
+
+    :param Response response: Response to modify
+    :param str etag: Entity tag of the representation
+    :param datetime last_modified: (Optional) Modification time in UTC
+    :returns Response: The same response
+    """
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return response
+
+
+def cached_response(key, etag, build):
+    """
+    Read-through response cache on top of the Flask-Caching backend. The stored entry
+    remembers the ETag it was built for and is rebuilt if that no longer matches, so a stale
+    entry is never served, even from a backend that can't see invalidations made by other
+    workers.
+
+    :param str key: Cache key of the response
+    :param str etag: Current entity tag of the resource
+    :param function build: Function that creates the Response on a miss
+    :returns Response: Cached or freshly built response
+    """
+    entry = cache.get(key)
+    if entry is not None and entry["etag"] == etag:
+        response_cache_stats.hit()
+        return Response(
+            entry["body"], status=200, headers=entry["headers"], mimetype="application/json"
+        )
+
+    response_cache_stats.miss()
+    response = build()
+    headers = {
+        name: value for name, value in response.headers.items()
+        if name not in ("Content-Type", "Content-Length")
+    }
+    cache.set(key, {"etag": etag, "body": response.get_data(), "headers": headers})
+    return response
+
+
+def event_cache_key(event_id):
+    """Cache key of an EventItem response"""
+    return f"event/{event_id}"
+
+
+def user_events_cache_key(user_id):
+    """
+    Cache key of the generation of a user's UserEvents pages. Deleting it invalidates
+    every page of the user.
+    """
+    return f"user_events/{user_id}"
+
+
+def user_events_page_cache_key(user_id):
+    """Cache key of a UserEvents page of the user"""
+    generation = cache.get(user_events_cache_key(user_id))
+    if generation is None:
+        generation = secrets.token_hex(8)
+        cache.set(user_events_cache_key(user_id), generation, timeout=0)
+    query_hash = hashlib.sha1(request.query_string).hexdigest()
+    return f"user_events/{user_id}/{generation}/{query_hash}"
+
+
+def event_pages_cache_key():
+    """
+    Cache key of an EventCollection page. Pages are keyed under a generation that is
+    replaced whenever any event changes, since a change can move events between pages.
+    """
+    generation = cache.get("events/generation")
+    if generation is None:
+        generation = secrets.token_hex(8)
+        cache.set("events/generation", generation, timeout=0)
+    query_hash = hashlib.sha1(request.query_string).hexdigest()
+    return f"events/{generation}/{query_hash}"
+
+
+def invalidate_events(event_ids=(), user_ids=(), events_created=False):
+    """
+    Drops the cached responses affected by a write: the given events, every
+    EventCollection page, and the UserEvents of the given users as well as of every
+    participant of the given events.
+
+    :param iterable event_ids: IDs of the created, modified or deleted events
+    :param iterable user_ids: IDs of the users whose UserEvents changed
+    :param bool events_created: True if events were created without listing their IDs,
+                                which only invalidates the EventCollection pages
+    """
+    event_ids = set(event_ids)
+    user_ids = set(user_ids)
+    if event_ids:
+        user_ids.update(
+            db.session.execute(
+                db.select(event_participants.c.user_id).where(
+                    event_participants.c.event_id.in_(event_ids)
+                )
+            ).scalars()
+        )
+    pages_changed = bool(event_ids) or events_created
+    if pages_changed:
+        cache.set("events/generation", secrets.token_hex(8), timeout=0)
+    keys = [event_cache_key(event_id) for event_id in event_ids]
+    keys += [user_events_cache_key(user_id) for user_id in user_ids]
+    if keys:
+        cache.delete_many(*keys)
+    response_cache_stats.invalidated(len(keys) + (1 if pages_changed else 0))
+
+
+# Microsecond precision on MySQL, so that two writes within a second get distinct versions
+PreciseDateTime = db.DateTime().with_variant(MYSQL_DATETIME(fsp=6), "mysql")
+
+
+def slug_base(name):
+    """
+    Creates the preferred URL key for a name. The name is kept as-is so that existing URLs
+    built from names keep working, only characters that can't appear in a path segment are
+    replaced.
+
+    :param str name: Name of the user or event
+    :returns str: Preferred slug
+    """
+    return name.strip().replace("/", "-")
+
+
+def slug_compare_key(slug):
+    """
+    Normalizes a slug the way MySQL's default utf8mb4_0900_ai_ci collation compares them,
+    i.e. case and accent insensitively.
+
+    :param str slug: Slug to normalize
+    :returns str: Normalized slug
+    """
+    decomposed = unicodedata.normalize("NFKD", slug)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+# Path segments that the API itself uses next to event slugs, /api/users/<user>/events/bulk/.
+# No route has a fixed segment next to a user slug, so users have no reserved slugs.
+EVENT_RESERVED_SLUGS = ("bulk",)
+
+
+class SlugAllocator:
+    """
+    Allocates unique slugs for names. A name gets its slug_base if that is free, otherwise
+    a numeric suffix is added ("Name-2", "Name-3", ...). Each round checks all candidates of
+    a batch with one query, so a batch costs only a few queries. Slugs handed out by the
+    same allocator are never reused, even before their rows have been written, and the
+    reserved slugs are never handed out.
+    """
+
+    def __init__(self, table, reserved=()):
+        """
+        :param Table table: Table that has the id and slug columns
+        :param tuple reserved: Slugs that clash with the routes, e.g. EVENT_RESERVED_SLUGS
+        """
+        self.table = table
+        self._next_suffix = {}
+        self._reserved = {slug_compare_key(slug) for slug in reserved}
+
+    def _candidate(self, name):
+        base = slug_base(name)
+        base_key = slug_compare_key(base)
+        suffix = self._next_suffix.get(base_key, 1)
+        while True:
+            candidate = base if suffix == 1 else f"{base}-{suffix}"
+            suffix += 1
+            if slug_compare_key(candidate) not in self._reserved:
+                break
+        self._next_suffix[base_key] = suffix
+        self._reserved.add(slug_compare_key(candidate))
+        return candidate
+
+    def allocate(self, connection, names, exclude_id=None):
+        """
+        Allocates unique slugs for a batch of names.
+
+        :param Connection connection: Database connection used for the lookups
+        :param list names: Names to allocate slugs for
+        :param int exclude_id: (Optional) ID of a row whose own slug doesn't count as taken
+        :returns list: Slugs in the same order as the names
+        """
+        slugs = [None] * len(names)
+        pending = list(range(len(names)))
+        while pending:
+            candidates = {index: self._candidate(names[index]) for index in pending}
+            query = db.select(self.table.c.slug).where(
+                self.table.c.slug.in_(set(candidates.values()))
+            )
+            if exclude_id is not None:
+                query = query.where(self.table.c.id != exclude_id)
+            taken = {slug_compare_key(slug) for slug in connection.execute(query).scalars()}
+
+            pending = []
+            for index, candidate in candidates.items():
+                if slug_compare_key(candidate) in taken:
+                    pending.append(index)
+                else:
+                    slugs[index] = candidate
+        return slugs
+
+
 event_participants = db.Table(
     "event_participants",
     db.Column("user_id", db.Integer, db.ForeignKey("user.id"), primary_key=True),
@@ -109,23 +596,50 @@ class ApiKey(db.Model):
         return hashlib.sha256(key.encode()).digest()
 
 
+@db.event.listens_for(ApiKey, "after_update")
+@db.event.listens_for(ApiKey, "after_delete")
+def _drop_cached_api_key(mapper, connection, target):
+    """Drops the cached verification result when a key is rotated, reassigned or deleted"""
+    key_history = db.inspect(target).attrs.key.history
+    for key_hash in (target.key, *key_history.deleted):
+        api_key_cache.invalidate_key(key_hash)
+
+
 class Event(db.Model):
     """
     Model for the Events.
     Mandatory attributes are name, location, time and organizer.
     Optional parameters are description, category and tags
+    slug is the unique URL key of the event and is assigned automatically from the name.
+    updated_at is maintained automatically and versions the event for conditional requests.
+    places_updated_at is set by the sign-ups instead, which don't change the listings.
     """
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(128), nullable=False)
+    slug = db.Column(db.String(160), nullable=False, unique=True)
     location = db.Column(db.String(128), nullable=False)
     time = db.Column(db.DateTime, nullable=False)
-    organizer = db.Column(db.Integer, db.ForeignKey("user.id"))
+    organizer = db.Column(db.Integer, db.ForeignKey("user.id"), index=True)
     description = db.Column(db.String(2048))
     category = db.Column(db.JSON)
     tags = db.Column(db.JSON)
+    # Maximum number of participants, None for no limit
+    capacity = db.Column(db.Integer, nullable=True)
+    # Maintained by reserve_places and release_places so that it's never counted from rows
+    participant_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    updated_at = db.Column(PreciseDateTime, nullable=False, default=utcnow, onupdate=utcnow)
+    # Time of the last change of participant_count, None if there wasn't any
+    places_updated_at = db.Column(PreciseDateTime, nullable=True)
 
     users = db.relationship("User", secondary=event_participants, back_populates="attended_events")
 
+    # Keyset pagination of EventCollection walks the events in (time, id) order, and the
+    # validators of the listings read MAX(updated_at) from the index instead of the rows
+    __table_args__ = (
+        db.Index("ix_event_time_id", "time", "id"),
+        db.Index("ix_event_updated_at", "updated_at"),
+    )
+
     def serialize(self, short_form=False):
         """
         Creates a dictionary of Event's attributes.
@@ -143,6 +657,8 @@ class Event(db.Model):
             serialized["description"] = self.description
             serialized["category"] = self.category
             serialized["tags"] = self.tags
+            serialized["capacity"] = self.capacity
+            serialized["participant_count"] = self.participant_count
         return serialized
 
     def deserialize(self, serialized_data):
@@ -159,6 +675,9 @@ class Event(db.Model):
         self.description = serialized_data.get("description")
         self.category = serialized_data.get("category")
         self.tags = serialized_data.get("tags")
+        # The capacity is kept if it's missing, null removes the limit
+        if "capacity" in serialized_data:
+            self.capacity = serialized_data["capacity"]
 
     @staticmethod
     def json_schema():
@@ -172,33 +691,220 @@ class Event(db.Model):
             "required": ["name", "location", "time"]
         }
         properties = schema["properties"] = {}
-        properties["name"] = {"description": "Name of the event", "type": "string"}
+        properties["name"] = {
+            "description": "Name of the event",
+            "type": "string",
+            "maxLength": 128
+        }
         properties["location"] = {
             "description": "Location of the event",
-            "type": "string"
+            "type": "string",
+            "maxLength": 128
         }
         properties["time"] = {
             "description": "Time of the event",
             "type": "string",
             "format": "date-time"
         }
-        # properties["organizer"] = {
-        #     "description": "ID of the user who is organizing the event",
-        #     "type": "integer",
-        #     "minimum": 0
-        # }
+        # Optional parameters, null is accepted since serialize() returns None for them
+        properties["organizer"] = {
+            "description": "ID of the user who is organizing the event",
+            "type": ["integer", "null"],
+            "minimum": 0
+        }
+        properties["description"] = {
+            "description": "Description of the event",
+            "type": ["string", "null"],
+            "maxLength": 2048
+        }
+        properties["category"] = {
+            "description": "Categories of the event",
+            "type": ["array", "null"],
+            "items": {"type": "string"}
+        }
+        properties["tags"] = {
+            "description": "Tags of the event",
+            "type": ["array", "null"],
+            "items": {"type": "string"}
+        }
+        properties["capacity"] = {
+            "description": "Maximum number of participants, null for no limit",
+            "type": ["integer", "null"],
+            "minimum": 0
+        }
         return schema
 
 
+def reserve_places(event_id, places=1):
+    """
+    Adds places to the participant_count of an event unless that would exceed its capacity.
+    The guarded UPDATE locks the event row until the transaction ends, so sign-ups through
+    any worker wait for each other and can't overbook the event. Call it before inserting
+    the participations, so that every sign-up locks the event row first. updated_at is left
+    alone, so the validators of the collections listing the event stay the same.
+
+    :param int event_id: ID of the event
+    :param int places: Number of participants to add
+    :returns bool: True if the places were reserved, False if the event is full
+    """
+    table = Event.__table__
+    result = db.session.execute(
+        db.update(table)
+        .where(
+            table.c.id == event_id,
+            db.or_(
+                table.c.capacity.is_(None),
+                table.c.participant_count + places <= table.c.capacity,
+            ),
+        )
+        .values(
+            participant_count=table.c.participant_count + places,
+            places_updated_at=utcnow(),
+            # Overrides the onupdate of the column, which Core UPDATEs apply as well
+            updated_at=table.c.updated_at,
+        )
+    )
+    return result.rowcount == 1
+
+
+def lock_event(event_id):
+    """
+    Locks the event row until the transaction ends, like reserve_places does for single
+    sign-ups, so the participants and the count can't change in between.
+
+    :param int event_id: ID of the event
+    :returns tuple: (capacity, participant_count) of the event
+    """
+    return db.session.execute(
+        db.select(Event.capacity, Event.participant_count)
+        .where(Event.id == event_id)
+        .with_for_update()
+    ).one()
+
+
+def release_places(event_id, places=1):
+    """
+    Subtracts places from the participant_count of an event, see reserve_places.
+
+    :param int event_id: ID of the event
+    :param int places: Number of participants removed
+    """
+    table = Event.__table__
+    db.session.execute(
+        db.update(table)
+        .where(table.c.id == event_id)
+        .values(
+            participant_count=table.c.participant_count - places,
+            places_updated_at=utcnow(),
+            # Overrides the onupdate of the column, which Core UPDATEs apply as well
+            updated_at=table.c.updated_at,
+        )
+    )
+
+
+def participant_recount(events=None, participants=None):
+    """
+    Creates an UPDATE that sets the participant_count of the events to the number of their
+    participations, for participations that were inserted without reserve_places.
+
+    :param Table events: Events table, Event.__table__ by default
+    :param Table participants: Participations table, event_participants by default
+    :returns Update: UPDATE of every event, restrict it with .where()
+    """
+    events = Event.__table__ if events is None else events
+    participants = event_participants if participants is None else participants
+    count = (
+        db.select(db.func.count())
+        .select_from(participants)
+        .where(participants.c.event_id == events.c.id)
+        .scalar_subquery()
+    )
+    return db.update(events).values(participant_count=count)
+
+
+# Columns of Event.serialize(), collections select them instead of loading Event objects.
+# capacity and participant_count are left to EventItem, whose validators include
+# places_updated_at. The collections are versioned by updated_at only, so sign-ups don't
+# change their ETags or invalidate their cached pages.
+EVENT_COLUMNS = (
+    Event.name,
+    Event.location,
+    Event.time,
+    Event.organizer,
+    Event.description,
+    Event.category,
+    Event.tags,
+)
+# Fields of Event.serialize(short_form=True)
+EVENT_SHORT_FIELDS = ("name", "location", "time")
+
+
+def parse_fields(columns, short_fields):
+    """
+    Reads the "fields" query parameter of a collection, a comma separated list of the
+    fields to return. "fields=short" selects the short form of serialize().
+
+    :param tuple columns: Columns of the full representation, in output order
+    :param tuple short_fields: Fields of the short representation
+    :returns tuple: Selected columns in output order, all of them if fields is missing
+    """
+    value = request.args.get("fields")
+    if value is None:
+        return columns
+    available = [column.key for column in columns]
+    if value == "short":
+        fields = set(short_fields)
+    else:
+        fields = {field.strip() for field in value.split(",") if field.strip()}
+        unknown = fields.difference(available)
+        if unknown or not fields:
+            raise BadRequest(
+                description=f"fields must be \"short\" or a list of {', '.join(available)}"
+            )
+    return tuple(column for column in columns if column.key in fields)
+
+
+def event_rows_query(columns=EVENT_COLUMNS):
+    """
+    Creates a query of the keyset columns Event.id and Event.time followed by the given
+    columns. event_page accepts it, and the rows are plain tuples that don't go through
+    the identity map.
+
+    :param tuple columns: Columns to return, EVENT_COLUMNS or a subset
+    :returns Query: Query of event rows
+    """
+    return db.session.query(Event.id, Event.time, *columns)
+
+
+def serialize_event_rows(rows, columns=EVENT_COLUMNS):
+    """
+    Creates the same dictionaries as Event.serialize() from rows of event_rows_query.
+    The times are left as datetimes for the JSON provider. Building the dictionaries in C
+    with dict(zip()) and encoding them with one orjson call is faster than encoding the rows
+    field by field or through the provider's Row fallback.
+
+    :param list rows: Rows of event_rows_query
+    :param tuple columns: Columns that the rows were queried with
+    :returns list: Serialized events
+    """
+    keys = [column.key for column in columns]
+    return [dict(zip(keys, row[2:])) for row in rows]
+
+
 class User(db.Model):
     """
     Model for a user.
     Mandatory attributes are name and email, optional parameter is phone_number.
+    slug is the unique URL key of the user and is assigned automatically from the name.
+    updated_at is maintained automatically and versions the user for conditional requests.
     """
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(128), nullable=False)
+    slug = db.Column(db.String(160), nullable=False, unique=True)
     email = db.Column(db.String(128), nullable=False)
     phone_number = db.Column(db.String(128), nullable=True)
+    # Also bumped when the user joins or leaves an event, see EventParticipants
+    updated_at = db.Column(PreciseDateTime, nullable=False, default=utcnow, onupdate=utcnow)
 
     attended_events = db.relationship(
         "Event", secondary=event_participants, back_populates="users"
@@ -238,29 +944,107 @@ class User(db.Model):
         """
         schema = {"type": "object", "required": ["name", "email"]}
         properties = schema["properties"] = {}
-        properties["name"] = {"description": "Name of the user", "type": "string"}
-        properties["email"] = {"description": "Email of the user", "type": "string"}
+        properties["name"] = {
+            "description": "Name of the user",
+            "type": "string",
+            "maxLength": 128
+        }
+        properties["email"] = {
+            "description": "Email of the user",
+            "type": "string",
+            "maxLength": 128
+        }
+        # Optional parameter
+        properties["phone_number"] = {
+            "description": "Phone number of the user",
+            "type": ["string", "null"],
+            "maxLength": 128
+        }
         return schema
 
 
+def build_validator(schema):
+    """
+    Checks the schema and builds a reusable validator for it.
+
+    :param dict schema: JSON schema
+    :returns Draft7Validator validator: Validator that also checks the formats in the schema
+    """
+    Draft7Validator.check_schema(schema)
+    return Draft7Validator(schema, format_checker=Draft7Validator.FORMAT_CHECKER)
+
+
+# Built once at import, jsonschema.validate() would check and compile the schema on every request
+USER_VALIDATOR = build_validator(User.json_schema())
+EVENT_VALIDATOR = build_validator(Event.json_schema())
+
+
+def validate_payload(validator, contents):
+    """
+    Validates a request body.
+
+    :param Draft7Validator validator: USER_VALIDATOR or EVENT_VALIDATOR
+    :param contents: Deserialized request body
+    :raises BadRequest: If the body is not valid, with the most relevant error as description
+    """
+    error = best_match(validator.iter_errors(contents))
+    if error is not None:
+        raise BadRequest(description=str(error))
+
+
+# Columns of User.serialize() and the fields of User.serialize(short_form=True)
+USER_COLUMNS = (User.name, User.email, User.phone_number)
+USER_SHORT_FIELDS = ("name", "email")
+
+
+@db.event.listens_for(User, "before_insert")
+@db.event.listens_for(User, "before_update")
+@db.event.listens_for(Event, "before_insert")
+@db.event.listens_for(Event, "before_update")
+def _assign_slug(mapper, connection, target):
+    """Allocates a new slug for rows that are created or renamed"""
+    state = db.inspect(target)
+    if target.slug is not None and state.attrs.slug.history.added:
+        # Slug was given explicitly
+        return
+    if target.slug is not None and not state.attrs.name.history.has_changes():
+        return
+    # The allocator is shared within a flush so that rows added together get distinct slugs
+    allocators = db.object_session(target).info.setdefault("slug_allocators", {})
+    if mapper.local_table.name not in allocators:
+        reserved = EVENT_RESERVED_SLUGS if mapper.class_ is Event else ()
+        allocators[mapper.local_table.name] = SlugAllocator(mapper.local_table, reserved)
+    allocator = allocators[mapper.local_table.name]
+    target.slug = allocator.allocate(connection, [target.name], exclude_id=target.id)[0]
+
+
+@db.event.listens_for(db.session, "after_flush")
+def _reset_slug_allocators(session, flush_context):
+    session.info.pop("slug_allocators", None)
+
+
 # User-related resources
 class UserItem(Resource):
     """
     A flask-restful Resource that contains GET, PUT and DELETE HTTP methods for an individual user.
     """
 
-    #@cache.cached(forced_update=True)
     @require_user_key
     def get(self, user):
         """
         Handles the GET HTTP method. Gets information about the user.
 
         :param User user: User object
-        :returns Response: Response object containing
+        :returns Response: Response object containing the user, or 304 if the client's
+                           copy is up to date
         """
+        etag = make_etag("user", user.id, user.updated_at.isoformat())
+        not_modified_response = not_modified(etag, user.updated_at)
+        if not_modified_response is not None:
+            return not_modified_response
         response = jsonify(user.serialize())
         response.status_code = 200
-        return response
+        return set_validators(response, etag, user.updated_at)
 
     @require_user_key
     def put(self, user):
@@ -271,16 +1055,11 @@ class UserItem(Resource):
         :returns Response: Response object containing different statuses depending on success.
         """
         contents = request.json
-        try:
-            validate(
-                instance=contents,
-                schema=User.json_schema(),
-                format_checker=jsonschema.validators.Draft7Validator.FORMAT_CHECKER
-            )
-        except ValidationError as ex:
-            raise BadRequest(description=str(ex))
+        validate_payload(USER_VALIDATOR, contents)
         user.deserialize(contents)
         db.session.commit()
+        # UserEvents contains the user's name
+        invalidate_events(user_ids=[user.id])
         url = api.url_for(UserItem, user=user)
         headers = {"location": url}
         return Response(status=201, headers=headers)
@@ -295,12 +1074,22 @@ class UserItem(Resource):
         :param User user: User object
         :return Response: Response object with status 204 if successful
         """
+        api_key_cache.invalidate_user(user.id)
         # Check if user is an organizer of events, and if yes, delete the events first.
         events_organized_by_user = Event.query.filter_by(organizer=user.id).all()
+        attended_event_ids = db.session.execute(
+            db.select(event_participants.c.event_id).where(event_participants.c.user_id == user.id)
+        ).scalars().all()
+        # Participants are looked up before the events and their participations are gone
+        invalidate_events(
+            [event.id for event in events_organized_by_user] + attended_event_ids, [user.id]
+        )
         if events_organized_by_user:
             for event in events_organized_by_user:
                 db.session.delete(event)
             db.session.commit()
+        for event_id in attended_event_ids:
+            release_places(event_id)
         db.session.delete(user)
         db.session.commit()
         return Response(status=204)
@@ -311,19 +1100,30 @@ class UserCollection(Resource):
     A flask-restful Resource that contains GET and POST HTTP methods for all the users.
     """
 
-    #@cache.cached(forced_update=True)
     @require_admin
     def get(self):
         """
-        Handles the GET HTTP method. Gets information about all the users.
+        Handles the GET HTTP method. Gets one page of users ordered by id.
+        Supported query parameters are limit, cursor and fields.
+        If there are more users, the Link header contains the URL of the next page.
 
-        :returns List: List of serialized users
+        :returns Response: Response containing a list of serialized users
         """
-        users = User.query.all()
-        serialized_users = [user.serialize() for user in users]
-        response = jsonify(serialized_users)
-        response.status_code = 200
-        return serialized_users
+        limit = parse_page_limit(cfg.USERS_PAGE_SIZE, cfg.USERS_MAX_PAGE_SIZE)
+        cursor = request.args.get("cursor")
+        columns = parse_fields(USER_COLUMNS, USER_SHORT_FIELDS)
+        keys = [column.key for column in columns]
+
+        query = db.select(User.id, *columns).order_by(User.id)
+        if cursor:
+            query = query.where(User.id > decode_id_cursor(cursor))
+        # One extra row tells whether there is a next page
+        rows = db.session.execute(query.limit(limit + 1)).all()
+        response = jsonify([dict(zip(keys, row[1:])) for row in rows[:limit]])
+        if len(rows) > limit:
+            next_cursor = encode_id_cursor(rows[limit - 1].id)
+            response.headers["Link"] = next_link(UserCollection, next_cursor)
+        return response
 
     def post(self):
         """
@@ -332,14 +1132,7 @@ class UserCollection(Resource):
         :returns response: Response with the dictionary containing the values for created user.
         """
         contents = request.json
-        try:
-            validate(
-                instance=contents,
-                schema=User.json_schema(),
-                format_checker=jsonschema.validators.Draft7Validator.FORMAT_CHECKER,
-            )
-        except ValidationError as ex:
-            raise BadRequest(description=str(ex))
+        validate_payload(USER_VALIDATOR, contents)
         user = User()
         user.deserialize(contents)
         db.session.add(user)
@@ -357,10 +1150,6 @@ class UserCollection(Resource):
         # response.headers = headers
         return Response(status=201, headers=headers)
 
-    def _clear_cache(self):
-        collection_path = api.url_for(UserCollection)
-        cache.delete_many((collection_path, request.path))
-
 
 class UserEvents(Resource):
     """
@@ -368,29 +1157,90 @@ class UserEvents(Resource):
     or organized.
     """
 
-    #@cache.cached(forced_update=True)
     @require_user_key
     def get(self, user):
         """
         Handles the GET HTTP method. Gets information about the events
-        user has attended and/or organized.
+        user has attended and/or organized. Both lists are paged separately in time order,
+        limit sets the page size and attended_cursor and organized_cursor select the pages.
+        event_infos contains the URLs of the next pages in attended_next and organized_next.
+        fields selects the returned event fields.
 
-        :returns Response: Response containing the events user has organized or attended.
+        :returns Response: Response containing the events user has organized or attended,
+                           or 304 if the client's copy is up to date.
         """
-        events_organized_by_user = Event.query.filter_by(organizer=user.id).all()
-        attended_events_json = []
-        for event in user.attended_events:
-            attended_events_json.append(event.serialize())
+        limit = parse_page_limit(cfg.EVENTS_PAGE_SIZE, cfg.EVENTS_MAX_PAGE_SIZE)
+        attended_cursor = request.args.get("attended_cursor")
+        attended_keyset = decode_cursor(attended_cursor) if attended_cursor else None
+        organized_cursor = request.args.get("organized_cursor")
+        organized_keyset = decode_cursor(organized_cursor) if organized_cursor else None
+        columns = parse_fields(EVENT_COLUMNS, EVENT_SHORT_FIELDS)
+
+        # Versioned by the user (renames, joins and leaves) and an aggregate of the events
+        attended_event_ids = db.select(event_participants.c.event_id).where(
+            event_participants.c.user_id == user.id
+        )
+        event_count, events_updated_at = db.session.execute(
+            db.select(db.func.count(Event.id), db.func.max(Event.updated_at)).where(
+                db.or_(Event.organizer == user.id, Event.id.in_(attended_event_ids))
+            )
+        ).one()
+        etag = make_etag(
+            "user_events", user.id, user.updated_at.isoformat(), event_count, events_updated_at,
+            request.query_string
+        )
+        not_modified_response = not_modified(etag)
+        if not_modified_response is not None:
+            return not_modified_response
+        response = cached_response(
+            user_events_page_cache_key(user.id),
+            etag,
+            lambda: self.build_response(
+                user, attended_keyset, organized_keyset, limit, columns
+            )
+        )
+        return set_validators(response, etag)
 
-        organized_events_json = []
-        for event in events_organized_by_user:
-            organized_events_json.append(event.serialize())
+    @staticmethod
+    def build_response(user, attended_keyset, organized_keyset, limit, columns=EVENT_COLUMNS):
+        """
+        Creates the UserEvents response of a user with two queries, one per list.
+
+        :param User user: User object
+        :param tuple attended_keyset: Keyset of the attended events page, or None
+        :param tuple organized_keyset: Keyset of the organized events page, or None
+        :param int limit: Page size of both lists
+        :param tuple columns: Event columns to return
+        :returns Response: Response containing the events user has organized or attended.
+        """
+        attended_events, attended_next = event_page(
+            event_rows_query(columns)
+            .join(event_participants, event_participants.c.event_id == Event.id)
+            .filter(event_participants.c.user_id == user.id),
+            attended_keyset,
+            limit
+        )
+        organized_events, organized_next = event_page(
+            event_rows_query(columns).filter(Event.organizer == user.id),
+            organized_keyset,
+            limit
+        )
 
         # Serialize response
         event_infos = {
-            "attended_events": attended_events_json,
-            "organized_events": organized_events_json,
+            "attended_events": serialize_event_rows(attended_events, columns),
+            "organized_events": serialize_event_rows(organized_events, columns),
+            "attended_next": None,
+            "organized_next": None,
         }
+        if attended_next is not None:
+            event_infos["attended_next"] = page_url(
+                UserEvents, "attended_cursor", attended_next, user=user
+            )
+        if organized_next is not None:
+            event_infos["organized_next"] = page_url(
+                UserEvents, "organized_cursor", organized_next, user=user
+            )
         # Generate URL
         url = api.url_for(UserEvents, user=user)
 
@@ -409,14 +1259,7 @@ class UserEvents(Resource):
         """
         contents = request.json
         # Validation
-        try:
-            validate(
-                instance=contents,
-                schema=Event.json_schema(),
-                format_checker=jsonschema.validators.Draft7Validator.FORMAT_CHECKER,
-            )
-        except ValidationError as ex:
-            raise BadRequest(description=str(ex))
+        validate_payload(EVENT_VALIDATOR, contents)
 
         # Check that event is not created in the past
         event_time = datetime.fromisoformat(contents["time"])
@@ -435,6 +1278,7 @@ class UserEvents(Resource):
         e.organizer = user.id
         db.session.add(e)
         db.session.commit()
+        invalidate_events([e.id], [user.id])
 
         # Return the response with the location header
         url = api.url_for(EventItem, event=e)
@@ -444,9 +1288,155 @@ class UserEvents(Resource):
         # response.headers["location"] = url
         return Response(status=201, headers={"location": url})
 
-    def _clear_cache(self):
-        collection_path = api.url_for(UserEvents)
-        cache.delete_many((collection_path, request.path))
+
+class UserEventsBulk(Resource):
+    """
+    A flask-restful Resource that contains a POST HTTP method for creating many events of
+    a user at once. The body is either a JSON array of events or NDJSON, one event per line.
+    """
+
+    NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+    @require_user_key
+    def post(self, user):
+        """
+        Handles the POST HTTP method. Validates every event of the body and inserts the valid
+        ones with multi-row INSERT statements. Events are committed in chunks of
+        BULK_EVENTS_CHUNK_SIZE, so a failing chunk doesn't undo the chunks before it.
+        A JSON array of more than BULK_EVENTS_MAX_ITEMS events is rejected before anything
+        is inserted. NDJSON is read as it streams in, so the lines past the limit are
+        reported with 413 instead.
+
+        :param User user: User object, the organizer of the events
+        :returns Response: Report with the status of every item, 201 if every event was
+                           created and 207 otherwise
+        """
+        allocator = SlugAllocator(Event.__table__, EVENT_RESERVED_SLUGS)
+        now = utcnow()
+        items = []
+        chunk = []
+        for index, contents, error in self.read_items():
+            if index >= cfg.BULK_EVENTS_MAX_ITEMS:
+                items.append({"index": index, "status": 413, "error": self.too_many_message()})
+                continue
+            if error is None:
+                row, error = self.event_row(contents, user, now)
+            if error is not None:
+                items.append({"index": index, "status": 400, "error": error})
+                continue
+            chunk.append((index, row))
+            if len(chunk) == cfg.BULK_EVENTS_CHUNK_SIZE:
+                items += self.insert_chunk(chunk, allocator)
+                chunk = []
+        if chunk:
+            items += self.insert_chunk(chunk, allocator)
+        if not items:
+            raise BadRequest(description="The request doesn't contain any events")
+
+        items.sort(key=lambda item: item["index"])
+        created = sum(1 for item in items if item["status"] == 201)
+        if created:
+            invalidate_events(user_ids=[user.id], events_created=True)
+        response = jsonify({"created": created, "failed": len(items) - created, "items": items})
+        response.status_code = 201 if created == len(items) else 207
+        return response
+
+    def read_items(self):
+        """
+        Reads the events of the request body. NDJSON is parsed line by line from the stream.
+
+        :returns generator: (index, contents, error) tuples, error is None for parsed items
+        """
+        if request.mimetype in self.NDJSON_TYPES:
+            index = 0
+            for line in request.stream:
+                if not line.strip():
+                    continue
+                try:
+                    yield index, app.json.loads(line), None
+                except ValueError as ex:
+                    yield index, None, f"Invalid JSON: {ex}"
+                index += 1
+            return
+
+        if not request.is_json:
+            raise UnsupportedMediaType(
+                description="Send a JSON array or NDJSON (application/x-ndjson)"
+            )
+        contents = request.get_json()
+        if not isinstance(contents, list):
+            raise BadRequest(description="The body must be a JSON array of events")
+        if len(contents) > cfg.BULK_EVENTS_MAX_ITEMS:
+            raise RequestEntityTooLarge(description=self.too_many_message())
+        for index, item in enumerate(contents):
+            yield index, item, None
+
+    @staticmethod
+    def too_many_message():
+        """Returns the error message of events past BULK_EVENTS_MAX_ITEMS"""
+        return f"At most {cfg.BULK_EVENTS_MAX_ITEMS} events can be imported"
+
+    @staticmethod
+    def event_row(contents, user, now):
+        """
+        Validates an event like UserEvents.post does and creates its row.
+
+        :param contents: Deserialized event
+        :param User user: Organizer of the event
+        :param datetime now: Value of updated_at
+        :returns tuple: (row, None) for a valid event, (None, error message) otherwise
+        """
+        error = best_match(EVENT_VALIDATOR.iter_errors(contents))
+        if error is not None:
+            return None, str(error)
+        try:
+            event_time = datetime.fromisoformat(contents["time"])
+        except ValueError as ex:
+            return None, str(ex)
+        current_time = datetime.now(event_time.tzinfo) if event_time.tzinfo else datetime.now()
+        if event_time < current_time:
+            return None, "Event's time cannot be in the past when creating it."
+        row = {
+            "name": contents["name"],
+            "location": contents["location"],
+            "time": event_time,
+            # Request doesn't need to have the organizer value in it, handled here
+            "organizer": user.id,
+            "description": contents.get("description"),
+            "category": contents.get("category"),
+            "tags": contents.get("tags"),
+            "capacity": contents.get("capacity"),
+            "updated_at": now,
+        }
+        return row, None
+
+    @staticmethod
+    def insert_chunk(chunk, allocator):
+        """
+        Inserts and commits a chunk of events. The rows are sent as one executemany, which
+        the driver turns into multi-row INSERT statements.
+
+        :param list chunk: (index, row) pairs of valid events
+        :param SlugAllocator allocator: Allocator shared by the chunks of the request
+        :returns list: Report items of the chunk
+        """
+        slugs = allocator.allocate(db.session.connection(), [row["name"] for _, row in chunk])
+        rows = [{**row, "slug": slug} for (_, row), slug in zip(chunk, slugs)]
+        try:
+            db.session.execute(db.insert(Event.__table__), rows)
+            db.session.commit()
+        except IntegrityError:
+            # Another request took one of the slugs after they were allocated
+            db.session.rollback()
+            return [
+                {"index": index, "status": 409, "error": "Conflicting concurrent write, retry"}
+                for index, _ in chunk
+            ]
+        items = []
+        for (index, _), slug in zip(chunk, slugs):
+            url = api.url_for(EventItem, event=Event(slug=slug))
+            items.append({"index": index, "status": 201, "location": url})
+        return items
 
 
 class UserEventItem(Resource):
@@ -465,19 +1455,23 @@ class UserEventItem(Resource):
         :returns Response: Response containing the event information
         """
         contents = request.json
-        try:
-            validate(
-                instance=contents,
-                schema=Event.json_schema(),
-                format_checker=jsonschema.validators.Draft7Validator.FORMAT_CHECKER,
-            )
-        except ValidationError as ex:
-            raise BadRequest(description=str(ex))
+        validate_payload(EVENT_VALIDATOR, contents)
         if contents["organizer"] != user.id:
             raise ValueError(f"Organizer ID \
             ({contents['organizer']}) doesn't match user id ({user.id})")
+        capacity = contents.get("capacity")
+        if capacity is not None:
+            # Sign-ups wait for the lock, so the count can't grow past the new capacity
+            _, participant_count = lock_event(event.id)
+            if capacity < participant_count:
+                db.session.rollback()
+                raise Conflict(
+                    f"The event already has {participant_count} participants, "
+                    f"more than the capacity {capacity}"
+                )
         event.deserialize(contents)
         db.session.commit()
+        invalidate_events([event.id], [user.id])
         url = api.url_for(EventItem, event=event)
         return Response(response=url, status=200)
 
@@ -489,8 +1483,12 @@ class UserEventItem(Resource):
         :returns Response: Response with status code 204
         """
         if event.organizer != user.id:
-            print(event.serialize(), "\n", user.serialize())
+            logger.warning(
+                "User %s tried to delete event %s organized by user %s",
+                user.id, event.id, event.organizer,
+            )
             raise ValueError(f"Organizer ID ({event.organizer}) doesn't match user id ({user.id})")
+        invalidate_events([event.id], [user.id])
         db.session.delete(event)
         db.session.commit()
         return Response(status=204)
@@ -503,20 +1501,23 @@ class EventItem(Resource):
     for individual events.
     """
 
-    #@cache.cached(forced_update=True)
     def get(self, event):
         """
         Handles the GET HTTP method. Gets information about an individual event.
 
-        :returns Response: Response containing the event information
+        :returns Response: Response containing the event information, or 304 if the
+                           client's copy is up to date
         """
-        response = jsonify(event.serialize())
-        response.status_code = 200
-        return response
-
-    def _clear_cache(self):
-        collection_path = api.url_for(EventItem)
-        cache.delete_many((collection_path, request.path))
+        # Sign-ups change participant_count without touching updated_at
+        last_modified = max(event.updated_at, event.places_updated_at or event.updated_at)
+        etag = make_etag("event", event.id, last_modified.isoformat())
+        not_modified_response = not_modified(etag, last_modified)
+        if not_modified_response is not None:
+            return not_modified_response
+        response = cached_response(
+            event_cache_key(event.id), etag, lambda: jsonify(event.serialize())
+        )
+        return set_validators(response, etag, last_modified)
 
 
 class EventCollection(Resource):
@@ -524,47 +1525,118 @@ class EventCollection(Resource):
     A flask-restful Resource that contains the GET and POST HTTP methods for all events.
     """
 
-    #@cache.cached()
     def get(self):
         """
-        Handles the GET HTTP method. Gets information about all the events.
+        Handles the GET HTTP method. Gets one page of events ordered by time.
+        Supported query parameters are limit, cursor, from, to, location, category, tag and
+        fields.
+        If there are more events, the Link header contains the URL of the next page.
 
-        :returns List: Returns a list of serialized events.
+        :returns Response: Response containing a list of serialized events, or 304 if the
+                           client's copy is up to date.
         """
-        events = Event.query.all()
-        serialized_events = [event.serialize() for event in events]
-        response = jsonify(serialized_events)
+        limit = parse_page_limit(cfg.EVENTS_PAGE_SIZE, cfg.EVENTS_MAX_PAGE_SIZE)
+        filters = self.filters()
+        cursor = request.args.get("cursor")
+        keyset = decode_cursor(cursor) if cursor else None
+        columns = parse_fields(EVENT_COLUMNS, EVENT_SHORT_FIELDS)
+
+        # Any insert, update or delete within the filtered events changes count or max
+        event_count, events_updated_at = db.session.execute(
+            db.select(db.func.count(Event.id), db.func.max(Event.updated_at)).where(*filters)
+        ).one()
+        etag = make_etag("events", event_count, events_updated_at, request.query_string)
+        not_modified_response = not_modified(etag)
+        if not_modified_response is not None:
+            return not_modified_response
+        response = cached_response(
+            event_pages_cache_key(),
+            etag,
+            lambda: self.build_response(filters, keyset, limit, columns)
+        )
+        return set_validators(response, etag)
+
+    @staticmethod
+    def build_response(filters, keyset, limit, columns=EVENT_COLUMNS):
+        """
+        Creates the response for one page of events.
+
+        :param list filters: SQL filters created by EventCollection.filters
+        :param tuple keyset: (time, id) of the last event on the previous page, or None
+        :param int limit: Page size
+        :param tuple columns: Event columns to return
+        :returns Response: Response containing a list of serialized events.
+        """
+        events, next_cursor = event_page(
+            event_rows_query(columns).filter(*filters), keyset, limit
+        )
+        response = jsonify(serialize_event_rows(events, columns))
         response.status_code = 200
+        if next_cursor is not None:
+            response.headers["Link"] = next_link(EventCollection, next_cursor)
         return response
 
-    def _clear_cache(self):
-        collection_path = api.url_for(EventCollection)
-        cache.delete_many((collection_path, request.path))
+    @staticmethod
+    def filters():
+        """
+        Creates the SQL filters from the query parameters of the request.
+
+        :returns list: List of SQLAlchemy filter expressions
+        """
+        filters = []
+        time_from = parse_time_arg("from")
+        if time_from is not None:
+            filters.append(Event.time >= time_from)
+        time_to = parse_time_arg("to")
+        if time_to is not None:
+            filters.append(Event.time < time_to)
+        if "location" in request.args:
+            filters.append(Event.location == request.args["location"])
+        # category and tags are JSON arrays, JSON_CONTAINS matches whole elements only
+        if "category" in request.args:
+            filters.append(
+                db.func.json_contains(Event.category, json.dumps(request.args["category"]))
+            )
+        if "tag" in request.args:
+            filters.append(db.func.json_contains(Event.tags, json.dumps(request.args["tag"])))
+        return filters
 
 
 class EventParticipants(Resource):
     """
-    A flask-restful Resource that handles adding/removing users as event participants
+    A flask-restful Resource that handles adding/removing users as event participants.
+    Participations are inserted and deleted by their primary key, the participant
+    collections of the event and the user are never loaded. The participant_count of the
+    event is updated in the same transaction.
     """
 
     @require_user_key
     def post(self, user, event):
         """
         Adds the user as a participant to the specified event
+
+        :returns Response: Response with status 201, or 409 if the user is already participating
+                           or the event is full
         """
-        # Check if user is already participating
-        if user in event.users:
+        if not reserve_places(event.id):
+            db.session.rollback()
+            raise Conflict("The event is full")
+        # The primary key of event_participants rejects a second participation, the rollback
+        # releases the reserved place
+        try:
+            db.session.execute(
+                db.insert(event_participants).values(user_id=user.id, event_id=event.id)
+            )
+        except IntegrityError:
+            db.session.rollback()
             return Response(status=409)
 
-        event.users.append(user)
+        user.updated_at = utcnow()
         db.session.commit()
 
-        print("Clearing cache for user and event")
-        print("UserEvents:", api.url_for(UserEvents, user=user))
-        print("EventItem:", api.url_for(EventItem, event=event))
-
-        cache.delete(api.url_for(UserEvents, user=user))
-        cache.delete(api.url_for(EventItem, event=event))
+        logger.debug("Clearing the cached events of user %s and event %s", user.id, event.id)
+        cache.delete_many(user_events_cache_key(user.id), event_cache_key(event.id))
+        response_cache_stats.invalidated(2)
 
         return Response(status=201)
 
@@ -572,20 +1644,445 @@ class EventParticipants(Resource):
     def delete(self, user, event):
         """
         Removes the user from the specified event's participants
+
+        :returns Response: Response with status 204, or 404 if the user wasn't participating
         """
-        if user not in event.users:
+        # The event row is locked first like in post, the rollback below restores the count
+        release_places(event.id)
+        result = db.session.execute(
+            db.delete(event_participants).where(
+                event_participants.c.user_id == user.id,
+                event_participants.c.event_id == event.id
+            )
+        )
+        if result.rowcount == 0:
+            db.session.rollback()
             raise NotFound("User is not participating in this event")
 
-        event.users.remove(user)
+        user.updated_at = utcnow()
+        db.session.commit()
+
+        logger.debug("Clearing the cached events of user %s and event %s", user.id, event.id)
+        cache.delete_many(user_events_cache_key(user.id), event_cache_key(event.id))
+        response_cache_stats.invalidated(2)
+
+        return Response(status=204)
+
+
+PARTICIPANTS_BULK_VALIDATOR = build_validator({
+    "type": "object",
+    "required": ["users"],
+    "properties": {
+        "users": {
+            "description": "Slugs of the users, or users with their own API keys",
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "anyOf": [
+                    {"type": "string", "minLength": 1, "maxLength": 160},
+                    {
+                        "type": "object",
+                        "required": ["user", "api_key"],
+                        "properties": {
+                            "user": {"type": "string", "minLength": 1, "maxLength": 160},
+                            "api_key": {"type": "string", "minLength": 1},
+                        },
+                    },
+                ]
+            },
+        }
+    },
+})
+
+
+class EventParticipantsBulk(Resource):
+    """
+    A flask-restful Resource that adds or removes many participants of an event at once,
+    e.g. for group registrations. The body lists the users by their slugs, which requires
+    an admin key, or as {"user": slug, "api_key": key} objects authorized by the key of each
+    user. The participations are inserted or deleted with a single statement.
+    """
+
+    def post(self, event):
+        """
+        Handles the POST HTTP method. Adds the users as participants of the event. The event
+        row is locked for the rest of the transaction, and the remaining places of the event
+        go to the users in the order they are listed.
+
+        :param Event event: Event object
+        :returns Response: Report with the status of every user, 201 if every user was added
+                           and 207 otherwise
+        """
+        items = self.authorize()
+        capacity, participant_count = lock_event(event.id)
+        pending = [item for item in items if "status" not in item]
+        participating = self.participating(event, [item["user_id"] for item in pending])
+        places = None if capacity is None else max(capacity - participant_count, 0)
+        added = []
+        for item in pending:
+            if item["user_id"] in participating:
+                item.update(status=409, error="The user is already participating")
+            elif places is not None and len(added) >= places:
+                item.update(status=409, error="The event is full")
+            else:
+                item["status"] = 201
+                added.append(item["user_id"])
+
+        if added:
+            db.session.execute(
+                db.insert(event_participants).values(
+                    [{"user_id": user_id, "event_id": event.id} for user_id in added]
+                )
+            )
+            # Can't fail, the places were counted while holding the row lock
+            reserve_places(event.id, len(added))
+        self.finish(event, added)
+        return self.report(items, "added", 201)
+
+    def delete(self, event):
+        """
+        Handles the DELETE HTTP method. Removes the users from the participants of the event.
+
+        :param Event event: Event object
+        :returns Response: Report with the status of every user, 200 if every user was removed
+                           and 207 otherwise
+        """
+        items = self.authorize()
+        lock_event(event.id)
+        pending = [item for item in items if "status" not in item]
+        participating = self.participating(event, [item["user_id"] for item in pending])
+        removed = []
+        for item in pending:
+            if item["user_id"] in participating:
+                item["status"] = 204
+                removed.append(item["user_id"])
+            else:
+                item.update(status=404, error="User is not participating in this event")
+
+        if removed:
+            db.session.execute(
+                db.delete(event_participants).where(
+                    event_participants.c.event_id == event.id,
+                    event_participants.c.user_id.in_(removed),
+                )
+            )
+            release_places(event.id, len(removed))
+        self.finish(event, removed)
+        return self.report(items, "removed", 200)
+
+    @staticmethod
+    def authorize():
+        """
+        Validates the body and resolves the listed users and their API keys, both with a
+        single query.
+
+        :returns list: Report item of every listed user. Authorized users have user_id set,
+                       the others have their status and error set.
+        """
+        contents = request.json
+        users = contents.get("users") if isinstance(contents, dict) else None
+        if isinstance(users, list) and len(users) > cfg.BULK_PARTICIPANTS_MAX_ITEMS:
+            raise RequestEntityTooLarge(
+                description=f"At most {cfg.BULK_PARTICIPANTS_MAX_ITEMS} users can be listed"
+            )
+        validate_payload(PARTICIPANTS_BULK_VALIDATOR, contents)
+
+        admin_key = request.headers.get("EMS-Api-Key")
+        if admin_key:
+            key_info = lookup_api_key(admin_key)
+            if key_info is None or not key_info[1]:
+                raise Forbidden("Invalid admin API key")
+        elif all(isinstance(entry, str) for entry in users):
+            raise Forbidden("Missing API key")
+        keys = lookup_api_keys(entry["api_key"] for entry in users if isinstance(entry, dict))
+
+        slugs = [entry if isinstance(entry, str) else entry["user"] for entry in users]
+        rows = db.session.execute(
+            db.select(User.id, User.slug).where(User.slug.in_(set(slugs)))
+        ).all()
+        user_ids = {slug_compare_key(slug): user_id for user_id, slug in rows}
+
+        items = []
+        seen = set()
+        for index, (entry, slug) in enumerate(zip(users, slugs)):
+            item = {"index": index, "user": slug}
+            user_id = user_ids.get(slug_compare_key(slug))
+            key_info = None if isinstance(entry, str) else keys.get(entry["api_key"])
+            if user_id is None:
+                item.update(status=404, error="User not found")
+            elif not admin_key and (key_info is None or key_info[0] != user_id):
+                item.update(status=403, error="Invalid API key")
+            elif user_id in seen:
+                item.update(status=400, error="The user is listed more than once")
+            else:
+                seen.add(user_id)
+                item["user_id"] = user_id
+            items.append(item)
+        return items
+
+    @staticmethod
+    def participating(event, user_ids):
+        """Returns the IDs of the given users that participate in the event"""
+        if not user_ids:
+            return set()
+        return set(
+            db.session.execute(
+                db.select(event_participants.c.user_id).where(
+                    event_participants.c.event_id == event.id,
+                    event_participants.c.user_id.in_(user_ids),
+                )
+            ).scalars()
+        )
+
+    @staticmethod
+    def finish(event, user_ids):
+        """
+        Bumps the versions of the changed users, commits and drops their cached responses.
+
+        :param Event event: Event object
+        :param list user_ids: IDs of the users that were added or removed
+        """
+        if user_ids:
+            db.session.execute(
+                db.update(User.__table__)
+                .where(User.__table__.c.id.in_(user_ids))
+                .values(updated_at=utcnow())
+            )
         db.session.commit()
+        if user_ids:
+            keys = [event_cache_key(event.id)]
+            keys += [user_events_cache_key(user_id) for user_id in user_ids]
+            cache.delete_many(*keys)
+            response_cache_stats.invalidated(len(keys))
+
+    @staticmethod
+    def report(items, done_key, done_status):
+        """
+        Creates the response of a batch.
+
+        :param list items: Report items
+        :param str done_key: Name of the count of the successful items
+        :param int done_status: Status code if every item succeeded
+        :returns Response: Report, with status 207 if some of the items failed
+        """
+        succeeded = 0
+        for item in items:
+            item.pop("user_id", None)
+            if item["status"] < 300:
+                succeeded += 1
+        response = jsonify(
+            {done_key: succeeded, "failed": len(items) - succeeded, "items": items}
+        )
+        response.status_code = done_status if succeeded == len(items) else 207
+        return response
+
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def csv_value(value):
+    """Converts a column value to a CSV field, JSON columns are written as JSON"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+def export_response(query, filename):
+    """
+    Creates a response that streams the rows of a query as NDJSON or CSV, chosen with the
+    format query parameter. The rows are read with a server-side cursor (PyMySQL's SSCursor)
+    EXPORT_BATCH_SIZE rows at a time and written out batch by batch, so memory use doesn't
+    depend on the size of the table.
+
+    :param Select query: Query that selects the exported columns
+    :param str filename: Name of the downloaded file without extension
+    :returns Response: Streaming response
+    """
+    export_format = request.args.get("format", "ndjson")
+    if export_format not in EXPORT_FORMATS:
+        raise BadRequest(description=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+
+    def generate():
+        result = db.session.execute(
+            query.execution_options(stream_results=True, yield_per=cfg.EXPORT_BATCH_SIZE)
+        )
+        columns = list(result.keys())
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        if export_format == "csv":
+            writer.writerow(columns)
+        for rows in result.partitions():
+            for row in rows:
+                if export_format == "csv":
+                    writer.writerow([csv_value(value) for value in row])
+                else:
+                    buffer.write(app.json.dumps(row))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            # Header of an empty CSV export
+            yield buffer.getvalue()
+
+    return Response(
+        stream_with_context(generate()),
+        status=200,
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
+
+
+class EventExport(Resource):
+    """
+    A flask-restful Resource that contains a GET HTTP method for exporting every event.
+    """
+
+    def get(self):
+        """
+        Handles the GET HTTP method. Streams every event in id order.
+
+        :returns Response: NDJSON or CSV stream of the events
+        """
+        table = Event.__table__
+        return export_response(
+            db.select(
+                table.c.id, table.c.slug, table.c.name, table.c.location, table.c.time,
+                table.c.organizer, table.c.description, table.c.category, table.c.tags,
+                table.c.updated_at
+            ).order_by(table.c.id),
+            "events"
+        )
+
+
+class UserExport(Resource):
+    """
+    A flask-restful Resource that contains a GET HTTP method for exporting every user.
+    """
+
+    @require_admin
+    def get(self):
+        """
+        Handles the GET HTTP method. Streams every user in id order, without API keys.
+
+        :returns Response: NDJSON or CSV stream of the users
+        """
+        table = User.__table__
+        return export_response(
+            db.select(
+                table.c.id, table.c.slug, table.c.name, table.c.email, table.c.phone_number,
+                table.c.updated_at
+            ).order_by(table.c.id),
+            "users"
+        )
+
 
-        print("Clearing cache for user and event")
-        print("UserEvents:", api.url_for(UserEvents, user=user))
-        print("EventItem:", api.url_for(EventItem, event=event))
+class ParticipantExport(Resource):
+    """
+    A flask-restful Resource that contains a GET HTTP method for exporting every
+    participation. The rows link user and event ids of the other exports.
+    """
 
-        cache.delete(api.url_for(UserEvents, user=user))
-        cache.delete(api.url_for(EventItem, event=event))
+    @require_admin
+    def get(self):
+        """
+        Handles the GET HTTP method. Streams every row of event_participants.
+
+        :returns Response: NDJSON or CSV stream of (user_id, event_id) rows
+        """
+        return export_response(
+            db.select(event_participants.c.user_id, event_participants.c.event_id).order_by(
+                event_participants.c.event_id, event_participants.c.user_id
+            ),
+            "participants"
+        )
 
+
+class CacheStatistics(Resource):
+    """
+    A flask-restful Resource that reports the statistics of the caches of this worker
+    """
+
+    @require_admin
+    def get(self):
+        """
+        Handles the GET HTTP method. Gets the cache statistics of the worker process
+        that handles the request.
+
+        :returns Response: Response containing the statistics of the response and API key caches
+        """
+        response_cache = response_cache_stats.stats()
+        response_cache["backend"] = app.config["CACHE_TYPE"]
+        backend = app.extensions["cache"][cache]
+        if hasattr(backend, "__len__"):
+            response_cache["size"] = len(backend)
+        response = jsonify(
+            {"response_cache": response_cache, "api_key_cache": api_key_cache.stats()}
+        )
+        response.status_code = 200
+        return response
+
+
+class PoolStatistics(Resource):
+    """
+    A flask-restful Resource that reports the database connection pool of this worker
+    """
+
+    @require_admin
+    def get(self):
+        """
+        Handles the GET HTTP method. Gets the connection pool state and checkout wait times
+        of the worker process that handles the request. Replicas are listed with the result
+        of their last health check.
+
+        :returns Response: Response containing the pool statistics
+        """
+        engines = db.engines
+        status = pool_status(db.engine.pool)
+        status["replicas"] = {
+            key: {**pool_status(engines[key].pool), "healthy": healthy}
+            for key, healthy in replica_router.status(engines).items()
+        }
+        response = jsonify(status)
+        response.status_code = 200
+        return response
+
+
+class ProfileCollection(Resource):
+    """
+    A flask-restful Resource that lists the query profiles kept by this worker
+    """
+
+    @require_admin
+    def get(self):
+        """
+        Handles the GET HTTP method. Lists the profiles of the slow and sampled requests
+        of the worker process that handles the request, newest first. ?slow=true lists
+        only the slow requests.
+
+        :returns Response: Response containing the profiler settings and the profiles
+        """
+        slow_only = request.args.get("slow", "").lower() in ("1", "true", "yes")
+        response = jsonify({
+            "enabled": profiler.enabled,
+            "slow_request_threshold": profiler.slow_threshold,
+            "sample_rate": profiler.sample_rate,
+            "profiles": profiler.recent(slow_only),
+        })
+        response.status_code = 200
+        return response
+
+    @require_admin
+    def delete(self):
+        """
+        Handles the DELETE HTTP method. Drops the profiles kept by the worker process that
+        handles the request.
+
+        :returns Response: Response with status code 204
+        """
+        profiler.clear()
         return Response(status=204)
 
 
@@ -597,13 +2094,13 @@ class UserConverter(BaseConverter):
     """
 
     def to_python(self, value):
-        db_user = User.query.filter_by(name=value).first()
+        db_user = User.query.filter_by(slug=value).first()
         if not db_user:
             raise NotFound
         return db_user
 
     def to_url(self, value):
-        return value.name
+        return super().to_url(value.slug)
 
 
 class EventConverter(BaseConverter):
@@ -613,13 +2110,13 @@ class EventConverter(BaseConverter):
     """
 
     def to_python(self, value):
-        db_event = Event.query.filter_by(name=value).first()
+        db_event = Event.query.filter_by(slug=value).first()
         if not db_event:
             raise NotFound
         return db_event
 
     def to_url(self, value):
-        return value.name
+        return super().to_url(value.slug)
 
 
 # Converter mappings
@@ -629,12 +2126,21 @@ app.url_map.converters["event"] = EventConverter
 api.add_resource(UserCollection, "/api/users/")
 api.add_resource(UserItem, "/api/users/<user:user>/")
 api.add_resource(UserEvents, "/api/users/<user:user>/events/")
+api.add_resource(UserEventsBulk, "/api/users/<user:user>/events/bulk/")
 api.add_resource(UserEventItem, "/api/users/<user:user>/events/<event:event>/")
 api.add_resource(EventCollection, "/api/events/")
 api.add_resource(EventItem, "/api/events/<event:event>/")
 api.add_resource(EventParticipants, "/api/events/<event:event>/participants/<user:user>/")
+api.add_resource(EventParticipantsBulk, "/api/events/<event:event>/participants/")
+api.add_resource(EventExport, "/api/export/events/")
+api.add_resource(UserExport, "/api/export/users/")
+api.add_resource(ParticipantExport, "/api/export/participants/")
+api.add_resource(CacheStatistics, "/api/admin/cache/")
+api.add_resource(PoolStatistics, "/api/admin/pool/")
+api.add_resource(ProfileCollection, "/api/admin/profiles/")
 
 if __name__ == "__main__":
+    logging_config.setup_logging(cfg.LOG_LEVEL, cfg.LOG_FORMAT)
     # create_database()
     with app.app_context():
         db.create_all()
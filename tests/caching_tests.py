@@ -0,0 +1,71 @@
+"""Tests for the in-process caches"""
+import time
+from src.caching import ApiKeyCache, LRUCache
+
+
+def test_api_key_cache_hit_and_miss():
+    cache = ApiKeyCache(maxsize=4, ttl=60)
+    assert cache.get(b"key") is None
+    cache.put(b"key", 1, False)
+    assert cache.get(b"key") == (1, False)
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["size"] == 1
+
+
+def test_api_key_cache_lru_eviction():
+    cache = ApiKeyCache(maxsize=2, ttl=60)
+    cache.put(b"first", 1, False)
+    cache.put(b"second", 2, False)
+    # Touch the first key so that the second one is the least recently used
+    assert cache.get(b"first") == (1, False)
+    cache.put(b"third", None, True)
+    assert cache.get(b"second") is None
+    assert cache.get(b"first") == (1, False)
+    assert cache.get(b"third") == (None, True)
+
+
+def test_api_key_cache_ttl():
+    cache = ApiKeyCache(maxsize=2, ttl=0.01)
+    cache.put(b"key", 1, False)
+    time.sleep(0.02)
+    assert cache.get(b"key") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_api_key_cache_invalidation():
+    cache = ApiKeyCache(maxsize=8, ttl=60)
+    cache.put(b"a", 1, False)
+    cache.put(b"b", 1, False)
+    cache.put(b"c", 2, False)
+    cache.invalidate_user(1)
+    assert cache.get(b"a") is None
+    assert cache.get(b"b") is None
+    assert cache.get(b"c") == (2, False)
+    cache.invalidate_key(b"c")
+    assert cache.get(b"c") is None
+
+
+def test_lru_cache_backend():
+    cache = LRUCache(threshold=2, default_timeout=60)
+    cache.set("first", 1)
+    cache.set("second", 2)
+    assert cache.get("first") == 1
+    cache.set("third", 3)
+    # "second" was the least recently used entry
+    assert cache.get("second") is None
+    assert cache.has("first")
+    assert not cache.add("first", 10)
+    assert cache.get("first") == 1
+    cache.delete_many("first", "third")
+    assert len(cache) == 0
+
+
+def test_lru_cache_backend_timeout():
+    cache = LRUCache(threshold=2, default_timeout=60)
+    cache.set("key", "value", timeout=1)
+    cache.set("forever", "value", timeout=0)
+    time.sleep(1.05)
+    assert cache.get("key") is None
+    assert cache.get("forever") == "value"
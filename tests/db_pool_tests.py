@@ -0,0 +1,53 @@
+"""Tests for the instrumented connection pool"""
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from src.db_pool import InstrumentedQueuePool, pool_status
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+    yield engine
+    engine.dispose()
+
+
+def test_checkouts_are_counted(engine):
+    for _ in range(3):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    status = pool_status(engine.pool)
+    assert status["pool"] == "InstrumentedQueuePool"
+    assert status["checkouts"] == 3
+    assert status["timeouts"] == 0
+    assert status["checked_out"] == 0
+    assert status["wait_seconds_max"] >= status["wait_seconds_avg"] >= 0
+
+
+def test_saturation_and_timeouts(engine):
+    first = engine.connect()
+    second = engine.connect()
+    status = pool_status(engine.pool)
+    assert status["checked_out"] == 2
+    assert status["saturation"] == 1.0
+
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    assert pool_status(engine.pool)["timeouts"] == 1
+
+    first.close()
+    second.close()
+    assert pool_status(engine.pool)["saturation"] == 0.0
+
+
+def test_counters_survive_dispose(engine):
+    with engine.connect():
+        pass
+    engine.dispose()
+    assert pool_status(engine.pool)["checkouts"] == 1
@@ -0,0 +1,285 @@
+"""Tests for EMSClient against a local stub server"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import asyncio
+from datetime import datetime
+import json
+import os
+import stat
+import threading
+import time
+import pytest
+import requests
+from src.async_ems_client import AsyncEMSClient
+from src.credentials import USER_SERVICE, CredentialStore, EncryptedFileBackend
+from src.ems_client import EMSClient, ResponseCache
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers with the responses queued for the path, 200 and {} when none are queued"""
+
+    protocol_version = "HTTP/1.1"
+
+    def respond(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        server.requests.append((self.command, self.path, dict(self.headers), body))
+        server.connections.add(self.client_address)
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight -= 1
+        queued = server.responses.get((self.command, self.path))
+        status, headers, payload = queued.pop(0) if queued else (200, {}, {})
+        data = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PUT = do_DELETE = respond
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    stub = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    stub.requests = []
+    stub.connections = set()
+    stub.responses = {}
+    stub.delay = 0
+    stub.lock = threading.Lock()
+    stub.in_flight = stub.max_in_flight = 0
+    thread = threading.Thread(target=stub.serve_forever, daemon=True)
+    thread.start()
+    yield stub
+    stub.shutdown()
+    stub.server_close()
+
+
+@pytest.fixture
+def client(server):
+    with EMSClient(
+        f"http://127.0.0.1:{server.server_address[1]}/api/", backoff_factor=0
+    ) as ems_client:
+        yield ems_client
+
+
+def test_connections_are_reused(server, client):
+    for _ in range(5):
+        assert client.request("GET", "events/").status_code == 200
+    assert len(server.requests) == 5
+    assert len(server.connections) == 1
+
+
+def test_idempotent_requests_are_retried(server, client):
+    server.responses[("GET", "/api/events/")] = [(503, {}, None), (502, {}, None)]
+    assert client.get_events() == {}
+    assert len(server.requests) == 3
+
+    server.responses[("POST", "/api/users/")] = [(503, {}, None)]
+    assert client.create_user("name", "email") is False
+    assert [request[0] for request in server.requests[3:]] == ["POST"]
+
+
+def test_per_call_timeout(server):
+    url = f"http://127.0.0.1:{server.server_address[1]}/api/"
+    server.delay = 0.3
+    with EMSClient(url, retries=0) as ems_client:
+        with pytest.raises(requests.RequestException):
+            ems_client.get_event("party", timeout=0.05)
+        # None falls back to the default timeout of the client
+        assert ems_client.get_event("party", timeout=None) == {}
+
+
+def test_conditional_cache(server):
+    url = f"http://127.0.0.1:{server.server_address[1]}/api/"
+    cache = ResponseCache(max_age=60)
+    with EMSClient(url, cache=cache) as cached_client:
+        event = ("GET", "/api/events/party/")
+        server.responses[event] = [(200, {"ETag": '"v1"'}, {"name": "party"})]
+        assert cached_client.get_event("party") == {"name": "party"}
+        # Fresh entries are served locally
+        assert cached_client.get_event("party") == {"name": "party"}
+        assert len(server.requests) == 1
+        assert cache.hits == 1
+
+        # Stale entries are revalidated
+        cache.max_age = 0
+        cache.refresh((f"{url}events/party/", None))
+        server.responses[event] = [(304, {"ETag": '"v1"'}, None)]
+        assert cached_client.get_event("party") == {"name": "party"}
+        assert server.requests[-1][2]["If-None-Match"] == '"v1"'
+        assert cache.revalidations == 1
+
+        # Writes of the client drop the affected entries
+        cache.max_age = 60
+        server.responses[event] = [(200, {"ETag": '"v2"'}, {"name": "party"})]
+        assert cached_client.get_event("party") == {"name": "party"}
+        cached_client.api_key, cached_client.current_user = "key", "joni"
+        server.responses[("POST", "/api/events/party/participants/joni/")] = [(201, {}, None)]
+        assert cached_client.add_user_as_participant("party")
+        server.responses[event] = [(200, {"ETag": '"v3"'}, {"name": "party", "count": 1})]
+        assert cached_client.get_event("party") == {"name": "party", "count": 1}
+        assert "If-None-Match" not in server.requests[-1][2]
+
+
+def test_iter_events_follows_and_prefetches_pages(server, client):
+    first, second = "/api/events/?location=Oulu&limit=2", "/api/events/?location=Oulu&cursor=c1"
+    server.responses[("GET", first)] = [
+        (200, {"Link": f'<{second}>; rel="next"'}, [{"name": "a"}, {"name": "b"}])
+    ]
+    server.responses[("GET", second)] = [(200, {}, [{"name": "c"}])]
+
+    events = client.iter_events({"location": "Oulu"}, page_size=2)
+    assert next(events) == {"name": "a"}
+    # The second page is requested before the first one has been processed
+    deadline = time.monotonic() + 5
+    while len(server.requests) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [request[1] for request in server.requests] == [first, second]
+    assert [event["name"] for event in events] == ["b", "c"]
+    assert len(server.requests) == 2
+
+
+def test_iter_users_sends_admin_key(server, client):
+    server.responses[("GET", "/api/users/")] = [
+        (200, {"Link": '</api/users/?cursor=c1>; rel="next"'}, [{"name": "a"}])
+    ]
+    server.responses[("GET", "/api/users/?cursor=c1")] = [(403, {}, None)]
+    client.set_admin_key("admin")
+    users = client.iter_users()
+    assert next(users) == {"name": "a"}
+    with pytest.raises(requests.HTTPError):
+        next(users)
+    assert all(request[2]["EMS-Api-Key"] == "admin" for request in server.requests)
+
+
+def test_encrypted_credentials_file(tmp_path):
+    path = str(tmp_path / "credentials.enc")
+    backend = EncryptedFileBackend(path, passphrase="secret", iterations=1000)
+    backend.set(USER_SERVICE, "joni", "key-1")
+    backend.set(USER_SERVICE, "kalle", "key-2")
+    assert backend.delete(USER_SERVICE, "kalle")
+    assert not backend.delete(USER_SERVICE, "kalle")
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    with open(path, encoding="utf-8") as file:
+        assert "key-1" not in file.read()
+
+    reopened = EncryptedFileBackend(path, passphrase="secret")
+    assert reopened.get(USER_SERVICE, "joni") == "key-1"
+    assert reopened.get(USER_SERVICE, "kalle") is None
+    with pytest.raises(ValueError):
+        EncryptedFileBackend(path, passphrase="wrong")
+
+
+def test_user_switches_are_served_from_memory(server, tmp_path):
+    url = f"http://127.0.0.1:{server.server_address[1]}/api/"
+    backend = EncryptedFileBackend(str(tmp_path / "credentials.enc"), "secret", iterations=1000)
+    store = CredentialStore(backend)
+    names = [f"user{number}" for number in range(3)]
+    with EMSClient(url, credentials=store) as ems_client:
+        for name in names:
+            server.responses[("POST", "/api/users/")] = [(201, {"User-Api-Key": name}, None)]
+            assert ems_client.create_user(name, f"{name}@example.com")
+        for _ in range(10):
+            for name in names:
+                assert ems_client.user_login(name)
+                assert ems_client.api_key == name
+        assert store.misses == 0
+
+        server.responses[("PUT", "/api/users/user2/")] = [(201, {}, None)]
+        assert ems_client.modify_user({"name": "renamed"})
+        server.responses[("DELETE", "/api/users/renamed/")] = [(204, {}, None)]
+        assert ems_client.delete_user()
+
+    # A new store reads the file once per user
+    store = CredentialStore(EncryptedFileBackend(backend.path, "secret"))
+    with EMSClient(url, credentials=store) as ems_client:
+        assert ems_client.user_login("user0") and ems_client.user_login("user1")
+        assert not ems_client.user_login("user2") and not ems_client.user_login("renamed")
+        assert ems_client.user_login("user0")
+    assert (store.hits, store.misses) == (1, 4)
+
+
+def test_async_client_bounds_concurrency(server):
+    server.delay = 0.02
+    names = [f"event {number}" for number in range(12)]
+    for name in names[:-1]:
+        server.responses[("GET", f"/api/events/{name.replace(' ', '%20')}/")] = [
+            (200, {}, {"name": name})
+        ]
+    server.responses[("GET", "/api/events/event%2011/")] = [(404, {}, None)]
+
+    async def run():
+        url = f"http://127.0.0.1:{server.server_address[1]}/api/"
+        async with AsyncEMSClient(url, max_concurrency=3) as async_client:
+            return await async_client.gather_events(names)
+
+    events = asyncio.run(run())
+    assert [event["name"] for event in events[:-1]] == names[:-1]
+    assert events[-1] is None
+    assert server.max_in_flight <= 3
+    assert len(server.connections) <= 3
+
+
+def test_async_client_acts_as_many_users(server):
+    async def run():
+        url = f"http://127.0.0.1:{server.server_address[1]}/api/"
+        async with AsyncEMSClient(url) as async_client:
+            async_client.user_login("first", api_key="key-1")
+            async_client.user_login("second", api_key="key-2")
+            return await async_client.add_participants("party", ["first", "second"])
+
+    server.responses[("POST", "/api/events/party/participants/first/")] = [(201, {}, None)]
+    server.responses[("POST", "/api/events/party/participants/second/")] = [(409, {}, None)]
+    assert asyncio.run(run()) == [True, False]
+    keys = {path: headers["User-Api-Key"] for _, path, headers, _ in server.requests}
+    assert keys == {
+        "/api/events/party/participants/first/": "key-1",
+        "/api/events/party/participants/second/": "key-2",
+    }
+
+
+def test_async_client_reports_failures_per_user(server):
+    async def run():
+        url = f"http://127.0.0.1:{server.server_address[1]}/api/"
+        async with AsyncEMSClient(url) as async_client:
+            assert await async_client.get_user() is None
+            assert await async_client.add_user_as_participant("party") is False
+            async_client.user_login("first", api_key="key-1")
+            return await async_client.add_participants("party", ["first", "unknown"])
+
+    server.responses[("POST", "/api/events/party/participants/first/")] = [(201, {}, None)]
+    assert asyncio.run(run()) == [True, False]
+    assert [request[1] for request in server.requests] == [
+        "/api/events/party/participants/first/"
+    ]
+
+
+def test_async_client_modifies_event(server):
+    async def run():
+        url = f"http://127.0.0.1:{server.server_address[1]}/api/"
+        async with AsyncEMSClient(url) as async_client:
+            async_client.user_login("joni", api_key="key-1")
+            return await async_client.modify_event(
+                "party", "Oulu", datetime(2026, 5, 1, 18), "Moved", user="joni"
+            )
+
+    server.responses[("GET", "/api/events/party/")] = [(200, {}, {"organizer": 7})]
+    server.responses[("PUT", "/api/users/joni/events/party/")] = [(200, {}, None)]
+    assert asyncio.run(run()) is True
+    method, path, headers, body = server.requests[-1]
+    assert (method, path) == ("PUT", "/api/users/joni/events/party/")
+    assert headers["User-Api-Key"] == "key-1"
+    assert json.loads(body) == {
+        "name": "party", "location": "Oulu", "time": "2026-05-01T18:00:00",
+        "description": "Moved", "organizer": 7,
+    }
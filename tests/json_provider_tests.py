@@ -0,0 +1,38 @@
+"""Tests for the JSON provider"""
+import json
+from datetime import datetime
+from flask import Flask
+from sqlalchemy import create_engine, text
+from src import json_provider
+from src.json_provider import FastJSONProvider
+
+
+def make_app(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(json_provider, "orjson", None)
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    return app
+
+
+def test_datetimes_and_rows(monkeypatch):
+    engine = create_engine("sqlite://")
+    with engine.connect() as connection:
+        row = connection.execute(text("SELECT 1 AS id, 'Shiny' AS name")).one()
+    for use_orjson in (True, False):
+        provider = make_app(monkeypatch, use_orjson).json
+        time = datetime(2026, 2, 28, 10, 0, 0)
+        assert json.loads(provider.dumps({"time": time})) == {"time": time.isoformat()}
+        assert json.loads(provider.dumps([row])) == [{"id": 1, "name": "Shiny"}]
+
+
+def test_same_output_as_stdlib(monkeypatch):
+    data = {"name": "Uleåborg", "tags": ["live-music"], "organizer": None, "a": 1.5}
+    fast_app = make_app(monkeypatch, True)
+    fast_body = fast_app.json.response(data).get_data()
+    assert fast_app.json.loads(b'{"name": "x"}') == {"name": "x"}
+    stdlib_app = make_app(monkeypatch, False)
+    stdlib_body = stdlib_app.json.response(data).get_data()
+    assert json.loads(fast_body) == json.loads(stdlib_body) == data
+    # Keys are sorted by both
+    assert fast_body.index(b'"a"') < fast_body.index(b'"tags"')
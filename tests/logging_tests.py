@@ -0,0 +1,84 @@
+"""Tests for the queued, structured logging setup"""
+import io
+import json
+import logging
+import os
+import subprocess
+import sys
+import pytest
+from flask import Flask
+from src import logging_config
+from src.logging_config import REQUEST_ID_HEADER, setup_logging
+import config as cfg
+
+SOURCE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def log_stream():
+    stream = io.StringIO()
+    listener = setup_logging("DEBUG", "json", stream)
+    yield stream, listener
+    setup_logging(cfg.LOG_LEVEL, cfg.LOG_FORMAT)
+
+
+@pytest.fixture
+def logging_app():
+    app = Flask(__name__)
+    logging_config.init_app(app)
+
+    @app.route("/log")
+    def log():
+        logging.getLogger("ems.test").info("handled %s", "request", extra={"items": 3})
+        return "ok"
+
+    return app
+
+
+def records(stream, listener):
+    listener.stop()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_records_carry_request_id(log_stream, logging_app):
+    stream, listener = log_stream
+    client = logging_app.test_client()
+    first = client.get("/log")
+    second = client.get("/log", headers={REQUEST_ID_HEADER: "abc-123"})
+    invalid = client.get("/log", headers={REQUEST_ID_HEADER: "no spaces allowed"})
+    logging.getLogger("ems.test").warning("outside a request")
+
+    assert second.headers[REQUEST_ID_HEADER] == "abc-123"
+    assert invalid.headers[REQUEST_ID_HEADER] != "no spaces allowed"
+    entries = [entry for entry in records(stream, listener) if entry["logger"] == "ems.test"]
+    assert [entry["request_id"] for entry in entries] == [
+        first.headers[REQUEST_ID_HEADER], "abc-123", invalid.headers[REQUEST_ID_HEADER], "-"
+    ]
+    assert entries[0]["message"] == "handled request"
+    assert entries[0]["level"] == "INFO"
+    assert entries[0]["items"] == 3
+    assert entries[3]["level"] == "WARNING"
+
+
+def test_exceptions_are_logged(log_stream):
+    stream, listener = log_stream
+    try:
+        raise ValueError("broken")
+    except ValueError:
+        logging.getLogger("ems.test").exception("failed")
+    entry, = [entry for entry in records(stream, listener) if entry["logger"] == "ems.test"]
+    assert entry["level"] == "ERROR"
+    assert entry["message"] == "failed"
+    assert "ValueError: broken" in entry["exception"]
+
+
+def test_importing_the_api_keeps_the_logging_setup():
+    # The entry points set up the logging, importing the models must not replace handlers
+    code = (
+        "import logging\n"
+        "handler = logging.StreamHandler()\n"
+        "logging.getLogger().addHandler(handler)\n"
+        "import src.resources_and_models\n"
+        "assert logging.getLogger().handlers == [handler]\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=SOURCE_ROOT)
@@ -0,0 +1,104 @@
+"""Tests for the query profiler"""
+import logging
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from src import query_timing
+from src.profiler import QueryProfiler, statement_shape
+
+
+def test_statement_shape():
+    assert statement_shape("SELECT *\n  FROM event WHERE id IN (%s, %s, %s)") == (
+        "SELECT * FROM event WHERE id IN (%s, ...)"
+    )
+    assert statement_shape("INSERT INTO t (a, b) VALUES (?, ?), (?, ?), (?, ?)") == (
+        "INSERT INTO t (a, b) VALUES (?, ...), ..."
+    )
+    assert statement_shape("SELECT 1 WHERE id = %(id_1)s") == "SELECT 1 WHERE id = %(id_1)s"
+
+
+@pytest.fixture
+def profiled_app(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'profiler.db'}")
+    app = Flask(__name__)
+    profiler = QueryProfiler(enabled=True, slow_threshold=60, sample_rate=1.0, repeat_threshold=3)
+    profiler.init_app(app)
+
+    @app.route("/queries/<int:count>")
+    def queries(count):
+        with engine.connect() as connection:
+            for number in range(count):
+                connection.execute(text("SELECT :number"), {"number": number})
+        return "ok"
+
+    @app.route("/failing")
+    def failing():
+        with engine.connect() as connection:
+            for _ in range(3):
+                try:
+                    connection.execute(text("SELECT * FROM no_such_table"))
+                except OperationalError:
+                    pass
+            assert connection.info == {}
+        return "ok"
+
+    yield app, profiler
+    engine.dispose()
+
+
+def test_profile_records_statements(profiled_app):
+    app, profiler = profiled_app
+    assert app.test_client().get("/queries/4").status_code == 200
+
+    profile, = profiler.recent()
+    assert profile["path"] == "/queries/4"
+    assert profile["status"] == 200
+    assert profile["query_count"] == 4
+    assert set(profile["phases"]) == {"routing", "handler", "response"}
+    statement = profile["statements"][0]
+    assert statement["phase"] == "handler"
+    assert statement["call_site"].startswith("tests/profiler_tests.py:")
+    assert statement["call_site"].endswith("in queries")
+    repeated, = profile["repeated"]
+    assert repeated["count"] == 4
+    assert repeated["call_sites"] == [statement["call_site"]]
+
+
+def test_sampling_and_slow_log(profiled_app, caplog):
+    app, profiler = profiled_app
+    client = app.test_client()
+    profiler.sample_rate = 0.0
+    client.get("/queries/1")
+    assert profiler.recent() == []
+
+    profiler.slow_threshold = 0.0
+    with caplog.at_level(logging.WARNING):
+        client.get("/queries/3")
+    profile, = profiler.recent(slow_only=True)
+    assert profile["slow"]
+    assert "Slow request GET /queries/3" in caplog.text
+    assert "repeated 3x from tests/profiler_tests.py" in caplog.text
+
+    profiler.enabled = False
+    client.get("/queries/3")
+    assert len(profiler.recent()) == 1
+    profiler.clear()
+    assert profiler.recent() == []
+
+
+def test_failed_statements(profiled_app):
+    app, profiler = profiled_app
+    timings = []
+    query_timing.add_listener(lambda statement, seconds, failed: timings.append(failed))
+    try:
+        assert app.test_client().get("/failing").status_code == 200
+    finally:
+        del query_timing._listeners[-1]  # pylint: disable=protected-access
+
+    assert timings == [True, True, True]
+    profile, = profiler.recent()
+    assert profile["query_count"] == 3
+    assert all(statement["failed"] for statement in profile["statements"])
+    repeated, = profile["repeated"]
+    assert repeated["count"] == 3
@@ -0,0 +1,85 @@
+"""Tests for the read replica routing, with SQLite files as primary and replicas"""
+import secrets
+import time
+import pytest
+from flask import Flask, jsonify, request
+from flask_caching import Cache
+from flask_sqlalchemy import SQLAlchemy
+from src.db_routing import ReplicaRouter, RoutingSession
+
+
+def make_app(tmp_path, replica_names, window=5.0):
+    """Creates an app whose databases each contain one note with the name of the database"""
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'primary.db'}"
+    app.config["SQLALCHEMY_BINDS"] = {
+        name: f"sqlite:///{tmp_path / name}.db" if name != "broken"
+        else f"sqlite:///{tmp_path / 'missing' / 'broken.db'}"
+        for name in replica_names
+    }
+    app.config["CACHE_TYPE"] = "SimpleCache"
+    db = SQLAlchemy(app, session_options={"class_": RoutingSession})
+    cache = Cache(app)
+    ReplicaRouter(app.config["SQLALCHEMY_BINDS"], window=window, check_interval=60).init_app(
+        app, cache
+    )
+    notes = db.Table(
+        "note", db.Column("id", db.Integer, primary_key=True), db.Column("text", db.String(64))
+    )
+
+    @app.get("/notes/")
+    def get_notes():
+        return jsonify(db.session.execute(db.select(notes.c.text)).scalars().all())
+
+    @app.post("/notes/")
+    def post_note():
+        db.session.execute(db.insert(notes).values(text=request.json["text"]))
+        db.session.commit()
+        return jsonify(db.session.execute(db.select(notes.c.text)).scalars().all()), 201
+
+    @app.get("/notes/touch/")
+    def touch_note():
+        # A write in a read request pins the rest of the request to the primary
+        db.session.execute(db.update(notes).values(text=db.func.upper(notes.c.text)))
+        return jsonify(db.session.execute(db.select(notes.c.text)).scalars().all())
+
+    with app.app_context():
+        for name, engine in db.engines.items():
+            if name == "broken":
+                continue
+            with engine.begin() as connection:
+                notes.create(connection)
+                connection.execute(db.insert(notes).values(text=name or "primary"))
+    return app
+
+
+def test_reads_use_replica(tmp_path):
+    client = make_app(tmp_path, ["replica"]).test_client()
+    assert client.get("/notes/").get_json() == ["replica"]
+    assert client.get("/notes/touch/").get_json() == ["PRIMARY"]
+
+
+def test_read_your_writes(tmp_path):
+    client = make_app(tmp_path, ["replica"], window=0.2).test_client()
+    writer = {"User-Api-Key": secrets.token_urlsafe()}
+    response = client.post("/notes/", json={"text": "new"}, headers=writer)
+    assert response.status_code == 201
+    assert response.get_json() == ["primary", "new"]
+
+    # The writer reads from the primary during the window, other clients from the replica
+    assert client.get("/notes/", headers=writer).get_json() == ["primary", "new"]
+    other = {"User-Api-Key": secrets.token_urlsafe()}
+    assert client.get("/notes/", headers=other).get_json() == ["replica"]
+
+    time.sleep(0.25)
+    assert client.get("/notes/", headers=writer).get_json() == ["replica"]
+
+
+@pytest.mark.parametrize("replica_names, expected", [
+    (["broken"], ["primary"]),
+    (["broken", "replica"], ["replica"]),
+])
+def test_unhealthy_replica_is_skipped(tmp_path, replica_names, expected):
+    client = make_app(tmp_path, replica_names).test_client()
+    for _ in range(3):
+        assert client.get("/notes/").get_json() == expected
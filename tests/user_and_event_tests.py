@@ -1,9 +1,17 @@
 """User and Event tests"""
+from concurrent.futures import ThreadPoolExecutor
 import json as j
 import pytest
 import secrets
-from src.resources_and_models import app, db, create_database, ApiKey
-from src.db_population import populate_single_user, populate_single_event, add_user_to_event
+import threading
+from src.resources_and_models import (
+    app, db, create_database, ApiKey, User, Event, event_participants, api_key_cache, cache,
+    response_cache_stats, profiler, participant_recount
+)
+from src.db_migrations import add_participant_key
+from src.db_population import (
+    populate_single_user, populate_single_event, add_user_to_event, populate_database
+)
 import config as cfg
 
 
@@ -58,6 +66,9 @@ def test_client():
     ctx = app.app_context()
     ctx.push()
     create_database()
+    api_key_cache.clear()
+    cache.clear()
+    response_cache_stats.clear()
     with ctx:
         db.drop_all()
         db.create_all()
@@ -127,6 +138,88 @@ class TestEventCollection:
         response = test_client.post(self.RESOURCE_URL, data=DEFAULT_JSON)
         assert response.status_code == 405
 
+    def test_get_pagination(self, test_client):
+        """Test for Event Collection GET with keyset pagination"""
+        response = test_client.get(self.RESOURCE_URL, query_string={"limit": 1})
+        assert response.status_code == 200
+        data = response.get_json()
+        assert len(data) == 1
+        # Events are ordered by time, the older event comes first
+        assert data[0]["name"] == SECOND_JSON["name"]
+        assert response.headers["Link"].endswith('rel="next"')
+
+        next_url = response.headers["Link"].split(">")[0].lstrip("<")
+        response = test_client.get(next_url)
+        assert response.status_code == 200
+        data = response.get_json()
+        assert len(data) == 1
+        assert data[0]["name"] == DEFAULT_JSON["name"]
+        assert "Link" not in response.headers
+
+        # Test invalid parameters
+        response = test_client.get(self.RESOURCE_URL, query_string={"limit": "many"})
+        assert response.status_code == 400
+        response = test_client.get(self.RESOURCE_URL, query_string={"limit": 0})
+        assert response.status_code == 400
+        response = test_client.get(self.RESOURCE_URL, query_string={"cursor": "not a cursor"})
+        assert response.status_code == 400
+
+    def test_get_filters(self, test_client):
+        """Test for Event Collection GET filters"""
+        response = test_client.get(self.RESOURCE_URL, query_string={"location": "Helsingfors"})
+        assert [event["name"] for event in response.get_json()] == [SECOND_JSON["name"]]
+
+        response = test_client.get(self.RESOURCE_URL, query_string={"from": "2026-01-01T00:00:00"})
+        assert [event["name"] for event in response.get_json()] == [DEFAULT_JSON["name"]]
+
+        response = test_client.get(self.RESOURCE_URL, query_string={"to": "2026-01-01T00:00:00"})
+        assert [event["name"] for event in response.get_json()] == [SECOND_JSON["name"]]
+
+        response = test_client.get(self.RESOURCE_URL, query_string={"category": "music"})
+        assert [event["name"] for event in response.get_json()] == [DEFAULT_JSON["name"]]
+
+        response = test_client.get(self.RESOURCE_URL, query_string={"tag": "live"})
+        assert response.get_json() == []
+
+        response = test_client.get(self.RESOURCE_URL, query_string={"from": "yesterday"})
+        assert response.status_code == 400
+
+    def test_get_fields(self, test_client):
+        """Test for Event Collection GET sparse fieldsets"""
+        response = test_client.get(self.RESOURCE_URL, query_string={"fields": "name,time"})
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data[0] == {"name": SECOND_JSON["name"], "time": SECOND_JSON["time"]}
+
+        response = test_client.get(self.RESOURCE_URL, query_string={"fields": "short"})
+        assert set(response.get_json()[0]) == {"name", "location", "time"}
+
+        response = test_client.get(self.RESOURCE_URL, query_string={"fields": "name,password"})
+        assert response.status_code == 400
+
+    def test_get_conditional(self, test_client):
+        """Test for Event Collection conditional GET"""
+        response = test_client.get(self.RESOURCE_URL)
+        etag = response.headers["ETag"]
+        response = test_client.get(self.RESOURCE_URL, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+        # Other pages and filters have their own ETags
+        response = test_client.get(
+            self.RESOURCE_URL, query_string={"limit": 1}, headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 200
+
+        # Deleting an event changes the ETag
+        response = test_client.delete(
+            "/api/users/Joni Maisema/events/Shiny New Event/",
+            headers={"User-Api-Key": JONI_MAISEMA_TOKEN}
+        )
+        assert response.status_code == 204
+        response = test_client.get(self.RESOURCE_URL, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert len(response.get_json()) == 1
+
 
 class TestEventItem:
     """ Test for Event Item"""
@@ -161,6 +254,56 @@ class TestEventItem:
         response = test_client.get(self.INVALID_URL)
         assert response.status_code == 404
 
+    def test_get_conditional(self, test_client):
+        """ Test for Event Item conditional GET"""
+        response = test_client.get(self.RESOURCE_URL)
+        etag = response.headers["ETag"]
+        assert response.headers["Last-Modified"]
+
+        response = test_client.get(self.RESOURCE_URL, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert not response.data
+
+        response = test_client.get(self.RESOURCE_URL, headers={"If-None-Match": '"outdated"'})
+        assert response.status_code == 200
+
+        # Modifying the event changes the ETag
+        json = DEFAULT_JSON.copy()
+        json["location"] = "Oulu"
+        response = test_client.put(
+            "/api/users/Joni Maisema/events/Shiny New Event/",
+            json=json,
+            headers={"User-Api-Key": JONI_MAISEMA_TOKEN}
+        )
+        assert response.status_code == 200
+        response = test_client.get(self.RESOURCE_URL, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert response.get_json()["location"] == "Oulu"
+
+    def test_get_cached(self, test_client):
+        """ Test that Event Item GET is served from the response cache until the event changes"""
+        response = test_client.get(self.RESOURCE_URL)
+        assert response.status_code == 200
+        assert response_cache_stats.stats()["misses"] == 1
+
+        response = test_client.get(self.RESOURCE_URL)
+        assert response.status_code == 200
+        assert response_cache_stats.stats()["hits"] == 1
+        assert response.get_json()["location"] == DEFAULT_JSON["location"]
+
+        json = DEFAULT_JSON.copy()
+        json["location"] = "Oulu"
+        test_client.put(
+            "/api/users/Joni Maisema/events/Shiny New Event/",
+            json=json,
+            headers={"User-Api-Key": JONI_MAISEMA_TOKEN}
+        )
+        assert response_cache_stats.stats()["invalidations"] > 0
+        response = test_client.get(self.RESOURCE_URL)
+        assert response.get_json()["location"] == "Oulu"
+
 
 class TestUserItem:
     """Test for Resource UserItem"""
@@ -190,6 +333,24 @@ class TestUserItem:
         response = test_client.get(self.INVALID_URL)
         assert response.status_code == 404
 
+    def test_get_conditional(self, test_client):
+        """Test for UserItem conditional GET"""
+        headers = {"User-Api-Key": JONI_MAISEMA_TOKEN}
+        response = test_client.get(self.RESOURCE_URL, headers=headers)
+        etag = response.headers["ETag"]
+        last_modified = response.headers["Last-Modified"]
+
+        response = test_client.get(self.RESOURCE_URL, headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 304
+        response = test_client.get(
+            self.RESOURCE_URL, headers={**headers, "If-Modified-Since": last_modified}
+        )
+        assert response.status_code == 304
+
+        # Validators are checked only after authentication
+        response = test_client.get(self.RESOURCE_URL, headers={"If-None-Match": etag})
+        assert response.status_code == 403
+
     def test_put(self, test_client):
         """Test for UserItem PUT"""
         json = {
@@ -226,6 +387,29 @@ class TestUserItem:
         response = test_client.delete(self.INVALID_URL, headers={"User-Api-Key": JONI_MAISEMA_TOKEN})
         assert response.status_code == 404
 
+    def test_api_key_cache(self, test_client):
+        """Test that repeated requests verify the API key from the cache"""
+        response = test_client.get(self.RESOURCE_URL, headers={"User-Api-Key": JONI_MAISEMA_TOKEN})
+        assert response.status_code == 200
+        stats = api_key_cache.stats()
+        assert stats["misses"] == 1
+        assert stats["size"] == 1
+
+        response = test_client.get(self.RESOURCE_URL, headers={"User-Api-Key": JONI_MAISEMA_TOKEN})
+        assert response.status_code == 200
+        assert api_key_cache.stats()["hits"] == stats["hits"] + 1
+
+        # Another user's key must not be accepted, cached or not
+        response = test_client.get(self.RESOURCE_URL, headers={"User-Api-Key": KAYTTAJA_KAKSI_TOKEN})
+        assert response.status_code == 403
+        response = test_client.get(self.RESOURCE_URL, headers={"User-Api-Key": KAYTTAJA_KAKSI_TOKEN})
+        assert response.status_code == 403
+
+        # Deleting the user drops the user's cached keys
+        response = test_client.delete(self.RESOURCE_URL, headers={"User-Api-Key": JONI_MAISEMA_TOKEN})
+        assert response.status_code == 204
+        assert api_key_cache.get(ApiKey.key_hash(JONI_MAISEMA_TOKEN)) is None
+
 
 class TestUserCollection:
     """Tests For UserCollection"""
@@ -243,6 +427,35 @@ class TestUserCollection:
             assert "email" in user
             assert "phone_number" in user
 
+        response = test_client.get(
+            self.RESOURCE_URL,
+            query_string={"fields": "short"},
+            headers={"EMS-Api-Key": ADMIN_API_TOKEN}
+        )
+        assert response.status_code == 200
+        assert response.get_json()[0] == {"name": "Joni Maisema", "email": "joni.maisema@gmail.com"}
+
+    def test_get_pagination(self, test_client):
+        """Tests For UserCollection GET with keyset pagination"""
+        headers = {"EMS-Api-Key": ADMIN_API_TOKEN}
+        all_users = test_client.get(self.RESOURCE_URL, headers=headers).get_json()
+        response = test_client.get(self.RESOURCE_URL, query_string={"limit": 1}, headers=headers)
+        names = []
+        while True:
+            assert response.status_code == 200
+            assert len(response.get_json()) == 1
+            names += [user["name"] for user in response.get_json()]
+            if "Link" not in response.headers:
+                break
+            next_url = response.headers["Link"].split(">")[0].lstrip("<")
+            response = test_client.get(next_url, headers=headers)
+        assert names == [user["name"] for user in all_users]
+
+        response = test_client.get(
+            self.RESOURCE_URL, query_string={"cursor": "not a cursor"}, headers=headers
+        )
+        assert response.status_code == 400
+
     def test_post(self, test_client):
         """Tests For UserCollection POST"""
         json = {
@@ -266,11 +479,41 @@ class TestUserCollection:
         data = response.headers
         assert data["location"] == "/api/users/Test%20Post/"  # NOTE: %20 == " "
 
+        # Only event slugs are reserved, no user route has a "bulk" sibling
+        response = test_client.post(self.RESOURCE_URL, json={**json, "name": "bulk"})
+        assert response.status_code == 201
+        assert response.headers["location"] == "/api/users/bulk/"
+
+        # Test optional field of the wrong type and fields longer than their columns
+        response = test_client.post(self.RESOURCE_URL, json={**json, "phone_number": 1234567})
+        assert response.status_code == 400
+        response = test_client.post(self.RESOURCE_URL, json={**json, "name": "x" * 129})
+        assert response.status_code == 400
+
         # Testing missing field
         json.pop("email")
         response = test_client.post(self.RESOURCE_URL, json=json)
         assert response.status_code == 400
 
+    def test_post_same_name(self, test_client):
+        """Tests that users with the same name get distinct URLs"""
+        json = {"name": "Joni Maisema", "email": "joni.maisema2@gmail.com"}
+        response = test_client.post(self.RESOURCE_URL, json=json)
+        assert response.status_code == 201
+        assert response.headers["location"] == "/api/users/Joni%20Maisema-2/"
+
+        # Slugs are compared case-insensitively like the database does
+        json["name"] = "joni maisema"
+        response = test_client.post(self.RESOURCE_URL, json=json)
+        assert response.status_code == 201
+        assert response.headers["location"] == "/api/users/joni%20maisema-3/"
+
+        response = test_client.get(
+            "/api/users/Joni Maisema-2/",
+            headers={"User-Api-Key": response.headers["User-Api-Key"]}
+        )
+        assert response.status_code == 403
+
 
 class TestUserEvents:
     """Test for UserEvents resource"""
@@ -314,6 +557,44 @@ class TestUserEvents:
         assert "time" in organized_event
         assert organized_event["time"] == "2026-02-28T10:00:00"
 
+    def test_get_pagination(self, test_client):
+        """Test for UserEvents GET with separately paged lists"""
+        headers = {"User-Api-Key": JONI_MAISEMA_TOKEN}
+        response = test_client.post(
+            "/api/events/Shiny New Event/participants/Joni Maisema/", headers=headers
+        )
+        assert response.status_code == 201
+
+        response = test_client.get(self.RESOURCE_URL, query_string={"limit": 1}, headers=headers)
+        assert response.status_code == 200
+        event_infos = response.get_json()["event_infos"]
+        assert [event["name"] for event in event_infos["attended_events"]] == [SECOND_JSON["name"]]
+        assert event_infos["organized_next"] is None
+        assert event_infos["attended_next"]
+
+        response = test_client.get(event_infos["attended_next"], headers=headers)
+        assert response.status_code == 200
+        event_infos = response.get_json()["event_infos"]
+        assert [event["name"] for event in event_infos["attended_events"]] == [DEFAULT_JSON["name"]]
+        assert event_infos["attended_next"] is None
+
+    def test_get_conditional(self, test_client):
+        """Test for UserEvents conditional GET"""
+        headers = {"User-Api-Key": JONI_MAISEMA_TOKEN}
+        response = test_client.get(self.RESOURCE_URL, headers=headers)
+        etag = response.headers["ETag"]
+        response = test_client.get(self.RESOURCE_URL, headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 304
+
+        # Joining an event changes the ETag
+        response = test_client.post(
+            "/api/events/Shiny New Event/participants/Joni Maisema/", headers=headers
+        )
+        assert response.status_code == 201
+        response = test_client.get(self.RESOURCE_URL, headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert len(response.get_json()["event_infos"]["attended_events"]) == 2
+
     def test_post(self, test_client):
         """Test for Event Collection POST"""
         json = DEFAULT_JSON.copy()
@@ -337,18 +618,125 @@ class TestUserEvents:
         # assert data["category"] == ["music", "sports"]
         # assert data["tags"] == ["live-music", "baby-metal-concert"]
         print(f"DATA LOCATION: {data['location']}")
-        assert data["location"] == f"/api/events/Shiny%20New%20Event/"
+        # An event with the same name already exists, so the new one gets a suffixed URL key
+        assert data["location"] == f"/api/events/Shiny%20New%20Event-2/"
+        response = test_client.get(data["location"])
+        assert response.status_code == 200
+        assert response.get_json()["name"] == DEFAULT_JSON["name"]
 
         # Test same
         # response = test_client.post(self.RESOURCE_URL, json=json)
         # assert response.status_code == 409
 
+        # Test invalid optional fields
+        headers = {"User-Api-Key": JONI_MAISEMA_TOKEN}
+        response = test_client.post(
+            self.RESOURCE_URL, json={**json, "description": "x" * 2049}, headers=headers
+        )
+        assert response.status_code == 400
+        response = test_client.post(self.RESOURCE_URL, json={**json, "tags": "music"}, headers=headers)
+        assert response.status_code == 400
+
         # Test missing field
         json.pop("location")
         response = test_client.post(self.RESOURCE_URL, json=json, headers={"User-Api-Key": JONI_MAISEMA_TOKEN})
         assert response.status_code == 400
 
 
+class TestUserEventsBulk:
+    """Test for UserEventsBulk resource"""
+
+    RESOURCE_URL = "/api/users/Joni Maisema/events/bulk/"
+
+    def test_post(self, test_client):
+        """Test for UserEventsBulk POST"""
+        headers = {"User-Api-Key": JONI_MAISEMA_TOKEN}
+        json = DEFAULT_JSON.copy()
+        json.pop("organizer")
+        events = [
+            {**json, "name": "Season Opener"},
+            {**json, "name": "bulk"},
+            {**json, "location": None},
+            {**json, "name": "Past Event", "time": "2020-01-01T10:00:00"},
+        ]
+
+        # Test invalid
+        response = test_client.post(self.RESOURCE_URL, json=events)
+        assert response.status_code == 403
+        response = test_client.post(self.RESOURCE_URL, data="[]", headers=headers)
+        assert response.status_code == 415
+        response = test_client.post(self.RESOURCE_URL, json=json, headers=headers)
+        assert response.status_code == 400
+        response = test_client.post(self.RESOURCE_URL, json=[], headers=headers)
+        assert response.status_code == 400
+
+        # Test JSON array, valid events are created and the others reported
+        response = test_client.post(self.RESOURCE_URL, json=events, headers=headers)
+        assert response.status_code == 207
+        data = response.get_json()
+        assert data["created"] == 2
+        assert data["failed"] == 2
+        assert [item["status"] for item in data["items"]] == [201, 201, 400, 400]
+        assert data["items"][0]["location"] == "/api/events/Season%20Opener/"
+        # "bulk" is reserved for the bulk endpoint
+        assert data["items"][1]["location"] == "/api/events/bulk-2/"
+        response = test_client.get(data["items"][0]["location"])
+        assert response.status_code == 200
+        assert response.get_json()["organizer"] == 1
+
+        # Test NDJSON, names that are taken get suffixed slugs
+        body = "\n".join(j.dumps({**json, "name": "Season Opener"}) for _ in range(3))
+        response = test_client.post(
+            self.RESOURCE_URL,
+            data=body + "\n\nnot json\n",
+            headers=headers,
+            content_type="application/x-ndjson",
+        )
+        assert response.status_code == 207
+        items = response.get_json()["items"]
+        assert [item["status"] for item in items] == [201, 201, 201, 400]
+        assert sorted(item["location"] for item in items[:3]) == [
+            "/api/events/Season%20Opener-2/",
+            "/api/events/Season%20Opener-3/",
+            "/api/events/Season%20Opener-4/",
+        ]
+
+        response = test_client.get("/api/users/Joni Maisema/events/", headers=headers)
+        assert len(response.get_json()["event_infos"]["organized_events"]) == 6
+
+    def test_post_too_many(self, test_client, monkeypatch):
+        """Test for UserEventsBulk POST with more events than BULK_EVENTS_MAX_ITEMS"""
+        monkeypatch.setattr(cfg, "BULK_EVENTS_MAX_ITEMS", 3)
+        monkeypatch.setattr(cfg, "BULK_EVENTS_CHUNK_SIZE", 2)
+        headers = {"User-Api-Key": JONI_MAISEMA_TOKEN}
+        json = DEFAULT_JSON.copy()
+        json.pop("organizer")
+        events = [{**json, "name": f"Limited {number}"} for number in range(5)]
+
+        def organized():
+            response = test_client.get("/api/users/Joni Maisema/events/", headers=headers)
+            return len(response.get_json()["event_infos"]["organized_events"])
+
+        before = organized()
+        # A JSON array is rejected before anything is inserted
+        response = test_client.post(self.RESOURCE_URL, json=events, headers=headers)
+        assert response.status_code == 413
+        assert organized() == before
+
+        # NDJSON lines past the limit are reported, the cached listing sees the others
+        response = test_client.post(
+            self.RESOURCE_URL,
+            data="\n".join(j.dumps(event) for event in events),
+            headers=headers,
+            content_type="application/x-ndjson",
+        )
+        assert response.status_code == 207
+        data = response.get_json()
+        assert [item["status"] for item in data["items"]] == [201, 201, 201, 413, 413]
+        assert (data["created"], data["failed"]) == (3, 2)
+        assert organized() == before + 3
+
+
 class TestUserEventItem:
     """Test for UserEventItem resource"""
 
@@ -412,3 +800,436 @@ class TestUserEventItem:
         # Test invalid deletion
         response = test_client.delete(self.INVALID_URL, headers={"User-Api-Key": JONI_MAISEMA_TOKEN})
         assert response.status_code == 404
+
+
+class TestCacheStatistics:
+    """Test for CacheStatistics resource"""
+
+    RESOURCE_URL = "/api/admin/cache/"
+
+    def test_get(self, test_client):
+        """Test for CacheStatistics GET"""
+        test_client.get("/api/events/")
+        test_client.get("/api/events/")
+
+        response = test_client.get(self.RESOURCE_URL, headers={"EMS-Api-Key": ADMIN_API_TOKEN})
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["response_cache"]["hits"] == 1
+        assert data["response_cache"]["misses"] == 1
+        assert "hits" in data["api_key_cache"]
+
+        response = test_client.get(self.RESOURCE_URL, headers={"EMS-Api-Key": JONI_MAISEMA_TOKEN})
+        assert response.status_code == 403
+
+
+class TestExport:
+    """Test for EventExport, UserExport and ParticipantExport resources"""
+
+    def test_get_events(self, test_client):
+        """Test for EventExport GET"""
+        response = test_client.get("/api/export/events/")
+        assert response.status_code == 200
+        assert response.mimetype == "application/x-ndjson"
+        rows = [j.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert [row["name"] for row in rows] == [DEFAULT_JSON["name"], SECOND_JSON["name"]]
+        assert rows[0]["tags"] == DEFAULT_JSON["tags"]
+        assert rows[0]["time"] == DEFAULT_JSON["time"]
+
+        response = test_client.get("/api/export/events/", query_string={"format": "csv"})
+        assert response.status_code == 200
+        assert response.mimetype == "text/csv"
+        lines = response.get_data(as_text=True).splitlines()
+        assert lines[0].startswith("id,slug,name,location,time")
+        assert len(lines) == 3
+
+        response = test_client.get("/api/export/events/", query_string={"format": "xml"})
+        assert response.status_code == 400
+
+    def test_get_users_and_participants(self, test_client):
+        """Test for UserExport and ParticipantExport GET"""
+        headers = {"EMS-Api-Key": ADMIN_API_TOKEN}
+        for url in ("/api/export/users/", "/api/export/participants/"):
+            response = test_client.get(url, headers={"EMS-Api-Key": JONI_MAISEMA_TOKEN})
+            assert response.status_code == 403
+
+        response = test_client.get("/api/export/users/", headers=headers)
+        assert response.status_code == 200
+        rows = [j.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert "Joni Maisema" in [row["name"] for row in rows]
+        assert all("key" not in row for row in rows)
+
+        response = test_client.get(
+            "/api/export/participants/", query_string={"format": "csv"}, headers=headers
+        )
+        assert response.status_code == 200
+        lines = response.get_data(as_text=True).splitlines()
+        assert lines[0] == "user_id,event_id"
+        assert len(lines) > 1
+
+
+class TestPoolStatistics:
+    """Test for PoolStatistics resource"""
+
+    RESOURCE_URL = "/api/admin/pool/"
+
+    def test_get(self, test_client):
+        """Test for PoolStatistics GET"""
+        response = test_client.get(self.RESOURCE_URL, headers={"EMS-Api-Key": ADMIN_API_TOKEN})
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["pool"]
+        if data["pool"] == "InstrumentedQueuePool":
+            assert data["checkouts"] >= 1
+            assert 0 <= data["saturation"] <= 1
+
+        response = test_client.get(self.RESOURCE_URL, headers={"EMS-Api-Key": JONI_MAISEMA_TOKEN})
+        assert response.status_code == 403
+
+
+class TestProfileCollection:
+    """Test for ProfileCollection resource"""
+
+    RESOURCE_URL = "/api/admin/profiles/"
+
+    def test_get(self, test_client):
+        """Test for ProfileCollection GET"""
+        headers = {"EMS-Api-Key": ADMIN_API_TOKEN}
+        profiler.enabled, profiler.sample_rate = True, 1.0
+        try:
+            assert test_client.get("/api/events/?fields=short").status_code == 200
+            response = test_client.get(self.RESOURCE_URL, headers=headers)
+        finally:
+            profiler.enabled, profiler.sample_rate = cfg.PROFILER_ENABLED, cfg.PROFILER_SAMPLE_RATE
+        assert response.status_code == 200
+        data = response.get_json()
+        profile = data["profiles"][0]
+        assert profile["path"] == "/api/events/?fields=short"
+        assert profile["endpoint"] == "eventcollection"
+        assert profile["query_count"] == len(profile["statements"]) >= 1
+        assert all(item["call_site"].startswith("src/") for item in profile["statements"])
+
+        response = test_client.get(self.RESOURCE_URL, headers={"EMS-Api-Key": JONI_MAISEMA_TOKEN})
+        assert response.status_code == 403
+
+    def test_delete(self, test_client):
+        """Test for ProfileCollection DELETE"""
+        headers = {"EMS-Api-Key": ADMIN_API_TOKEN}
+        assert test_client.delete(self.RESOURCE_URL, headers=headers).status_code == 204
+        assert test_client.get(self.RESOURCE_URL, headers=headers).get_json()["profiles"] == []
+
+
+class TestMetrics:
+    """Test for the /metrics route"""
+
+    RESOURCE_URL = "/metrics"
+
+    def test_get(self, test_client):
+        """Test for /metrics GET"""
+        assert test_client.get("/api/events/").status_code == 200
+        assert test_client.get("/api/users/").status_code == 403
+        assert test_client.get("/no/such/route/").status_code == 404
+
+        response = test_client.get(self.RESOURCE_URL)
+        assert response.status_code == 200
+        assert response.mimetype == "text/plain"
+        body = response.get_data(as_text=True)
+        assert 'ems_http_requests_total{method="GET",resource="EventCollection",status="200"}' in body
+        assert 'ems_http_requests_total{method="GET",resource="UserCollection",status="403"}' in body
+        assert 'resource="unmatched",status="404"' in body
+        assert 'ems_http_request_duration_seconds_bucket{le="0.005",method="GET",resource="EventCollection"}' in body
+        queries = [
+            line for line in body.splitlines()
+            if line.startswith('ems_db_queries_per_request_sum{method="GET",resource="EventCollection"}')
+        ]
+        assert queries and float(queries[0].split()[-1]) >= 1
+
+
+class TestEventParticipants:
+    """Test for EventParticipants resource"""
+
+    RESOURCE_URL = "/api/events/Shiny New Event/participants/kayttaja kaksi/"
+    ATTENDING_URL = "/api/events/Not Shiny Old Event/participants/Joni Maisema/"
+
+    def test_post(self, test_client):
+        """Test for EventParticipants POST"""
+        headers = {"User-Api-Key": KAYTTAJA_KAKSI_TOKEN}
+        response = test_client.post(self.RESOURCE_URL, headers=headers)
+        assert response.status_code == 201
+
+        # Test already participating
+        response = test_client.post(self.RESOURCE_URL, headers=headers)
+        assert response.status_code == 409
+
+        # Test someone else's key
+        response = test_client.post(self.RESOURCE_URL, headers={"User-Api-Key": JONI_MAISEMA_TOKEN})
+        assert response.status_code == 403
+
+        response = test_client.get(
+            "/api/users/kayttaja kaksi/events/", headers=headers
+        )
+        attended_events = response.get_json()["event_infos"]["attended_events"]
+        assert [event["name"] for event in attended_events] == [DEFAULT_JSON["name"]]
+
+    def test_delete(self, test_client):
+        """Test for EventParticipants DELETE"""
+        headers = {"User-Api-Key": JONI_MAISEMA_TOKEN}
+        response = test_client.delete(self.ATTENDING_URL, headers=headers)
+        assert response.status_code == 204
+
+        # Test not participating
+        response = test_client.delete(self.ATTENDING_URL, headers=headers)
+        assert response.status_code == 404
+
+        response = test_client.get("/api/users/Joni Maisema/events/", headers=headers)
+        assert response.get_json()["event_infos"]["attended_events"] == []
+
+    def test_participant_count(self, test_client):
+        """Test that participant_count follows the sign-ups and that capacity is enforced"""
+        event_url = "/api/events/Not Shiny Old Event/"
+        assert test_client.get(event_url).get_json()["participant_count"] == 1
+
+        event = db.session.get(Event, 2)
+        event.capacity = 1
+        db.session.commit()
+        url = "/api/events/Not Shiny Old Event/participants/kayttaja kaksi/"
+        response = test_client.post(url, headers={"User-Api-Key": KAYTTAJA_KAKSI_TOKEN})
+        assert response.status_code == 409
+        assert test_client.get(event_url).get_json()["participant_count"] == 1
+
+        response = test_client.delete(self.ATTENDING_URL, headers={"User-Api-Key": JONI_MAISEMA_TOKEN})
+        assert response.status_code == 204
+        data = test_client.get(event_url).get_json()
+        assert data["participant_count"] == 0
+        assert data["capacity"] == 1
+
+        response = test_client.post(url, headers={"User-Api-Key": KAYTTAJA_KAKSI_TOKEN})
+        assert response.status_code == 201
+        assert test_client.get(event_url).get_json()["participant_count"] == 1
+
+    def test_post_on_dump_schema(self, test_client):
+        """Test repeated sign-ups on the participations table of the 2025-02-09 dumps"""
+        dump_table = db.Table(
+            "event_participants",
+            db.MetaData(),
+            db.Column("id", db.Integer, primary_key=True, autoincrement=True),
+            db.Column("user_id", db.Integer, db.ForeignKey(User.id), nullable=True, index=True),
+            db.Column("event_id", db.Integer, db.ForeignKey(Event.id), nullable=True, index=True),
+        )
+        db.session.commit()
+        event_participants.drop(db.engine)
+        dump_table.create(db.engine)
+        with db.engine.begin() as connection:
+            connection.execute(dump_table.insert(), [
+                {"user_id": 1, "event_id": 2},
+                {"user_id": 1, "event_id": 2},
+                {"user_id": None, "event_id": 2},
+            ])
+            connection.execute(participant_recount(participants=dump_table))
+        tables = {"users": "user", "events": "event"}
+        for _ in range(2):
+            with db.engine.begin() as connection:
+                add_participant_key(connection, tables)
+
+        event_url = "/api/events/Not Shiny Old Event/"
+        assert test_client.get(event_url).get_json()["participant_count"] == 1
+        url = "/api/events/Not Shiny Old Event/participants/kayttaja kaksi/"
+        headers = {"User-Api-Key": KAYTTAJA_KAKSI_TOKEN}
+        assert test_client.post(url, headers=headers).status_code == 201
+        assert test_client.post(url, headers=headers).status_code == 409
+        assert test_client.post(url, headers=headers).status_code == 409
+        assert test_client.get(event_url).get_json()["participant_count"] == 2
+        rows = db.session.execute(db.select(dump_table.c.user_id, dump_table.c.event_id)).all()
+        assert sorted(rows) == [(1, 2), (2, 2)]
+
+    def test_capacity_put(self, test_client):
+        """Test that a PUT keeps a missing capacity and can't go below the participant count"""
+        event_url = "/api/events/Not Shiny Old Event/"
+        put_url = "/api/users/kayttaja kaksi/events/Not Shiny Old Event/"
+        headers = {"User-Api-Key": KAYTTAJA_KAKSI_TOKEN}
+        response = test_client.put(put_url, json={**SECOND_JSON, "capacity": 3}, headers=headers)
+        assert response.status_code == 200
+        response = test_client.put(put_url, json=SECOND_JSON, headers=headers)
+        assert response.status_code == 200
+        assert test_client.get(event_url).get_json()["capacity"] == 3
+
+        response = test_client.put(put_url, json={**SECOND_JSON, "capacity": 0}, headers=headers)
+        assert response.status_code == 409
+        assert test_client.get(event_url).get_json()["capacity"] == 3
+        response = test_client.put(put_url, json={**SECOND_JSON, "capacity": None}, headers=headers)
+        assert response.status_code == 200
+        assert test_client.get(event_url).get_json()["capacity"] is None
+
+    def test_validators(self, test_client):
+        """Test that sign-ups change the validators of the event but not of the listings"""
+        event_url = "/api/events/Not Shiny Old Event/"
+        collection_etag = test_client.get("/api/events/").headers["ETag"]
+        event_etag = test_client.get(event_url).headers["ETag"]
+
+        response = test_client.delete(self.ATTENDING_URL, headers={"User-Api-Key": JONI_MAISEMA_TOKEN})
+        assert response.status_code == 204
+        assert test_client.get("/api/events/").headers["ETag"] == collection_etag
+        response = test_client.get(event_url, headers={"If-None-Match": event_etag})
+        assert response.status_code == 200
+        assert response.get_json()["participant_count"] == 0
+
+    def test_concurrent_post(self, test_client):
+        """Stress test of concurrent sign-ups to an event with limited capacity"""
+        capacity, users = 5, 24
+        tokens = {}
+        for number in range(users):
+            user = populate_single_user(name=f"participant {number}", email=f"p{number}@example.com")
+            tokens[user.slug] = secrets.token_urlsafe()
+            db.session.add(ApiKey(key=ApiKey.key_hash(tokens[user.slug]), user_id=user.id))
+        event = db.session.get(Event, 1)
+        event.capacity = capacity
+        db.session.commit()
+
+        def sign_up(slug):
+            client = app.test_client()
+            response = client.post(
+                f"/api/events/Shiny New Event/participants/{slug}/",
+                headers={"User-Api-Key": tokens[slug]},
+            )
+            return response.status_code
+
+        barrier = threading.Barrier(8)
+
+        def sign_up_together(slug):
+            try:
+                barrier.wait(timeout=1)
+            except threading.BrokenBarrierError:
+                pass
+            return sign_up(slug)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            statuses = list(executor.map(sign_up_together, tokens))
+
+        assert statuses.count(201) == capacity
+        assert statuses.count(409) == users - capacity
+        db.session.expire_all()
+        participations = db.session.execute(
+            db.select(db.func.count()).select_from(event_participants).where(
+                event_participants.c.event_id == 1
+            )
+        ).scalar()
+        assert db.session.get(Event, 1).participant_count == participations == capacity
+
+
+class TestEventParticipantsBulk:
+    """Test for EventParticipantsBulk resource"""
+
+    RESOURCE_URL = "/api/events/Not Shiny Old Event/participants/"
+
+    def participant_count(self, test_client):
+        return test_client.get("/api/events/Not Shiny Old Event/").get_json()["participant_count"]
+
+    def test_post_admin(self, test_client):
+        """Test for EventParticipantsBulk POST with an admin key"""
+        headers = {"EMS-Api-Key": ADMIN_API_TOKEN}
+        body = {"users": ["kayttaja kaksi", "Joni Maisema", "nobody", "KAYTTAJA KAKSI"]}
+        response = test_client.post(self.RESOURCE_URL, json=body, headers=headers)
+        assert response.status_code == 207
+        data = response.get_json()
+        assert data["added"] == 1
+        assert data["failed"] == 3
+        assert [item["status"] for item in data["items"]] == [201, 409, 404, 400]
+        assert self.participant_count(test_client) == 2
+
+        response = test_client.get(
+            "/api/users/kayttaja kaksi/events/", headers={"User-Api-Key": KAYTTAJA_KAKSI_TOKEN}
+        )
+        attended_events = response.get_json()["event_infos"]["attended_events"]
+        assert [event["name"] for event in attended_events] == [SECOND_JSON["name"]]
+
+        # Strings need an admin key
+        response = test_client.post(self.RESOURCE_URL, json=body)
+        assert response.status_code == 403
+        response = test_client.post(self.RESOURCE_URL, json={"users": []}, headers=headers)
+        assert response.status_code == 400
+
+    def test_post_user_keys(self, test_client):
+        """Test for EventParticipantsBulk POST with the keys of the users and a full event"""
+        event = db.session.get(Event, 2)
+        event.capacity = 2
+        db.session.commit()
+        user = populate_single_user(name="third user", email="third@example.com")
+        token = secrets.token_urlsafe()
+        db.session.add(ApiKey(key=ApiKey.key_hash(token), user_id=user.id))
+        db.session.commit()
+
+        body = {"users": [
+            {"user": "kayttaja kaksi", "api_key": KAYTTAJA_KAKSI_TOKEN},
+            {"user": "Joni Maisema", "api_key": KAYTTAJA_KAKSI_TOKEN},
+            {"user": "third user", "api_key": token},
+        ]}
+        response = test_client.post(self.RESOURCE_URL, json=body)
+        assert response.status_code == 207
+        items = response.get_json()["items"]
+        assert [item["status"] for item in items] == [201, 403, 409]
+        assert items[2]["error"] == "The event is full"
+        assert self.participant_count(test_client) == 2
+
+    def test_delete(self, test_client):
+        """Test for EventParticipantsBulk DELETE"""
+        headers = {"EMS-Api-Key": ADMIN_API_TOKEN}
+        body = {"users": ["Joni Maisema", "kayttaja kaksi"]}
+        response = test_client.delete(self.RESOURCE_URL, json=body, headers=headers)
+        assert response.status_code == 207
+        data = response.get_json()
+        assert data["removed"] == 1
+        assert [item["status"] for item in data["items"]] == [204, 404]
+        assert self.participant_count(test_client) == 0
+
+        body = {"users": [{"user": "kayttaja kaksi", "api_key": KAYTTAJA_KAKSI_TOKEN}]}
+        assert test_client.post(self.RESOURCE_URL, json=body).status_code == 201
+        response = test_client.delete(self.RESOURCE_URL, json=body)
+        assert response.status_code == 200
+        assert response.get_json()["removed"] == 1
+        assert self.participant_count(test_client) == 0
+
+
+class TestPopulateDatabase:
+    """Test for the generated data of populate_database"""
+
+    def test_populate_database(self, test_client):
+        """Test that the generated data is complete and reproducible"""
+        arguments = {"users": 30, "events": 10, "participations": 3, "seed": 7, "batch_size": 8}
+
+        def generated_rows():
+            users = db.session.execute(
+                db.select(User.id, User.name, User.slug).where(User.id > 2).order_by(User.id)
+            ).all()
+            events = db.session.execute(
+                db.select(Event.id, Event.name, Event.slug, Event.time, Event.organizer)
+                .where(Event.id > 2).order_by(Event.id)
+            ).all()
+            participations = db.session.execute(
+                db.select(event_participants).where(event_participants.c.user_id > 2)
+            ).all()
+            return users, events, sorted(participations)
+
+        counts = populate_database(**arguments)
+        assert counts["users"] == 30
+        assert counts["events"] == 10
+        users, events, participations = generated_rows()
+        assert len(users) == 30
+        assert len(events) == 10
+        assert len(participations) == counts["participations"]
+        assert len({user.slug for user in users}) == 30
+        assert all(2 < event.organizer <= 32 for event in events)
+        response = test_client.get(f"/api/events/{events[0].slug}/")
+        assert response.status_code == 200
+        assert response.get_json()["participant_count"] == sum(
+            1 for participation in participations if participation.event_id == events[0].id
+        )
+
+        # The same arguments generate the same data again
+        db.session.execute(
+            db.delete(event_participants).where(event_participants.c.user_id > 2)
+        )
+        db.session.execute(db.delete(Event).where(Event.id > 2))
+        db.session.execute(db.delete(User).where(User.id > 2))
+        db.session.commit()
+        populate_database(**arguments)
+        assert generated_rows() == (users, events, participations)